@@ -92,6 +92,7 @@ LOCAL_APPS = [
     "src.campaigns.apps.CampaignsConfig",
     "src.vertical_meteograms.apps.VerticalMeteogramsConfig",
     "src.surface_meteograms.apps.SurfaceMeteogramsConfig",
+    "src.tiles.apps.TilesConfig",
     # Your stuff: custom apps go here
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -296,7 +297,29 @@ ACCOUNT_DEFAULT_HTTP_PROTOCOL = "http"
 
 # Your stuff...
 # ------------------------------------------------------------------------------
-
+# weathervis config files (stations.yaml, domains.yaml, ...) are regenerated once
+# the transaction is committed; set a delay (in seconds) to regenerate them from
+# a background thread, after the last change of a burst.
+CONFIG_EXPORT_DEBOUNCE = env.float("DJANGO_CONFIG_EXPORT_DEBOUNCE", default=0)
+# time (in seconds) map layers are kept in cache, whatever the changes
+MAP_LAYER_CACHE_TIMEOUT = env.int("DJANGO_MAP_LAYER_CACHE_TIMEOUT", default=86400)
+# draw stations, domains and model grids on the maps from vector tiles (/tiles/),
+# instead of GeoJSON layers
+MAP_VECTOR_TILES = env.bool("DJANGO_MAP_VECTOR_TILES", default=False)
+# widths (in pixels) of the WebP versions of the meteogram images, the smallest one
+# is also rendered as png thumbnail, see 'update_plot --derivatives'
+MEDIA_DERIVATIVE_WIDTHS = [
+    int(w) for w in env.list("DJANGO_MEDIA_DERIVATIVE_WIDTHS", default=["480", "960"])
+]
+MEDIA_DERIVATIVE_QUALITY = env.int("DJANGO_MEDIA_DERIVATIVE_QUALITY", default=80)
+# media files are served to logged in users only, except files directly in these
+# directories (logo, placeholder images), see src.utils.media
+MEDIA_PUBLIC_DIRS = ["pics"]
+# how media files are sent: 'x-accel' (nginx), 'x-sendfile' (apache, mod_xsendfile),
+# or 'django' (development)
+MEDIA_SERVE_BACKEND = env("DJANGO_MEDIA_SERVE_BACKEND", default="django")
+# nginx internal location aliased to MEDIA_ROOT, used with 'x-accel'
+MEDIA_ACCEL_PREFIX = env("DJANGO_MEDIA_ACCEL_PREFIX", default="/protected-media/")
 
 # leaflet defaults configuration
 LEAFLET_CONFIG = {
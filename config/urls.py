@@ -1,7 +1,6 @@
 # Stdlib imports
 # Core Django import
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 from django.views import defaults as default_views
@@ -9,6 +8,7 @@ from django.views.generic import TemplateView
 
 # Third-party app imports
 # Imports from my apps
+from src.utils.media import serve_media
 
 admin.site.site_header = (
     "Django Weathervis Adminsitration"  # default: "Django Administration"
@@ -68,7 +68,15 @@ urlpatterns = [
         "smeteograms/",
         include("src.surface_meteograms.urls", namespace="smeteograms"),
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(
+        "tiles/",
+        include("src.tiles.urls", namespace="tiles"),
+    ),
+    # media files, login required except public pictures
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:path>", serve_media, name="media"
+    ),
+]
 
 
 if settings.DEBUG:
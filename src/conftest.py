@@ -2,7 +2,10 @@
 import pytest
 
 # Core Django imports
+from django.core.cache import cache
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 # Third-party app imports
 from faker import Faker
@@ -40,6 +43,14 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """do not share cached values (exports fingerprint, ...) between tests"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture()
 def user(request) -> User:
     user = UserFactory()
@@ -78,6 +89,18 @@ def user2(request) -> User:
     return user
 
 
+@pytest.fixture
+def count_queries():
+    """return a function counting the queries run by a callable"""
+
+    def _count_queries(func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context.captured_queries)
+
+    return _count_queries
+
+
 @pytest.fixture
 def staff() -> User:
     staff = UserFactory(staff=True)
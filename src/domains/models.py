@@ -3,7 +3,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import CICharField
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django_extensions.db.fields import AutoSlugField
@@ -12,6 +12,8 @@ from django_extensions.db.fields import AutoSlugField
 # Imports from my apps
 from src.campaigns.models import Campaign
 from src.plots.models import DomainsPlot
+from src.utils.export import bump_export_version, schedule_export
+from src.utils.layers import bump_layer_version
 
 User = get_user_model()
 
@@ -91,16 +93,13 @@ class Domain(models.Model):
         super().save(*args, **kwargs)
         if self.active_campaign:
             self.campaigns.add(self.active_campaign)
-        from .util import download
-
-        download()
+        # update weathervis config files, once the transaction is committed
+        schedule_export("domains")
 
     def delete(self, *args, **kwargs):
         """ """
         super().delete(*args, **kwargs)
-        from .util import download
-
-        download()
+        schedule_export("domains")
 
     @classmethod
     def disable_all(cls, campaign_id=None):
@@ -108,6 +107,9 @@ class Domain(models.Model):
             cls.objects.filter(campaigns=campaign_id).update(is_active=False)
         else:
             cls.objects.update(is_active=False)
+        bump_export_version("domains")
+        bump_layer_version("domains")
+        schedule_export("domains")
 
     @classmethod
     def enable_all(cls, campaign_id=None):
@@ -115,17 +117,32 @@ class Domain(models.Model):
             cls.objects.filter(campaigns=campaign_id).update(is_active=True)
         else:
             cls.objects.update(is_active=True)
+        bump_export_version("domains")
+        bump_layer_version("domains")
+        schedule_export("domains")
 
     @classmethod
     def active_campaign_is(cls, campaign_id=None):
         cls.objects.update(active_campaign=campaign_id)
+        bump_layer_version("domains")
+        schedule_export("domains")
 
 
 @receiver(m2m_changed, sender=Domain.plots.through)
+@receiver(m2m_changed, sender=Domain.campaigns.through)
 def update_domain_m2m(sender, instance, action, reverse, *args, **kwargs):
     """wait until change in Many2Many field get saved"""
     # https://stackoverflow.com/a/57308547
     if "post" in action:
-        from .util import download
-
-        download()
+        bump_export_version("domains")
+        bump_layer_version("domains")
+        schedule_export("domains")
+
+
+@receiver([post_save, post_delete], sender=Domain)
+@receiver([post_save, post_delete], sender=DomainsPlot)
+@receiver([post_save, post_delete], sender=Campaign)
+def update_domain_version(sender, *args, **kwargs):
+    """flag domains config file and map layer as changed"""
+    bump_export_version("domains")
+    bump_layer_version("domains")
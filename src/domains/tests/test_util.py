@@ -0,0 +1,39 @@
+# Stdlib imports
+import pytest
+
+# Core Django imports
+# Third-party app imports
+# Imports from my apps
+from src.campaigns.models import Campaign
+from src.domains import util
+from src.domains.models import Domain
+from src.domains.tests.factories import DomainFactory
+from src.plots.tests.factories import DomainsPlotFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_download_constant_queries(tmp_path, count_queries):
+    """
+    GIVEN domains in the active campaign
+    WHEN  downloading the config file, with more and more domains
+    THEN  the number of queries stays the same
+    """
+    campaign = Campaign.objects.create(name="campaign")
+    plots = [DomainsPlotFactory(name=f"plot{i}") for i in range(3)]
+
+    def _add_domains(number):
+        start = Domain.objects.count()
+        for i in range(start, start + number):
+            domain = DomainFactory(name=f"domain{i}")
+            domain.campaigns.add(campaign)
+            domain.plots.add(*plots)
+        Domain.active_campaign_is(campaign.pk)
+
+    fparam = tmp_path / "domains.yaml"
+
+    _add_domains(2)
+    nqueries = count_queries(util.download, fparam)
+    _add_domains(10)
+    assert count_queries(util.download, fparam) == nqueries
+    assert "domain11" in fparam.read_text()
@@ -6,10 +6,12 @@ import yaml
 
 # Core Django imports
 from django.contrib.gis.geos import Polygon as GeoPolygon
+from django.db.models import Count, Max
 
 # Imports from my apps
-from src.campaigns.models import Campaign
-from src.stations.util import MyDumper
+from src.stations.util import get_active_campaign, in_active_campaign
+from src.utils.export import cached_export
+from src.utils.writers import AtomicWriter, write_yaml_entries
 
 from .models import Domain
 
@@ -77,27 +79,14 @@ def upload(fparam_=domain_data_path / "domains.ini.yaml"):
         )
 
 
-def download(fparam_=domain_data_path / "domains.yaml"):
-    """download domain from database and write domains.yaml
-
-    Note:
-        - only active domains are downloaded.
-        - only domains from the active campaign are downloaded.
-    """
-    dic = {}
-    _pk = Domain.objects.all().first().active_campaign
-    if _pk:
-        campaign = Campaign.objects.get(pk=_pk)
-    else:
-        campaign = "any or none"
-
-    for domain in Domain.objects.all():
-        if domain.is_active and (
-            not domain.active_campaign
-            or domain.active_campaign
-            in domain.campaigns.all().values_list("id", flat=True)
-        ):
-            dic[domain.name] = {
+def _domain_entries():
+    """yield (name, parameters) of domains to write in domains.yaml"""
+    domains = Domain.objects.filter(is_active=True).prefetch_related(
+        "campaigns", "plots"
+    )
+    for domain in domains:
+        if in_active_campaign(domain):
+            yield domain.name, {
                 "west": domain.west,
                 "north": domain.north,
                 "east": domain.east,
@@ -107,6 +96,29 @@ def download(fparam_=domain_data_path / "domains.yaml"):
                 "plots": [p.name for p in domain.plots.all()],
             }
 
+
+def _fingerprint():
+    """cheap aggregate of the domains table, see cached_export"""
+    return tuple(
+        Domain.objects.aggregate(
+            count=Count("id"),
+            max_id=Max("id"),
+            active_campaign=Max("active_campaign"),
+        ).values()
+    )
+
+
+@cached_export("domains", _fingerprint)
+def download(fparam_=domain_data_path / "domains.yaml"):
+    """download domain from database and write domains.yaml
+
+    Note:
+        - only active domains are downloaded.
+        - only domains from the active campaign are downloaded.
+        - file is left untouched if its content does not change.
+    """
+    campaign = get_active_campaign(Domain)
+
     header = f"""
 #
 # Domains from campaign "{campaign}"
@@ -122,13 +134,8 @@ def download(fparam_=domain_data_path / "domains.yaml"):
 #   plots: list of plots selected fot this domain
 """
 
-    with open(fparam_, "w") as stream:
+    with AtomicWriter(fparam_) as stream:
         stream.write(header + "\n")
-        yaml.dump(
-            dic,
-            stream=stream,
-            Dumper=MyDumper,
-            default_flow_style=False,
-            sort_keys=False,
-            indent=4,
-        )
+        write_yaml_entries(stream, _domain_entries())
+
+    return stream.changed
@@ -5,8 +5,7 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.gis.geos import Polygon as GeoPolygon
 from django.contrib.messages.views import SuccessMessageMixin
-from django.core.serializers import serialize
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
@@ -23,10 +22,16 @@ from django.views.generic import (
 # Imports from my apps
 from src.campaigns.models import Campaign
 from src.stations.models import Station
+from src.utils.export import bump_export_version, schedule_export
+from src.utils.geojson import feature_collection, read_viewport, zoom_tolerance
+from src.utils.layers import layer_response
 
 from .forms import DomainCampaignForm, DomainForm, DomainUpdateForm
 from .models import Domain
 
+# Domain fields written in GeoJSON properties, as used by the maps
+GEOJSON_PROPERTIES = ["name", "slug", "is_active"]
+
 
 def get_my_queryset(request):
     campaign_id = request.session.get("campaign_id")
@@ -39,22 +44,37 @@ def get_my_queryset(request):
 
 
 def data_this_domain(request, slug):
-    """this uses the serializer to convert the data 'Domain.objects.all()' to 'geojson' data"""
-    domain = serialize(
-        "geojson",
+    """convert the data 'Domain.objects.filter(slug=slug)' to 'geojson' data"""
+    domain = feature_collection(
         Domain.objects.filter(slug=slug),
-        geometry_field=("geom"),
+        GEOJSON_PROPERTIES,
     )
     return HttpResponse(domain, content_type="json")
 
 
 def data_all_domains(request):
-    """this uses the serializer to convert the data 'Domain.objects.all()' to 'geojson' data"""
-    domain = serialize(
-        "geojson",
-        get_my_queryset(request),
-    )
-    return HttpResponse(domain, content_type="json")
+    """convert the data 'Domain.objects.all()' to 'geojson' data
+
+    Note:
+        - optional 'bbox' and 'zoom' query parameters, only domains inside
+          the map viewport, simplified for the zoom level.
+        - layer is cached per campaign and viewport, until a domain changes.
+    """
+    try:
+        bbox, zoom = read_viewport(request)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    def _build():
+        return feature_collection(
+            get_my_queryset(request),
+            GEOJSON_PROPERTIES,
+            bbox_=bbox,
+            tolerance_=zoom_tolerance(zoom),
+        )
+
+    campaign_id = request.session.get("campaign_id")
+    return layer_response(request, "domains", _build, campaign_id, bbox, zoom)
 
 
 @login_required
@@ -79,9 +99,9 @@ def enable_all_domains(request):
 @permission_required("domains.change_domain")
 def download_config(request):
     """download config files for Domain and return list view"""
-    qs = get_my_queryset(request)
-    domain = qs.order_by("name").first()
-    domain.save()
+    # force regeneration, files may have been edited or removed by hand
+    bump_export_version("domains")
+    schedule_export("domains")
     messages.info(request, "Domains config file successfully downloaded")
     return redirect(reverse_lazy("domains:redirect"))
 
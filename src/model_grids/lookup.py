@@ -0,0 +1,81 @@
+# Stdlib imports
+import threading
+
+# Core Django imports
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# Third-party app imports
+# Imports from my apps
+from src.utils.layers import layer_cache
+
+from .models import ModelGrid
+
+
+class PreparedGrids:
+    """per process cache of the prepared geometries of the model grids
+
+    Used to locate many points without a query per point, or where the
+    database can not be used. Prepared geometries index the border once,
+    so each point lookup is much cheaper than a plain GEOS intersects.
+
+    The cache is reset by ModelGrid signals, and reloaded if the change
+    counter of the model grids layer changed (e.g. upload in another process),
+    read from the default cache: no query while the model grids are unchanged.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._grids = []
+
+    def _current(self):
+        # bumped by ModelGrid signals, see src.model_grids.models
+        return layer_cache.version("grids")
+
+    def clear(self):
+        with self._lock:
+            self._fingerprint = None
+            self._grids = []
+
+    def grids(self):
+        """return list of (name, prepared geometry), reloaded if need be"""
+        fingerprint = self._current()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._grids = [
+                    (name, geom.prepared)
+                    for name, geom in ModelGrid.objects.values_list("name", "geom")
+                ]
+                self._fingerprint = fingerprint
+            return self._grids
+
+    def containing(self, point_):
+        """return names of the model grids containing the point"""
+        return [name for name, geom in self.grids() if geom.intersects(point_)]
+
+
+prepared_grids = PreparedGrids()
+
+
+def grids_containing(point_, use_db_=True):
+    """return names of the model grids containing the point, without duplicates
+
+    Args:
+        point_: Point (lon, lat[, alt]), srid 4326
+        use_db_: look up with the spatial index of the database,
+          otherwise with the cached prepared geometries
+    """
+    if use_db_:
+        names = ModelGrid.objects.containing(point_).values_list("name", flat=True)
+    else:
+        names = prepared_grids.containing(point_)
+
+    # same model grid could be registered for many validity periods
+    return list(dict.fromkeys(names))
+
+
+@receiver(post_save, sender=ModelGrid)
+@receiver(post_delete, sender=ModelGrid)
+def clear_prepared_grids(sender, **kwargs):
+    prepared_grids.clear()
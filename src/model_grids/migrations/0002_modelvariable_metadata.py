@@ -0,0 +1,46 @@
+# Generated by Django 3.1.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("model_grids", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="modelvariable",
+            name="slug",
+            field=django_extensions.db.fields.AutoSlugField(
+                blank=True,
+                editable=False,
+                overwrite_on_add=False,
+                populate_from="name",
+                unique=True,
+                verbose_name="Variable name",
+            ),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="dimensions",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="shape",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="units",
+            field=models.CharField(blank=True, default="", max_length=150),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="standard_name",
+            field=models.CharField(blank=True, default="", max_length=150),
+        ),
+    ]
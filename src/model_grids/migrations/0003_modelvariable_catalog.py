@@ -0,0 +1,38 @@
+# Generated by Django 3.1.13 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("model_grids", "0002_modelvariable_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelvariable",
+            name="dtype",
+            field=models.CharField(blank=True, default="", max_length=50),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="vertical_coordinate",
+            field=models.CharField(blank=True, default="", max_length=150),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="levels",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="time_start",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="modelvariable",
+            name="time_end",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -2,14 +2,26 @@
 # Core Django imports
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django_extensions.db.fields import AutoSlugField
 
 # Third-party app imports
 # Imports from my apps
+from src.utils.layers import bump_layer_version
 
 User = get_user_model()
 
 
+class ModelGridQuerySet(models.QuerySet):
+    def containing(self, point_):
+        """model grids containing the point, looked up with the spatial index"""
+        if point_.srid is None:
+            point_ = point_.clone()
+            point_.srid = 4326
+        return self.filter(geom__intersects=point_)
+
+
 class ModelGrid(models.Model):
     #
     name = models.CharField(
@@ -30,6 +42,8 @@ class ModelGrid(models.Model):
     date_valid_end = models.DateTimeField(null=True)
     leadtime = models.DurationField(null=True)  # datetime.timedelta(hours=66)
 
+    objects = ModelGridQuerySet.as_manager()
+
     class Meta:
         ordering = ["name", "date_valid_start"]
         constraints = [
@@ -55,9 +69,22 @@ class ModelVariable(models.Model):
         unique=True,
         # always_update=False,
         populate_from="name",
+        # keep slugs computed beforehand, see util._make_slugs (bulk_create)
+        overwrite_on_add=False,
     )
     model_grid = models.ForeignKey(ModelGrid, on_delete=models.CASCADE)
-    # level
+    # metadata read from the netcdf file
+    dimensions = models.JSONField(default=list, blank=True)  # ["time", "y", "x"]
+    shape = models.JSONField(default=list, blank=True)  # [67, 949, 739]
+    units = models.CharField(max_length=150, blank=True, default="")
+    standard_name = models.CharField(max_length=150, blank=True, default="")
+    dtype = models.CharField(max_length=50, blank=True, default="")  # float32
+    # vertical coordinate, and its values
+    vertical_coordinate = models.CharField(max_length=150, blank=True, default="")
+    levels = models.JSONField(default=list, blank=True)  # [1000.0, 925.0, 850.0]
+    # time axis
+    time_start = models.DateTimeField(null=True, blank=True)
+    time_end = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["model_grid", "name"]
@@ -74,3 +101,9 @@ class ModelVariable(models.Model):
     # Returns the string representation of the model.
     def __str__(self):
         return f"{self.name} ({self.model_grid})"
+
+
+@receiver([post_save, post_delete], sender=ModelGrid)
+def update_grid_version(sender, *args, **kwargs):
+    """flag model grids map layer as changed"""
+    bump_layer_version("grids")
@@ -0,0 +1,62 @@
+# Stdlib imports
+# Core Django imports
+from django.contrib.gis.geos import Point, Polygon
+
+# Third-party app imports
+import pytest
+
+# Imports from my apps
+from src.model_grids.lookup import grids_containing, prepared_grids
+from src.model_grids.tests.factories import ModelGridFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def _square(x0, y0, size):
+    """return a 3D square polygon"""
+    return Polygon(
+        [
+            (x0, y0, 0),
+            (x0 + size, y0, 0),
+            (x0 + size, y0 + size, 0),
+            (x0, y0 + size, 0),
+            (x0, y0, 0),
+        ]
+    )
+
+
+@pytest.fixture
+def grids():
+    ModelGridFactory(name="large", geom=_square(0, 50, 20))
+    ModelGridFactory(name="small", geom=_square(5, 55, 2))
+    ModelGridFactory(name="far", geom=_square(100, 0, 2))
+
+
+@pytest.mark.parametrize("use_db", [True, False])
+def test_grids_containing(grids, use_db):
+    """
+    GIVEN overlapping model grids
+    WHEN  looking up the model grids containing a point
+    THEN  return all the model grids containing it
+    """
+    inside_both = Point(6, 56, 100, srid=4326)
+    inside_one = Point(1, 51, 100, srid=4326)
+    outside = Point(-50, -50, 100, srid=4326)
+
+    assert sorted(grids_containing(inside_both, use_db)) == ["large", "small"]
+    assert grids_containing(inside_one, use_db) == ["large"]
+    assert grids_containing(outside, use_db) == []
+
+
+def test_prepared_grids_reloaded(grids, count_queries):
+    """
+    GIVEN prepared geometries already cached
+    WHEN  looking up points, then registering a new model grid
+    THEN  no query until the cache is reloaded
+    """
+    point = Point(-49, -49, 0, srid=4326)
+    assert prepared_grids.containing(point) == []
+    assert count_queries(prepared_grids.containing, point) == 0
+
+    ModelGridFactory(name="new", geom=_square(-50, -50, 2))
+    assert prepared_grids.containing(point) == ["new"]
@@ -13,7 +13,8 @@ from faker import Faker
 
 # Imports from my apps
 from src.model_grids import util
-from src.model_grids.models import ModelGrid
+from src.model_grids.models import ModelGrid, ModelVariable
+from src.model_grids.tests.factories import ModelGridFactory
 
 pytestmark = pytest.mark.django_db
 # TODO: use smaller data/create small fake data to speed up tests
@@ -53,6 +54,102 @@ def fake_geonc(tmp_path, lat_name="lat", lon_name="lon", alt_name="alt"):
     return _tmp
 
 
+def fake_geonc2d(tmp_path, n=4, m=5):
+    """
+    create dummy netcdf file with 2D longitude and latitude.
+
+    tmp_path: path to repository where file will be created
+    n, m: shape of the grid
+    return: path of the file
+    """
+    _tmp = tmp_path / "test2d.nc"
+
+    lon, lat = np.meshgrid(np.linspace(0, 10, m), np.linspace(50, 60, n))
+    ds = xr.Dataset(
+        {
+            "longitude": (["y", "x"], lon),
+            "latitude": (["y", "x"], lat),
+        },
+    )
+    ds.to_netcdf(path=_tmp, format="NETCDF4_CLASSIC")
+
+    return _tmp
+
+
+def fake_gridnc(tmp_path, n=4, m=5):
+    """
+    create dummy model grid netcdf file, with 2D longitude and latitude,
+    and an unlimited 'time' variable.
+
+    tmp_path: path to repository where file will be created
+    n, m: shape of the grid
+    return: path of the file
+    """
+    _tmp = tmp_path / "grid.nc"
+
+    lon, lat = np.meshgrid(np.linspace(0, 10, m), np.linspace(50, 60, n))
+    with nc.Dataset(_tmp, "w", format="NETCDF4_CLASSIC") as ds:
+        ds.createDimension("time", None)
+        ds.createDimension("y", n)
+        ds.createDimension("x", m)
+        time = ds.createVariable("time", "f8", ("time",))
+        time.standard_name = "time"
+        time.units = "hours since 2020-01-01 00:00:00"
+        time[:] = [0, 6, 12]
+        ds.createVariable("latitude", "f8", ("y", "x"))[:] = lat
+        ds.createVariable("longitude", "f8", ("y", "x"))[:] = lon
+        ds.createDimension("pressure", 2)
+        pressure = ds.createVariable("pressure", "f8", ("pressure",))
+        pressure.positive = "down"
+        pressure[:] = [1000, 850]
+        temp = ds.createVariable(
+            "air_temperature", "f4", ("time", "pressure", "y", "x")
+        )
+        temp.standard_name = "air_temperature"
+        temp.units = "K"
+
+    return _tmp
+
+
+def test__get_border(tmp_path):
+    """
+    GIVEN a netcdf input file with 2D 'latitude' and 'longitude'
+    WHEN  running _get_border
+    THEN  return the ring of edge grid cells, first row, last column,
+     last row and first column
+    """
+    _tmp = fake_geonc2d(tmp_path)
+    with nc.Dataset(_tmp, "r") as ds:
+        border = util._get_border(ds)
+        lat = ds.variables["latitude"][:]
+        lon = ds.variables["longitude"][:]
+
+    n, m = lat.shape
+    expected = [
+        *[(lon[0, x], lat[0, x], 0) for x in range(m)],
+        *[(lon[x, m - 1], lat[x, m - 1], 0) for x in range(n)],
+        *[(lon[n - 1, x], lat[n - 1, x], 0) for x in reversed(range(m))],
+        *[(lon[x, 0], lat[x, 0], 0) for x in reversed(range(n))],
+    ]
+    assert np.allclose(border[0].coords, expected)
+
+
+def test__get_border_simplify(tmp_path):
+    """
+    GIVEN a netcdf input file with 2D 'latitude' and 'longitude'
+    WHEN  running _get_border with a tolerance
+    THEN  return a 3D border with fewer points, covering the same area
+    """
+    _tmp = fake_geonc2d(tmp_path, n=50, m=60)
+    with nc.Dataset(_tmp, "r") as ds:
+        border = util._get_border(ds)
+        simplified = util._get_border(ds, tolerance_=0.01)
+
+    assert simplified.hasz
+    assert simplified.num_coords < border.num_coords
+    assert simplified.extent == border.extent
+
+
 def test__setup_border_variable_not_found(tmp_path):
     """
     GIVEN a netcdf input file with missing variable 'latitude' or 'longitude'
@@ -208,6 +305,110 @@ def test__setup_grid_add_to_db():
     assert all_entries[0].name == "test"
 
 
+def _variables(names_):
+    """return variables metadata, as read by _scan_variables"""
+    return {
+        name: {
+            "dimensions": ["time", "y", "x"],
+            "shape": [3, 4, 5],
+            "units": "K",
+            "standard_name": name,
+        }
+        for name in names_
+    }
+
+
+def test__scan_variables(tmp_path):
+    """
+    GIVEN a model grid netcdf file
+    WHEN  running _scan_variables
+    THEN  return the metadata of each variable,
+     with its vertical levels and time range
+    """
+    _tmp = fake_gridnc(tmp_path)
+    with nc.Dataset(_tmp, "r") as ds:
+        variables = util._scan_variables(ds)
+
+    assert sorted(variables) == [
+        "air_temperature",
+        "latitude",
+        "longitude",
+        "pressure",
+        "time",
+    ]
+    assert variables["air_temperature"] == {
+        "dimensions": ["time", "pressure", "y", "x"],
+        "shape": [3, 2, 4, 5],
+        "units": "K",
+        "standard_name": "air_temperature",
+        "dtype": "float32",
+        "vertical_coordinate": "pressure",
+        "levels": [1000.0, 850.0],
+        "time_start": dt.datetime(2020, 1, 1, 0, tzinfo=dt.timezone.utc),
+        "time_end": dt.datetime(2020, 1, 1, 12, tzinfo=dt.timezone.utc),
+    }
+    assert variables["latitude"]["shape"] == [4, 5]
+    assert variables["latitude"]["time_start"] is None
+    assert variables["latitude"]["vertical_coordinate"] == ""
+
+
+def test__save_variables_queries(modelGrid: ModelGrid, count_queries):
+    """
+    GIVEN a model grid
+    WHEN  running _save_variables with few or many new variables
+    THEN  run the same number of queries
+    """
+    other = ModelGridFactory()
+    few = count_queries(util._save_variables, modelGrid, _variables(["a", "b"]))
+    many = count_queries(
+        util._save_variables, other, _variables([f"v{i}" for i in range(200)])
+    )
+
+    assert few == many
+    assert ModelVariable.objects.count() == 202
+
+
+def test__save_variables_slugs(modelGrid: ModelGrid):
+    """
+    GIVEN variables with the same name in many model grids
+    WHEN  running _save_variables
+    THEN  each variable gets a unique slug, as AutoSlugField would do
+    """
+    util._save_variables(modelGrid, _variables(["air_temperature"]))
+    util._save_variables(ModelGridFactory(), _variables(["air_temperature"]))
+    ModelVariable.objects.create(name="air_temperature", model_grid=ModelGridFactory())
+
+    slugs = ModelVariable.objects.values_list("slug", flat=True)
+    assert sorted(slugs) == [
+        "air_temperature",
+        "air_temperature-2",
+        "air_temperature-3",
+    ]
+
+
+def test__save_variables_update_and_prune(modelGrid: ModelGrid):
+    """
+    GIVEN variables of a model grid already in database
+    WHEN  running _save_variables again, with changed metadata
+     and without some variables
+    THEN  update metadata, and delete vanished variables only with prune_
+    """
+    util._save_variables(modelGrid, _variables(["a", "b"]))
+
+    variables = _variables(["a"])
+    variables["a"]["units"] = "degC"
+    util._save_variables(modelGrid, variables)
+    assert ModelVariable.objects.get(name="a").units == "degC"
+    assert ModelVariable.objects.filter(model_grid=modelGrid).count() == 2
+
+    util._save_variables(modelGrid, variables, prune_=True)
+    assert list(
+        ModelVariable.objects.filter(model_grid=modelGrid).values_list(
+            "name", flat=True
+        )
+    ) == ["a"]
+
+
 def test__check_param_data_key():
     """
     GIVEN a dictionary with no key 'data'
@@ -351,6 +552,59 @@ def test_upload_yaml(tmp_path):
         util.run(_tmp)
 
 
+def test_upload_resume(tmp_path):
+    """
+    GIVEN a valid yaml input file, with many model grids
+    WHEN  running upload with workers, then again with resume_
+    THEN  all model grids are ingested once,
+     and skipped by the second run
+    """
+    _nc = str(fake_gridnc(tmp_path))
+    data = {
+        f"grid{i}": {"url": _nc, "date_valid_start": "2020-01-01"} for i in range(3)
+    }
+    _tmp = tmp_path / "data.yaml"
+    with open(_tmp, "w+") as ff:
+        yaml.dump({"data": data}, ff, default_flow_style=False)
+
+    results = util.upload(_tmp, workers_=2)
+    assert results == {key: "ingested" for key in data}
+    assert ModelGrid.objects.count() == 3
+    assert ModelGrid.objects.filter(modelvariable__name="time").count() == 3
+
+    results = util.upload(_tmp, workers_=2, resume_=True)
+    assert results == {key: "skipped" for key in data}
+    assert ModelGrid.objects.count() == 3
+
+
+def test_upload_partial_failure(tmp_path):
+    """
+    GIVEN a valid yaml input file, with a model grid file not readable
+    WHEN  running upload
+    THEN  the other model grids are ingested,
+     and raise Exception listing the failed model grid
+    """
+    _nc = str(fake_gridnc(tmp_path))
+    _bad = tmp_path / "bad.nc"
+    _bad.write_text("not a netcdf file")
+    data = {
+        "good": {"url": _nc, "date_valid_start": "2020-01-01"},
+        "bad": {"url": str(_bad), "date_valid_start": "2020-01-01"},
+    }
+    _tmp = tmp_path / "data.yaml"
+    with open(_tmp, "w+") as ff:
+        yaml.dump({"data": data}, ff, default_flow_style=False)
+
+    with pytest.raises(Exception) as execinfo:
+        util.upload(_tmp, workers_=2)
+
+    assert str(execinfo.value).startswith(
+        "Something goes wrong when uploading model grids"
+    )
+    assert "- bad:" in str(execinfo.value)
+    assert list(ModelGrid.objects.values_list("name", flat=True)) == ["good"]
+
+
 def test_upload_raises_no_exception():
     """
     GIVEN an valid yaml input file
@@ -0,0 +1,63 @@
+# Stdlib imports
+import pytest
+
+# Core Django imports
+from django.urls import reverse
+
+# Third-party app imports
+# Imports from my apps
+from src.model_grids.models import ModelGrid, ModelVariable
+
+pytestmark = pytest.mark.django_db
+
+
+class TestGridVariables:
+    """
+    Test class for all tests related to the variables catalog view
+    """
+
+    def test_catalog(self, client, modelGrid: ModelGrid):
+        """
+        GIVEN a model grid with variables
+        WHEN  requesting its variables catalog
+        THEN  return the metadata of each variable, as json
+        """
+        ModelVariable.objects.create(
+            name="air_temperature",
+            model_grid=modelGrid,
+            dimensions=["time", "pressure", "y", "x"],
+            shape=[3, 2, 4, 5],
+            dtype="float32",
+            units="K",
+            standard_name="air_temperature",
+            vertical_coordinate="pressure",
+            levels=[1000.0, 850.0],
+        )
+        ModelVariable.objects.create(name="latitude", model_grid=modelGrid)
+
+        url = reverse("model_grids:grid_variables", kwargs={"slug": modelGrid.slug})
+        response = client.get(url)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["name"] == modelGrid.name
+        assert [v["name"] for v in data["variables"]] == [
+            "air_temperature",
+            "latitude",
+        ]
+        assert data["variables"][0]["levels"] == [1000.0, 850.0]
+
+        response = client.get(url, {"vertical_coordinate": "pressure"})
+        assert [v["name"] for v in response.json()["variables"]] == [
+            "air_temperature"
+        ]
+
+    def test_unknown_grid(self, client):
+        """
+        GIVEN no model grid
+        WHEN  requesting a variables catalog
+        THEN  return 404
+        """
+        url = reverse("model_grids:grid_variables", kwargs={"slug": "unknown"})
+        response = client.get(url)
+        assert response.status_code == 404
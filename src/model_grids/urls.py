@@ -4,9 +4,14 @@ from django.urls import path
 
 # Third-party app imports
 # Imports from my apps
-from .views import all_grids
+from .views import all_grids, grid_variables
 
 app_name = "model_grids"
 urlpatterns = [
     path("ajax/data_all_grids/", all_grids, name="all_grids"),
+    path(
+        "ajax/data_grid_variables/<slug:slug>/",
+        grid_variables,
+        name="grid_variables",
+    ),
 ]
@@ -1,9 +1,11 @@
 # Stdlib imports
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 # Third-party app imports
 import netCDF4 as nc
+import numpy as np
 import yaml
 from dateutil.parser import ParserError
 from dateutil.parser import parse as parse_date
@@ -12,10 +14,11 @@ from dateutil.parser import parse as parse_date
 from django.contrib.gis.geos import LinearRing
 from django.contrib.gis.geos import Polygon as geoPolygon
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.utils.timezone import make_aware
 
 # Imports from my apps
-from src.utils.util import is_url
+from src.utils.util import is_url, unique_slugs
 
 from .models import ModelGrid, ModelVariable
 
@@ -23,9 +26,14 @@ model_grid_path = Path(__file__).resolve().parent
 model_grid_data_path = model_grid_path / "data"
 
 
-def _setup_grid(name_, dict_):
-    """create ModelGrid instance from the netcdf file
-    and save it in database.
+def _scan_grid(name_, dict_):
+    """read the netcdf file of the model grid
+
+    Note:
+        - do not touch the database, so it can run in a worker process.
+
+    Returns:
+        dict: ModelGrid fields, and names of the dataset variables
     """
     if not name_:
         raise TypeError(f"Invalid type for argument name_ -{type(name_)}-")
@@ -34,17 +42,65 @@ def _setup_grid(name_, dict_):
     _start = dict_.get("date_valid_start")
     _end = dict_.get("date_valid_end")
     _leadtime = dict_.get("leadtime")
+    _tolerance = dict_.get("simplify")
 
     try:
         with nc.Dataset(_ncfile, "r") as ds:
-            # set up border
-            _setup_border(ds, name_, _start, _end, _leadtime)
-            # set up and save variables
-            _setup_variables(ds, name_, _start)
+            # read border
+            grid = _scan_border(ds, _start, _end, _leadtime, _tolerance)
+            # read variables
+            grid["variables"] = _scan_variables(ds)
 
     except OSError as exc:
         raise OSError(f"Can not find or open file {_ncfile}. \n{exc}")
 
+    grid["name"] = name_
+    return grid
+
+
+def _scan_grids(grids_, workers_=1):
+    """read the netcdf files of the model grids, in a process pool
+
+    netCDF4 holds the GIL, and netCDF-C (HDF5) is not thread-safe:
+    files are read in worker processes, which return plain data.
+
+    Yields:
+        tuple: name, ModelGrid fields (see _scan_grid) or the exception raised
+    """
+    if workers_ <= 1:
+        for key, val in grids_.items():
+            try:
+                yield key, _scan_grid(key, val)
+            except Exception as exc:
+                yield key, exc
+        return
+
+    with ProcessPoolExecutor(max_workers=workers_) as executor:
+        futures = {
+            executor.submit(_scan_grid, key, val): key for key, val in grids_.items()
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as exc:
+                yield futures[future], exc
+
+
+def _save_grid(grid_, prune_=False):
+    """save ModelGrid and its variables in database, all or nothing"""
+    with transaction.atomic():
+        mg = _save_border(grid_)
+        _save_variables(mg, grid_["variables"], prune_)
+
+    return mg
+
+
+def _setup_grid(name_, dict_):
+    """create ModelGrid instance from the netcdf file
+    and save it in database.
+    """
+    return _save_grid(_scan_grid(name_, dict_))
+
 
 def _get_leadtime(ds_, leadtime_=None):
     """read leadtime from ncfile if not in yaml file"""
@@ -70,9 +126,31 @@ def _get_leadtime(ds_, leadtime_=None):
     return tdelta
 
 
-def _setup_border(ds_, name_, start_, end_, leadtime_=None):
-    """create a geojson of domain's border from the dataset"""
-    # set up border
+def _read_ring(var_):
+    """read the outer ring of a 2D variable, without loading the whole array
+
+    Note:
+        - only the four edges are read from the dataset (or OPeNDAP server).
+        - ring goes through first row, last column, last row and first column,
+          and ends on its first point.
+    """
+    return np.concatenate(
+        [
+            np.ma.getdata(var_[0, :]),
+            np.ma.getdata(var_[:, -1]),
+            np.ma.getdata(var_[-1, :])[::-1],
+            np.ma.getdata(var_[:, 0])[::-1],
+        ]
+    )
+
+
+def _get_border(ds_, tolerance_=None):
+    """create a polygon of domain's border from the dataset
+
+    Args:
+        ds_: netcdf dataset, with 2D variables 'latitude' and 'longitude'
+        tolerance_: if given, simplify the border to this tolerance (degree)
+    """
     for v in ["latitude", "longitude"]:
         if v not in ds_.variables:
             raise IndexError(f"Can not find variable '{v}' in dataset '{ds_.name}'")
@@ -80,26 +158,33 @@ def _setup_border(ds_, name_, start_, end_, leadtime_=None):
         if ds_.variables[v].ndim != 2:
             raise TypeError(f"Invalid dimension for variable {v}. Must be 2D.")
 
-    # read lat,lon variable
-    lat = ds_.variables["latitude"][:]
-    lon = ds_.variables["longitude"][:]
+    # read lat,lon border
+    lat = _read_ring(ds_.variables["latitude"])
+    lon = _read_ring(ds_.variables["longitude"])
+    alt = np.zeros_like(lon, dtype="float")
 
-    n, m = lat.shape
-    alt = 0
+    points = np.column_stack([lon, lat, alt]).astype("float")
 
-    # select east border
-    east = [(lon[0, x], lat[0, x], alt) for x in range(m)]
-    # select north border
-    north = [(lon[x, m - 1], lat[x, m - 1], alt) for x in range(n)]
-    # select west border
-    west = [(lon[n - 1, x], lat[n - 1, x], alt) for x in reversed(range(m))]
-    # select south border
-    south = [(lon[x, 0], lat[x, 0], alt) for x in reversed(range(n))]
+    # border = geojson.Polygon([points_list])
+    border = geoPolygon(LinearRing(points.tolist()))
 
-    points_list = [*east, *north, *west, *south]
+    if tolerance_:
+        # keep the border 3D, as expected by ModelGrid.geom
+        simplified = border.simplify(tolerance_, preserve_topology=True)
+        points_list = [(x, y, 0) for x, y, *_ in simplified[0].coords]
+        border = geoPolygon(LinearRing(points_list))
+
+    return border
 
-    # border = geojson.Polygon([points_list])
-    border = geoPolygon(LinearRing(points_list))
+
+def _scan_border(ds_, start_, end_, leadtime_=None, tolerance_=None):
+    """read domain's border, validity and leadtime from the dataset
+
+    Returns:
+        dict: ModelGrid fields, except name
+    """
+    # set up border
+    border = _get_border(ds_, tolerance_)
 
     try:
         # reformat dates to isoformat, use TIME_ZONE from settings
@@ -141,14 +226,172 @@ def _setup_border(ds_, name_, start_, end_, leadtime_=None):
     # read and convert to timedelta
     leadtime = _get_leadtime(ds_, leadtime_)
 
-    # save ModelGrid
-    s, created = ModelGrid.objects.get_or_create(
-        name=name_,
-        geom=border,
-        date_valid_start=start,
-        date_valid_end=end,
-        leadtime=leadtime,
+    return {
+        "geom": border,
+        "date_valid_start": start,
+        "date_valid_end": end,
+        "leadtime": leadtime,
+    }
+
+
+def _save_border(grid_):
+    """save ModelGrid in database"""
+    mg, created = ModelGrid.objects.get_or_create(
+        name=grid_["name"],
+        geom=grid_["geom"],
+        date_valid_start=grid_["date_valid_start"],
+        date_valid_end=grid_["date_valid_end"],
+        leadtime=grid_["leadtime"],
     )
+    return mg
+
+
+def _setup_border(ds_, name_, start_, end_, leadtime_=None, tolerance_=None):
+    """create a geojson of domain's border from the dataset"""
+    grid = _scan_border(ds_, start_, end_, leadtime_, tolerance_)
+    grid["name"] = name_
+    return _save_border(grid)
+
+
+def _is_time(var_):
+    """check variable is a time coordinate (CF conventions)"""
+    return (
+        getattr(var_, "standard_name", "") == "time" or getattr(var_, "axis", "") == "T"
+    )
+
+
+def _is_vertical(var_):
+    """check variable is a vertical coordinate (CF conventions)"""
+    return getattr(var_, "axis", "") == "Z" or hasattr(var_, "positive")
+
+
+def _read_time_range(var_):
+    """read first and last dates of a time coordinate, None if not readable"""
+    if var_.size == 0:
+        return None, None
+    try:
+        dates = nc.num2date(
+            var_[[0, -1]],
+            var_.units,
+            calendar=getattr(var_, "calendar", "standard"),
+            only_use_cftime_datetimes=False,
+            only_use_python_datetimes=True,
+        )
+    except Exception:
+        return None, None
+
+    return tuple(make_aware(d, dt.timezone.utc) for d in dates)
+
+
+def _read_levels(var_):
+    """read values of a vertical coordinate"""
+    return np.ma.getdata(var_[:]).astype(float).ravel().tolist()
+
+
+def _scan_variables(ds_):
+    """read metadata of each variable from the dataset
+
+    Note:
+        - coordinates (time, levels) are read once, whatever the number of
+          variables using them.
+
+    Returns:
+        dict: variable name -> ModelVariable metadata fields
+    """
+    # coordinate variables: one dimension, with the same name
+    time_axes, vertical_axes = {}, {}
+    for k, v in ds_.variables.items():
+        if v.dimensions != (k,):
+            continue
+        if _is_time(v):
+            time_axes[k] = _read_time_range(v)
+        elif _is_vertical(v):
+            vertical_axes[k] = _read_levels(v)
+
+    variables = {}
+    for k, v in ds_.variables.items():
+        meta = {
+            "dimensions": list(v.dimensions),
+            "shape": [int(x) for x in v.shape],
+            "units": str(getattr(v, "units", "")),
+            "standard_name": str(getattr(v, "standard_name", "")),
+            "dtype": np.dtype(v.dtype).name,
+            "vertical_coordinate": "",
+            "levels": [],
+            "time_start": None,
+            "time_end": None,
+        }
+        for d in v.dimensions:
+            if d in time_axes:
+                meta["time_start"], meta["time_end"] = time_axes[d]
+            elif d in vertical_axes:
+                meta["vertical_coordinate"] = d
+                meta["levels"] = vertical_axes[d]
+        variables[k] = meta
+
+    return variables
+
+
+def _make_slugs(names_):
+    """compute unique slugs for new variables, the way AutoSlugField does,
+    with one query for all of them.
+    """
+    return unique_slugs(ModelVariable, {name: name for name in names_})
+
+
+def _save_variables(mg_, variables_, prune_=False):
+    """create or update Variable instances, and save them in database
+
+    Args:
+        mg_: ModelGrid instance
+        variables_: variable name -> metadata, see _scan_variables
+        prune_: delete variables of the model grid, not in variables_ anymore
+    """
+    if not isinstance(variables_, dict):
+        # list of names, without metadata
+        variables_ = {name: {} for name in variables_}
+
+    existing = {v.name: v for v in ModelVariable.objects.filter(model_grid=mg_)}
+
+    # update metadata of existing variables
+    fields = [
+        "dimensions",
+        "shape",
+        "units",
+        "standard_name",
+        "dtype",
+        "vertical_coordinate",
+        "levels",
+        "time_start",
+        "time_end",
+    ]
+    updated = []
+    for name in variables_.keys() & existing.keys():
+        var, meta = existing[name], variables_[name]
+        if any(getattr(var, f) != meta[f] for f in fields if f in meta):
+            for f, value in meta.items():
+                setattr(var, f, value)
+            updated.append(var)
+    if updated:
+        ModelVariable.objects.bulk_update(updated, fields)
+
+    # create missing variables
+    missing = [name for name in variables_ if name not in existing]
+    slugs = _make_slugs(missing)
+    ModelVariable.objects.bulk_create(
+        [
+            ModelVariable(
+                name=name, slug=slugs[name], model_grid=mg_, **variables_[name]
+            )
+            for name in missing
+        ]
+    )
+
+    # delete vanished variables
+    if prune_:
+        vanished = existing.keys() - variables_.keys()
+        if vanished:
+            ModelVariable.objects.filter(model_grid=mg_, name__in=vanished).delete()
 
 
 def _setup_variables(ds_, name_, start_):
@@ -160,14 +403,11 @@ def _setup_variables(ds_, name_, start_):
             name=name_,
             date_valid_start=start_,
         )
-        for k, v in ds_.variables.items():
-            var, created = ModelVariable.objects.get_or_create(
-                name=k,
-                model_grid=mg,
-            )
     except ObjectDoesNotExist:
         raise ObjectDoesNotExist(f"ModelGrid ({name_}, {start_}) does not exist.")
 
+    _save_variables(mg, _scan_variables(ds_))
+
 
 def _check_param(dict_, fparam_):
     """
@@ -192,6 +432,17 @@ def _check_param(dict_, fparam_):
                     f"Invalid URL for model grid {k}, must be an url or an existing file."
                     f"\nCheck {fparam_}"
                 )
+            # check border simplification tolerance
+            _tolerance = v.get("simplify")
+            if _tolerance is not None and (
+                isinstance(_tolerance, bool)
+                or not isinstance(_tolerance, (int, float))
+                or _tolerance < 0
+            ):
+                raise ValueError(
+                    f"Invalid simplify tolerance -{_tolerance}- for model grid {k}, "
+                    f"must be a positive number.\nCheck {fparam_}"
+                )
             # check dates
             for _d in ["date_valid_start", "date_valid_end"]:
                 _date = v.get(_d)
@@ -206,8 +457,36 @@ def _check_param(dict_, fparam_):
                     )
 
 
-def upload(fparam_=model_grid_path / "data.yaml"):
-    """upload and save shape file of weather forecast models"""
+def _is_ingested(name_, dict_):
+    """check the model grid, and its variables, are already in database"""
+    start = make_aware(parse_date(dict_.get("date_valid_start")))
+    return ModelGrid.objects.filter(
+        name=name_,
+        date_valid_start=start,
+        modelvariable__isnull=False,
+    ).exists()
+
+
+def upload(
+    fparam_=model_grid_path / "data.yaml", workers_=1, resume_=False, prune_=False
+):
+    """upload and save shape file of weather forecast models
+
+    Args:
+        fparam_: parameters file, listing the model grids
+        workers_: number of model grids read at the same time
+        resume_: skip model grids already in database, from a previous run
+        prune_: delete variables not in the netcdf file anymore
+
+    Note:
+        - netcdf files (or OPeNDAP urls) are read in worker processes,
+          database writes stay in the calling process.
+        - each model grid is saved in its own transaction, so a failed or
+          partial run could be resumed with resume_=True.
+
+    Returns:
+        dict: status of each model grid, 'ingested' or 'skipped'
+    """
     try:
         # read parameters configuration file yaml
         with open(fparam_, "r") as stream:
@@ -225,5 +504,30 @@ def upload(fparam_=model_grid_path / "data.yaml"):
             f"\n{exc}"
         )
 
+    results, errors = {}, {}
+    grids = {}
     for key, val in param["data"].items():
-        _setup_grid(key, val)
+        if resume_ and _is_ingested(key, val):
+            results[key] = "skipped"
+        else:
+            grids[key] = val
+
+    for key, grid in _scan_grids(grids, workers_):
+        if isinstance(grid, Exception):
+            errors[key] = grid
+            continue
+        try:
+            _save_grid(grid, prune_)
+        except Exception as exc:
+            errors[key] = exc
+        else:
+            results[key] = "ingested"
+
+    if errors:
+        msg = "\n".join(f"- {key}: {exc}" for key, exc in errors.items())
+        raise Exception(
+            f"Something goes wrong when uploading model grids from -{fparam_}-."
+            f" Run again with resume_=True, once fixed.\n{msg}"
+        )
+
+    return results
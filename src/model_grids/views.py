@@ -1,17 +1,76 @@
 # Stdlib imports
 # Core Django imports
-from django.core.serializers import serialize
-from django.http import HttpResponse
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
 
 # Third-party app imports
 # Imports from my apps
-from .models import ModelGrid
+from src.utils.geojson import feature_collection, read_viewport, zoom_tolerance
+from src.utils.layers import layer_response
+
+from .models import ModelGrid, ModelVariable
+
+# ModelGrid fields written in GeoJSON properties, as used by the maps
+GEOJSON_PROPERTIES = ["name", "slug", "date_valid_start", "date_valid_end"]
+
+# ModelVariable fields returned by the variables catalog
+CATALOG_FIELDS = [
+    "name",
+    "slug",
+    "dimensions",
+    "shape",
+    "dtype",
+    "units",
+    "standard_name",
+    "vertical_coordinate",
+    "levels",
+    "time_start",
+    "time_end",
+]
 
 
 def all_grids(request):
-    """this uses the serializer to convert the data 'ModelGrid.objects.all()' to 'geojson' data"""
-    grid = serialize(
-        "geojson",
-        ModelGrid.objects.all(),
-    )
-    return HttpResponse(grid, content_type="json")
+    """convert the data 'ModelGrid.objects.all()' to 'geojson' data
+
+    Note:
+        - optional 'bbox' and 'zoom' query parameters, only model grids inside
+          the map viewport, with borders simplified for the zoom level.
+        - layer is cached per viewport, until a model grid changes.
+    """
+    try:
+        bbox, zoom = read_viewport(request)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    def _build():
+        return feature_collection(
+            ModelGrid.objects.all(),
+            GEOJSON_PROPERTIES,
+            bbox_=bbox,
+            tolerance_=zoom_tolerance(zoom),
+        )
+
+    return layer_response(request, "grids", _build, bbox, zoom)
+
+
+def grid_variables(request, slug):
+    """return the variables catalog of the model grid, as json
+
+    Note:
+        - variables could be filtered on 'standard_name' or 'vertical_coordinate',
+          given as query parameters.
+    """
+    grid = get_object_or_404(ModelGrid, slug=slug)
+    variables = ModelVariable.objects.filter(model_grid=grid)
+    for key in ["standard_name", "vertical_coordinate"]:
+        if key in request.GET:
+            variables = variables.filter(**{key: request.GET[key]})
+
+    data = {
+        "name": grid.name,
+        "slug": grid.slug,
+        "date_valid_start": grid.date_valid_start,
+        "date_valid_end": grid.date_valid_end,
+        "variables": list(variables.values(*CATALOG_FIELDS)),
+    }
+    return JsonResponse(data)
@@ -3,10 +3,13 @@
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import CICharField
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 # Third-party app imports
 # Imports from my apps
+from src.utils.export import bump_export_version, schedule_export
 
 User = get_user_model()
 
@@ -39,20 +42,13 @@ class StationsPlot(models.Model):
         """ """
         super().save(*args, **kwargs)
         # update weathervis config files
-        from .util import download
-
-        download()
+        schedule_export("plots")
 
     def delete(self, *args, **kwargs):
         """ """
         super().delete(*args, **kwargs)
         # update weathervis config files
-        from src.stations.util import download as download_station
-
-        from .util import download
-
-        download()
-        download_station()
+        schedule_export("plots", "stations")
 
 
 class DomainsPlot(models.Model):
@@ -83,17 +79,17 @@ class DomainsPlot(models.Model):
         """ """
         super().save(*args, **kwargs)
         # update weathervis config files
-        from .util import download
-
-        download()
+        schedule_export("plots")
 
     def delete(self, *args, **kwargs):
         """ """
         super().delete(*args, **kwargs)
         # update weathervis config files
-        from src.domains.util import download as download_domain
+        schedule_export("plots", "domains")
 
-        from .util import download
 
-        download()
-        download_domain()
+@receiver([post_save, post_delete], sender=StationsPlot)
+@receiver([post_save, post_delete], sender=DomainsPlot)
+def update_plot_version(sender, *args, **kwargs):
+    """flag plots config file as changed, see src.utils.export.cached_export"""
+    bump_export_version("plots")
@@ -2,11 +2,12 @@
 from pathlib import Path
 
 # Third-party app imports
-import yaml
-
 # Core Django imports
+from django.db.models import Count, Max
+
 # Imports from my apps
-from src.stations.util import MyDumper
+from src.utils.export import cached_export
+from src.utils.writers import AtomicWriter, write_yaml_entries
 
 from .models import DomainsPlot, StationsPlot
 
@@ -14,28 +15,44 @@ plot_path = Path(__file__).resolve().parent
 plot_data_path = plot_path / "data"
 
 
-def download(fparam_=plot_data_path / "plots.yaml"):
-    """download plots from database and write plots.yaml
-
-    Note:
-        - plot from stations and dommains are downloaded to 'plots.yaml'.
-    """
-    dic = {}
+def _plot_entries():
+    """yield (name, parameters) of station and domain plots to write in plots.yaml"""
     # get station plot from database
     for plot in StationsPlot.objects.all():
-        dic[plot.name] = {
+        yield plot.name, {
             "command": plot.command,
             "options": plot.options,
             "description": plot.description,
         }
     # get domain plot from database
     for plot in DomainsPlot.objects.all():
-        dic[plot.name] = {
+        yield plot.name, {
             "command": plot.command,
             "options": plot.options,
             "description": plot.description,
         }
 
+
+def _fingerprint():
+    """cheap aggregate of the plots tables, see cached_export"""
+    return tuple(
+        value
+        for model in [StationsPlot, DomainsPlot]
+        for value in model.objects.aggregate(
+            count=Count("id"),
+            max_id=Max("id"),
+        ).values()
+    )
+
+
+@cached_export("plots", _fingerprint)
+def download(fparam_=plot_data_path / "plots.yaml"):
+    """download plots from database and write plots.yaml
+
+    Note:
+        - plot from stations and dommains are downloaded to 'plots.yaml'.
+        - file is left untouched if its content does not change.
+    """
     header = """
 # <plot name>:
 #   command: <plot's command>
@@ -44,15 +61,8 @@ def download(fparam_=plot_data_path / "plots.yaml"):
 #     <description could be write on multilines>
 """
 
-    # create parent directory if need be
-    fparam_.parents[0].mkdir(parents=True, exist_ok=True)
-    with open(fparam_, "w") as stream:
+    with AtomicWriter(fparam_) as stream:
         stream.write(header + "\n")
-        yaml.dump(
-            dic,
-            stream=stream,
-            Dumper=MyDumper,
-            default_flow_style=False,
-            sort_keys=False,
-            indent=4,
-        )
+        write_yaml_entries(stream, _plot_entries())
+
+    return stream.changed
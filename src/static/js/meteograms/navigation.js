@@ -33,11 +33,13 @@ function showPlot(form)
         alert(data.error_message);
       } else {
         document.getElementById("panel1").src=data.img1.url;
+        document.getElementById("panel1").srcset=data.img1.srcset || "";
         document.getElementById("panel1").alt=data.img1.nam;
         document.getElementById("path1").innerHTML=data.img1.path;
         document.getElementById("subtext1").innerHTML=data.img1.subtext;
         document.getElementById("chg_subtext1").href=data.img1.chg_subtext;
         document.getElementById("panel2").src=data.img2.url;
+        document.getElementById("panel2").srcset=data.img2.srcset || "";
         document.getElementById("panel2").alt=data.img2.nam;
         document.getElementById("path2").innerHTML=data.img2.path;
         document.getElementById("subtext2").innerHTML=data.img2.subtext;
@@ -110,6 +110,37 @@ function add_geoman_control(map, tag) {
   map.pm.addControls(hash);
 }
 
+/* add map viewport (bbox and zoom) to the url, so only visible data is requested */
+function viewport_url(map, url) {
+  var params = {};
+  try {
+    var bounds = map.getBounds();
+    params['zoom'] = Math.round(map.getZoom());
+  } catch (e) {
+    // map view not set yet
+    return url;
+  }
+  var west = bounds.getWest();
+  var east = bounds.getEast();
+  // whole world, or crossing the antimeridian: no bbox
+  if (west >= -180 && east <= 180) {
+    params['bbox'] = [west, bounds.getSouth(), east, bounds.getNorth()].map(
+      function (x) { return x.toFixed(4) }
+    ).join(',');
+  }
+  var sep = (url.indexOf('?') < 0) ? '?' : '&';
+  return url + sep + $.param(params);
+}
+
+/* url template of the vector tiles of the layer, null if maps use GeoJSON layers */
+function tiles_url(layer) {
+  if (typeof L.vectorGrid === 'undefined' || document.getElementById('map_tiles_url') === null) {
+    return null;
+  }
+  var url = JSON.parse(document.getElementById('map_tiles_url').textContent);
+  return url.replace('{layer}', layer);
+}
+
 function checkbox(bool) {
   if (bool) {
     return '<input class="form-check-input" type="checkbox" value="" disabled checked >'
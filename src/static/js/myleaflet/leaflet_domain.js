@@ -176,50 +176,104 @@ function add_layers(map, controlLayers, tag) {
   if (document.getElementById(_id) !== null) {
     var dic_data = JSON.parse(document.getElementById(_id).textContent);
     var all_data = dic_data[_all];
+    var url_id = _url;
+    // draw layers from vector tiles, if enabled
+    var layer_tiles = tiles_url(tag == 'grid' ? 'grids' : 'domains');
+    if (layer_tiles !== null) {
+      add_layers_tiles(map, controlLayers, tag, layer_tiles);
+      return;
+    }
     // var grid_all_data = $("#station_data_id").attr("grid-all-geojson");
     // use zsh to hide layer at some zoom level
     zsh = new ZoomShowHide();
     zsh.addTo(map);
-    // read data from geojson
-    $.getJSON(all_data, function(data){
-      // add GeoJSON layer to the map once the file is loaded
-      var datalayers = L.geoJson(data ,{
-        onEachFeature: function(feature, layer) {
-          const _id = feature.properties.slug
-          const _active=feature.properties.is_active
-          layer.setStyle(style_layer('default', active=_active));
-          /*
-          layer.on('mouseover', function () {
-            this.setStyle(style_layer('highlight'));
-            // this.openPopup();
-          });
-          layer.on('mouseout', function () {
-            this.setStyle(style_layer());
-            // this.closePopup();
-          });
-          */
-          if (tag == 'domain') {
-            if (document.getElementById(_url) !== null) {
-              let popup = info_domain_popup(feature);
-              layer.bindPopup(popup).openPopup();
-              // layer.bindPopup(popup).openPopup();
-            } else {
-              layer.bindPopup(feature.properties.name); // show popup with grid name
+    var layers_zsh = zsh;
+    // layers of the previous viewport
+    var loaded = [];
+    var _request = 0;
+    var first = true;
+    // read data from geojson, only layers inside the map viewport,
+    // simplified for the zoom level
+    function load_layers() {
+      let request = ++_request;
+      $.getJSON(viewport_url(map, all_data), function(data){
+        // ignore answer of an outdated request
+        if (request != _request) { return; }
+        // remove layers of the previous viewport
+        loaded.forEach(function (layer) {
+          controlLayers.removeLayer(layer);
+          layers_zsh.removeLayer(layer);
+        });
+        loaded = [];
+        // add GeoJSON layer to the map once the file is loaded
+        var datalayers = L.geoJson(data ,{
+          onEachFeature: function(feature, layer) {
+            const _id = feature.properties.slug
+            const _active=feature.properties.is_active
+            layer.setStyle(style_layer('default', active=_active));
+            /*
+            layer.on('mouseover', function () {
+              this.setStyle(style_layer('highlight'));
+              // this.openPopup();
+            });
+            layer.on('mouseout', function () {
+              this.setStyle(style_layer());
+              // this.closePopup();
+            });
+            */
+            if (tag == 'domain') {
+              if (document.getElementById(url_id) !== null) {
+                let popup = info_domain_popup(feature);
+                layer.bindPopup(popup).openPopup();
+                // layer.bindPopup(popup).openPopup();
+              } else {
+                layer.bindPopup(feature.properties.name); // show popup with grid name
+              }
             }
-          }
-          layers[_id] = layer
-          // Add 'layer' to Layer Control
-          controlLayers.addOverlay(layer, feature.properties.name);
-          // layer ignored by Leaflet-Geoman
-          layer.setStyle({pmIgnore: true});
-          // hide layer at some zoom level
-          layer.max_zoom = 9.5;
-          zsh.addLayer(layer);
-        },
+            layers[_id] = layer
+            // Add 'layer' to Layer Control
+            controlLayers.addOverlay(layer, feature.properties.name);
+            // layer ignored by Leaflet-Geoman
+            layer.setStyle({pmIgnore: true});
+            // hide layer at some zoom level
+            layer.max_zoom = 9.5;
+            layers_zsh.addLayer(layer);
+            loaded.push(layer);
+          },
+        });
+        if (first && loaded.length > 0) {
+          first = false;
+          map.fitBounds(datalayers.getBounds());
+        }
       });
-      map.fitBounds(datalayers.getBounds());
+    }
+    load_layers();
+    // reload layers when the map viewport changes
+    map.on('moveend', load_layers);
+  }
+}
+
+function add_layers_tiles(map, controlLayers, tag, url) {
+  var name = (tag == 'grid') ? 'grids' : 'domains';
+  var styles = {};
+  styles[name] = function (properties) {
+    let style = style_layer('default', active=properties.is_active);
+    style.fill = true;
+    return style;
+  };
+  var datalayers = L.vectorGrid.protobuf(url, {
+    interactive: true,
+    vectorTileLayerStyles: styles,
+  });
+  if (tag == 'domain') {
+    datalayers.on('click', function (e) {
+      // tiles are clipped: show name only
+      L.popup().setLatLng(e.latlng).setContent(e.layer.properties.name).openOn(map);
     });
   }
+  map.addLayer(datalayers);
+  // Add layer to Layer Control
+  controlLayers.addOverlay(datalayers, (tag == 'grid') ? 'Model grids' : 'Domains');
 }
 
 function style_layer(tag, active=true) {
@@ -122,56 +122,112 @@ function add_pointers(map, controlLayers) {
     var station_all_data = station_data["station-all"];
     var station_local = station_data["station-local"];
 
+    // draw stations from vector tiles, if enabled
+    var station_tiles = tiles_url('stations');
+    if (station_tiles !== null) {
+      add_pointers_tiles(map, controlLayers, station_tiles, station_local);
+      return;
+    }
+
     var _lat=0
     var _lon=0
-    // Download GeoJSON via Ajax
-    $.getJSON(station_all_data, function (data) {
-      // Add GeoJSON layer
-      let stations = L.geoJson(data, {
-        /*
-        onEachFeature: function (feature, layer) {
-          let popup = info_station_popup(feature);
-          layer.bindPopup(popup);
-        },
-        */
-        pointToLayer: function(feature,latlng){
-          const _id = feature.properties.slug
-          // customize icon
-          let _icon
-          if (_id == station_local) {
-            _icon = style_icon(feature, 'local')
-          } else {
-            _icon = style_icon(feature)
-          }
-          markers[_id] = L.marker(
-            latlng,
-            {icon: _icon},
-          ).setBouncingOptions({
-            bounceHeight : 60,    // height of the bouncing
-            bounceSpeed  : 40,    // bouncing speed coefficient
-          });
-          if (_id == station_local) {
-            markers[_id].setZIndexOffset(100)
-            let latlon = markers[_id].getLatLng()
-            _lat = latlon.lat
-            _lon = latlon.lng
+    clusters = L.markerClusterGroup();
+    map.addLayer(clusters);
+    // Add 'stations' to Layer Control
+    controlLayers.addOverlay(clusters, 'Stations');
+
+    // Download GeoJSON via Ajax, only stations inside the map viewport
+    var _request = 0;
+    function load_pointers() {
+      let request = ++_request;
+      $.getJSON(viewport_url(map, station_all_data), function (data) {
+        // ignore answer of an outdated request
+        if (request != _request) { return; }
+        // Add GeoJSON layer
+        let stations = L.geoJson(data, {
+          /*
+          onEachFeature: function (feature, layer) {
+            let popup = info_station_popup(feature);
+            layer.bindPopup(popup);
+          },
+          */
+          pointToLayer: function(feature,latlng){
+            const _id = feature.properties.slug
+            // customize icon
+            let _icon
+            if (_id == station_local) {
+              _icon = style_icon(feature, 'local')
+            } else {
+              _icon = style_icon(feature)
+            }
+            markers[_id] = L.marker(
+              latlng,
+              {icon: _icon},
+            ).setBouncingOptions({
+              bounceHeight : 60,    // height of the bouncing
+              bounceSpeed  : 40,    // bouncing speed coefficient
+            });
+            if (_id == station_local) {
+              markers[_id].setZIndexOffset(100)
+              let latlon = markers[_id].getLatLng()
+              _lat = latlon.lat
+              _lon = latlon.lng
+            }
+            let popup = info_station_popup(feature);
+            markers[_id].bindPopup(popup).openPopup();
+            return markers[_id];
           }
-          let popup = info_station_popup(feature);
-          markers[_id].bindPopup(popup).openPopup();
-          return markers[_id];
-        }
+        });
+        clusters.clearLayers();
+        clusters.addLayer(stations);
       });
-      clusters = L.markerClusterGroup();
-
-      clusters.addLayer(stations);
-      map.addLayer(clusters);
-        // Add 'stations' to Layer Control
-        controlLayers.addOverlay(clusters, 'Stations');
-
-    });
+    }
+    load_pointers();
+    // reload stations when the map viewport changes
+    map.on('moveend', load_pointers);
   }
 }
 
+function add_pointers_tiles(map, controlLayers, url, station_local) {
+  let stations = L.vectorGrid.protobuf(url, {
+    interactive: true,
+    getFeatureId: function (feature) { return feature.properties.slug },
+    vectorTileLayerStyles: {
+      stations: function (properties) {
+        let _color = properties.is_active ? 'blue' : 'red';
+        if (properties.slug == station_local) {
+          _color = properties.is_active ? 'green' : 'darkred';
+        }
+        return {
+          radius: 6,
+          weight: 1,
+          color: 'white',
+          fill: true,
+          fillColor: _color,
+          fillOpacity: 0.9,
+        };
+      },
+    },
+  });
+  stations.on('click', function (e) {
+    // vector tiles only keep 2D geometry, altitude is a property
+    let feature = {
+      properties: e.layer.properties,
+      geometry: {
+        coordinates: [
+          e.latlng.lng.toFixed(6),
+          e.latlng.lat.toFixed(6),
+          e.layer.properties.altitude,
+        ],
+      },
+    };
+    info_station_popup(feature).setLatLng(e.latlng).openOn(map);
+  });
+  map.addLayer(stations);
+  // Add 'stations' to Layer Control
+  controlLayers.addOverlay(stations, 'Stations');
+}
+
 /* show/hide flexpart parameters */
 function HideFlexpart() {
   if(document.getElementById('id_uses_flexpart').checked == true) {
@@ -1,4 +1,6 @@
 # Stdlib imports
+import logging
+
 # Core Django imports
 from crispy_forms.bootstrap import Field, FieldWithButtons, StrictButton
 from crispy_forms.layout import (
@@ -20,6 +22,7 @@ from django.utils.http import urlencode
 # Third-party app imports
 # Imports from my apps
 from src.campaigns.models import Campaign
+from src.model_grids.lookup import grids_containing
 from src.model_grids.models import ModelGrid
 from src.plots.models import StationsPlot
 from src.utils.mixins import CrispyMixin
@@ -28,6 +31,8 @@ from src.utils.util import degree_sign as deg
 
 from .models import Station
 
+logger = logging.getLogger(__name__)
+
 
 class StationForm(CrispyMixin, forms.ModelForm):
     current_url = "stations:create"
@@ -254,28 +259,20 @@ class StationForm(CrispyMixin, forms.ModelForm):
         lat = float(cleaned_data.get("latitude", 0))
         lon = float(cleaned_data.get("longitude", 0))
         alt = float(cleaned_data.get("altitude", 0))
-        point = geoPoint(lon, lat, alt)
+        point = geoPoint(lon, lat, alt, srid=4326)
 
-        model_grids = ModelGrid.objects.all()
-
-        if len(model_grids) == 0:
+        if not ModelGrid.objects.exists():
             raise ValidationError(
                 "No Weather Forecast registered. You must have registered at least one before assigning station"
             )
 
-        for model_grid in model_grids:
-            poly = model_grid.geom
-            # valid = poly.contains(point)
-            # valid = poly.covers(point)
-            valid = point.intersects(poly)
-            if valid:
-                print(f"Station {name} is in {model_grid.name}")
-                break
-
-        if not valid:
+        # model grids containing the station, looked up in the spatial index
+        self.model_grids = grids_containing(point)
+        if not self.model_grids:
             raise ValidationError(
                 "Station is not inside any ModelGrid registered.",
             )
+        logger.debug(f"Station {name} is in {', '.join(self.model_grids)}")
 
         uses_flexpart = cleaned_data.get("uses_flexpart")
 
@@ -3,7 +3,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import CICharField
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django_extensions.db.fields import AutoSlugField
@@ -13,6 +13,8 @@ from django_extensions.db.fields import AutoSlugField
 from src.campaigns.models import Campaign
 from src.margins.models import Margin
 from src.plots.models import StationsPlot
+from src.utils.export import bump_export_version, schedule_export
+from src.utils.layers import bump_layer_version
 
 User = get_user_model()
 
@@ -163,16 +165,13 @@ class Station(models.Model):
         #
         if self.active_campaign:
             self.campaigns.add(self.active_campaign)
-        from .util import download
-
-        download()
+        # update weathervis config files, once the transaction is committed
+        schedule_export("stations")
 
     def delete(self, *args, **kwargs):
         """ """
         super().delete(*args, **kwargs)
-        from .util import download
-
-        download()
+        schedule_export("stations")
 
     @classmethod
     def disable_all(cls, campaign_id=None):
@@ -180,6 +179,9 @@ class Station(models.Model):
             cls.objects.filter(campaigns=campaign_id).update(is_active=False)
         else:
             cls.objects.update(is_active=False)
+        bump_export_version("stations")
+        bump_layer_version("stations")
+        schedule_export("stations")
         # for obj in cls.objects.all():
         #     obj.is_active = False
         #     obj.save()
@@ -190,17 +192,33 @@ class Station(models.Model):
             cls.objects.filter(campaigns=campaign_id).update(is_active=True)
         else:
             cls.objects.update(is_active=True)
+        bump_export_version("stations")
+        bump_layer_version("stations")
+        schedule_export("stations")
 
     @classmethod
     def active_campaign_is(cls, campaign_id=None):
         cls.objects.update(active_campaign=campaign_id)
+        bump_layer_version("stations")
+        schedule_export("stations")
 
 
 @receiver(m2m_changed, sender=Station.plots.through)
+@receiver(m2m_changed, sender=Station.campaigns.through)
 def update_station_m2m(sender, instance, action, reverse, *args, **kwargs):
     """wait until change in Many2Many field get saved"""
     # https://stackoverflow.com/a/57308547
     if "post" in action:
-        from .util import download
-
-        download()
+        bump_export_version("stations")
+        bump_layer_version("stations")
+        schedule_export("stations")
+
+
+@receiver([post_save, post_delete], sender=Station)
+@receiver([post_save, post_delete], sender=Margin)
+@receiver([post_save, post_delete], sender=StationsPlot)
+@receiver([post_save, post_delete], sender=Campaign)
+def update_station_version(sender, *args, **kwargs):
+    """flag stations config files and map layer as changed"""
+    bump_export_version("stations")
+    bump_layer_version("stations")
@@ -4,9 +4,11 @@ import pytest
 # Core Django imports
 # Third-party app imports
 # Imports from my apps
-# from src.margins.models import Margin
-# from src.stations.models import Station
-# from src.utils import util
+from src.campaigns.models import Campaign
+from src.plots.tests.factories import StationsPlotFactory
+from src.stations import util
+from src.stations.models import Station
+from src.stations.tests.factories import StationFactory
 
 
 @pytest.mark.django_db
@@ -22,3 +24,48 @@ class TestLoad:
     @pytest.mark.skip(reason="test not implemented yet")
     def test_download(self):
         """"""
+
+
+@pytest.mark.django_db
+class TestDownloadQueries:
+    """
+    Test class for the number of queries run by the download functions
+    """
+
+    @pytest.fixture
+    def add_stations(self, margin):
+        """return a function adding stations, with plots, in a campaign"""
+        campaign = Campaign.objects.create(name="campaign")
+        plots = [StationsPlotFactory(name=f"plot{i}") for i in range(3)]
+
+        def _add_stations(number):
+            start = Station.objects.count()
+            for i in range(start, start + number):
+                station = StationFactory(
+                    name=f"station{i}",
+                    margin=margin,
+                    uses_flexpart=True,
+                )
+                station.campaigns.add(campaign)
+                station.plots.add(*plots)
+            Station.active_campaign_is(campaign.pk)
+
+        return _add_stations
+
+    @pytest.mark.parametrize("download", ["download_stations", "download_releases"])
+    def test_download_constant_queries(
+        self, tmp_path, add_stations, count_queries, download
+    ):
+        """
+        GIVEN stations in the active campaign
+        WHEN  downloading the config file, with more and more stations
+        THEN  the number of queries stays the same
+        """
+        func = getattr(util, download)
+        fparam = tmp_path / "config"
+
+        add_stations(2)
+        nqueries = count_queries(func, fparam)
+        add_stations(10)
+        assert count_queries(func, fparam) == nqueries
+        assert "station11" in fparam.read_text()
@@ -6,11 +6,14 @@ import yaml
 
 # Core Django imports
 from django.contrib.gis.geos import Point as geoPoint
+from django.db.models import Count, Max
 
 # Imports from my apps
 from src.campaigns.models import Campaign
 from src.margins.models import Margin
 from src.utils import util
+from src.utils.export import cached_export
+from src.utils.writers import AtomicWriter, write_yaml_entries
 
 from .models import Station
 
@@ -18,16 +21,6 @@ station_path = Path(__file__).resolve().parent
 station_data_path = station_path / "data"
 
 
-class MyDumper(yaml.SafeDumper):
-    # HACK: insert blank lines between top-level objects
-    # inspired by https://stackoverflow.com/a/44284819/3786245
-    def write_line_break(self, data=None):
-        super().write_line_break(data)
-
-        if len(self.indents) == 1:
-            super().write_line_break()
-
-
 def _check_param(dict_, fparam_):
     """
     check dictionary elements and reformat if need be
@@ -48,6 +41,29 @@ def _check_param(dict_, fparam_):
                     )
 
 
+def get_active_campaign(model_):
+    """return the active campaign shared by all instances of the model
+
+    Note:
+        - return "any or none" if no campaign is active.
+    """
+    _pk = model_.objects.values_list("active_campaign", flat=True).first()
+    campaign = Campaign.objects.filter(pk=_pk).first() if _pk else None
+
+    return campaign or "any or none"
+
+
+def in_active_campaign(obj_):
+    """check the instance belongs to its active campaign, if any
+
+    Note:
+        - use the prefetched 'campaigns', if any, so no extra query is run.
+    """
+    if not obj_.active_campaign:
+        return True
+    return obj_.active_campaign in [c.pk for c in obj_.campaigns.all()]
+
+
 def upload(fparam_=station_data_path / "stations.ini.yaml"):
     """upload and save station and margin"""
     try:
@@ -99,32 +115,33 @@ def upload(fparam_=station_data_path / "stations.ini.yaml"):
         )
 
 
+def _fingerprint():
+    """cheap aggregate of the stations table, see cached_export"""
+    return tuple(
+        Station.objects.aggregate(
+            count=Count("id"),
+            max_id=Max("id"),
+            active_campaign=Max("active_campaign"),
+        ).values()
+    )
+
+
+@cached_export("stations", _fingerprint)
 def download():
     download_stations()
     download_releases()
 
 
-def download_stations(fparam_=station_data_path / "stations.yaml"):
-    """download station and margin from database and write stations.yaml
-
-    Note:
-        - only active stations are downloaded to 'stations.yaml'.
-        - only stations from the active campaign are downloaded to 'stations.yaml'.
-    """
-    dic = {}
-    _pk = Station.objects.all().first().active_campaign
-    if _pk:
-        campaign = Campaign.objects.get(pk=_pk)
-    else:
-        campaign = "any or none"
-
-    for station in Station.objects.all():
-        if station.is_active and (
-            not station.active_campaign
-            or station.active_campaign
-            in station.campaigns.all().values_list("id", flat=True)
-        ):
-            dic[station.name] = {
+def _station_entries():
+    """yield (name, parameters) of stations to write in stations.yaml"""
+    stations = (
+        Station.objects.filter(is_active=True)
+        .select_related("margin")
+        .prefetch_related("campaigns", "plots")
+    )
+    for station in stations:
+        if in_active_campaign(station):
+            yield station.name, {
                 "lat": station.latitude,
                 "lon": station.longitude,
                 "height": station.altitude,
@@ -140,6 +157,17 @@ def download_stations(fparam_=station_data_path / "stations.yaml"):
                 "plots": [p.name for p in station.plots.all()],
             }
 
+
+def download_stations(fparam_=station_data_path / "stations.yaml"):
+    """download station and margin from database and write stations.yaml
+
+    Note:
+        - only active stations are downloaded to 'stations.yaml'.
+        - only stations from the active campaign are downloaded to 'stations.yaml'.
+        - file is left untouched if its content does not change.
+    """
+    campaign = get_active_campaign(Station)
+
     header = f"""
 #
 # Stations from campaign "{campaign}"
@@ -160,16 +188,38 @@ def download_stations(fparam_=station_data_path / "stations.yaml"):
 #   plots: list of plots selected fot this station
 """
 
-    with open(fparam_, "w") as stream:
+    with AtomicWriter(fparam_) as stream:
         stream.write(header + "\n")
-        yaml.dump(
-            dic,
-            stream=stream,
-            Dumper=MyDumper,
-            default_flow_style=False,
-            sort_keys=False,
-            indent=4,
-        )
+        write_yaml_entries(stream, _station_entries())
+
+    return stream.changed
+
+
+def _release_line(station_):
+    """format flexpart parameters of the station as a line of releases.csv"""
+    _name = station_.name
+    _lat, _lon = station_.latitude, station_.longitude
+
+    _d1, _d2 = station_.start_datetime, station_.end_datetime
+    _ymd1, _hms1 = "NaN", "NaN"
+    if _d1:
+        _ymd1, _hms1 = _d1.strftime("%Y%m%d"), _d1.strftime("%H%M%S")
+    _ymd2, _hms2 = "NaN", "NaN"
+    if _d2:
+        _ymd2, _hms2 = _d2.strftime("%Y%m%d"), _d2.strftime("%H%M%S")
+
+    _z1, _z2 = station_.alt_lower, station_.alt_upper
+    _unit = station_.alt_unit
+
+    _npart = station_.numb_part
+    _xmass = station_.xmass
+    _ngrid = station_.number_grid
+    return (
+        f"{_ymd1}; {_hms1}; {_ymd2}; {_hms2}; "
+        + f"NaN; NaN; NaN; NaN; {_unit}; {_z1}; {_z2}; "
+        + f"{_npart}; {_xmass}; {_name}; {_lon}; {_lat}; {_ngrid}"
+        + "\n"
+    )
 
 
 def download_releases(fparam_=station_data_path / "releases.csv"):
@@ -178,56 +228,18 @@ def download_releases(fparam_=station_data_path / "releases.csv"):
     Note:
         - only stations using flexpart are downloaded to 'releases.csv'.
         - only stations from the active campaign are downloaded to 'stations.yaml'.
+        - file is left untouched if its content does not change.
     """
-    dic = {}
-    for station in Station.objects.all():
-
-        if station.uses_flexpart and (
-            not station.active_campaign
-            or station.active_campaign
-            in station.campaigns.all().values_list("id", flat=True)
-        ):
-            dic[station.name] = {
-                "lat": station.latitude,
-                "lon": station.longitude,
-                "start": station.start_datetime,
-                "end": station.end_datetime,
-                "lower": station.alt_lower,
-                "upper": station.alt_upper,
-                "unit": station.alt_unit,
-                "npart": station.numb_part,
-                "xmass": station.xmass,
-                "ngrid": station.number_grid,
-            }
-
     header = (
         "rel_begin_YYYYMMDD; rel_begin_HHMMSS; rel_end_YYYYMMDD; rel_end_HHMMSS; "
         "rel_min_1; rel_min_2; rel_max_1; rel_max_2; rel_ZTYPE; rel_ZPOINT_1; rel_ZPOINT_2; "
         "rel_NUMB_PART; rel_XMASS; rel_domain_name; rel_lon; rel_lat; number_grid"
     )
-    with open(fparam_, "w") as stream:
+    stations = Station.objects.filter(uses_flexpart=True).prefetch_related("campaigns")
+    with AtomicWriter(fparam_) as stream:
         stream.write(header + "\n")
-        for _name, _dic in dic.items():
-
-            _lat, _lon = _dic["lat"], _dic["lon"]
-
-            _d1, _d2 = _dic["start"], _dic["end"]
-            _ymd1, _hms1 = "NaN", "NaN"
-            if _d1:
-                _ymd1, _hms1 = _d1.strftime("%Y%m%d"), _d1.strftime("%H%M%S")
-            _ymd2, _hms2 = "NaN", "NaN"
-            if _d2:
-                _ymd2, _hms2 = _d2.strftime("%Y%m%d"), _d2.strftime("%H%M%S")
-
-            _z1, _z2 = _dic["lower"], _dic["upper"]
-            _unit = _dic["unit"]
-
-            _npart = _dic["npart"]
-            _xmass = _dic["xmass"]
-            _ngrid = _dic["ngrid"]
-            stream.write(
-                f"{_ymd1}; {_hms1}; {_ymd2}; {_hms2}; "
-                + f"NaN; NaN; NaN; NaN; {_unit}; {_z1}; {_z2}; "
-                + f"{_npart}; {_xmass}; {_name}; {_lon}; {_lat}; {_ngrid}"
-                + "\n"
-            )
+        for station in stations:
+            if in_active_campaign(station):
+                stream.write(_release_line(station))
+
+    return stream.changed
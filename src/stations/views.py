@@ -5,8 +5,7 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.gis.geos import Point as GeoPoint
 from django.contrib.messages.views import SuccessMessageMixin
-from django.core.serializers import serialize
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
@@ -24,10 +23,16 @@ from django.views.generic import (
 from src.campaigns.models import Campaign
 from src.domains.models import Domain
 from src.utils import util
+from src.utils.export import bump_export_version, schedule_export
+from src.utils.geojson import feature_collection, read_viewport
+from src.utils.layers import layer_response
 
 from .forms import StationCampaignForm, StationForm, StationUpdateForm
 from .models import Station
 
+# Station fields written in GeoJSON properties, as used by the maps
+GEOJSON_PROPERTIES = ["name", "slug", "is_active", "uses_flexpart"]
+
 
 def get_my_queryset(request):
     campaign_id = request.session.get("campaign_id")
@@ -40,23 +45,37 @@ def get_my_queryset(request):
 
 
 def data_this_station_margin(request, slug):
-    """this uses the serializer to convert the data 'Station.objects.all()' to 'geojson' data"""
-    station = serialize(
-        "geojson",
+    """convert the data 'Station.objects.filter(slug=slug)' to 'geojson' data,
+    with the margin as geometry.
+    """
+    station = feature_collection(
         Station.objects.filter(slug=slug),
-        geometry_field=("margin_geom"),
+        GEOJSON_PROPERTIES,
+        geometry_field_="margin_geom",
     )
     return HttpResponse(station, content_type="json")
 
 
 def data_all_stations(request, slug=None):
-    """this uses the serializer to convert the data 'Station.objects.all()' to 'geojson' data"""
-    station = serialize(
-        "geojson",
-        get_my_queryset(request),
-    )
+    """convert the data 'Station.objects.all()' to 'geojson' data
+
+    Note:
+        - optional 'bbox' query parameter, only stations inside the map viewport.
+        - layer is cached per campaign and viewport, until a station changes.
+    """
+    try:
+        bbox, _ = read_viewport(request)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    def _build():
+        return feature_collection(
+            get_my_queryset(request), GEOJSON_PROPERTIES, bbox_=bbox
+        )
+
     # station = serialize("geojson", Station.objects.exclude(slug=slug))
-    return HttpResponse(station, content_type="json")
+    campaign_id = request.session.get("campaign_id")
+    return layer_response(request, "stations", _build, campaign_id, bbox)
 
 
 @login_required
@@ -81,9 +100,9 @@ def enable_all_stations(request):
 @permission_required("stations.change_station")
 def download_config(request):
     """download config files for Station and return list view"""
-    qs = get_my_queryset(request)
-    station = qs.order_by("name").first()
-    station.save()
+    # force regeneration, files may have been edited or removed by hand
+    bump_export_version("stations")
+    schedule_export("stations")
     messages.info(request, "Stations config file successfully downloaded")
     return redirect(reverse_lazy("stations:redirect"))
 
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.13 on 2026-10-18 15:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surface_meteograms", "0004_alter_surfacemeteogram_slug"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surfacemeteogram",
+            name="variants",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.1.13 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surface_meteograms", "0005_surfacemeteogram_variants"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="surfacemeteogram",
+            index=models.Index(
+                fields=["date", "location", "type", "points", "id"],
+                name="smeteogram_keyset_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.1.13 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+def dedupe(apps, schema_editor):
+    """delete duplicated surface meteograms, before adding the unique constraint
+
+    Keep one per tuple: the first one with an image, or the first one.
+    """
+    model = apps.get_model("surface_meteograms", "SurfaceMeteogram")
+    latest = apps.get_model("vertical_meteograms", "LatestMeteogram")
+    qn = schema_editor.connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = ", ".join(
+        qn(c) for c in ("date_id", "location_id", "type_id", "points_id")
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ("
+            "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+            f"PARTITION BY {columns} ORDER BY (img = %s), id) AS n FROM {table}"
+            ") AS d WHERE d.n > 1)",
+            ["pics/default.svg"],
+        )
+        cursor.execute(
+            f"UPDATE {qn(latest._meta.db_table)} SET smeteogram_id = NULL "
+            "WHERE smeteogram_id IS NOT NULL "
+            f"AND smeteogram_id NOT IN (SELECT id FROM {table})"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surface_meteograms", "0006_smeteogram_keyset_idx"),
+        ("vertical_meteograms", "0006_latestmeteogram"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="surfacemeteogram",
+            name="smeteogram_keyset_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="surfacemeteogram",
+            constraint=models.UniqueConstraint(
+                fields=["date", "location", "type", "points"],
+                name="unique_smeteogram",
+            ),
+        ),
+    ]
@@ -1,17 +1,19 @@
 # Stdlib imports
-from pathlib import Path
-
 # Core Django imports
-from django.conf import settings
 from django.contrib.gis.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django_extensions.db.fields import AutoSlugField
 
 # Third-party app imports
 # Imports from my apps
 from src.stations.models import Station
+from src.utils.layers import bump_layer_version
+from src.utils.managers import UpsertManager
 from src.utils.storage import OverwriteStorage
-from src.utils.util import read_subtext_file
+from src.utils.util import find_subtext, subtext_table
+from src.vertical_meteograms.manifest import gfx_manifest
 from src.vertical_meteograms.models import VMDate
 
 
@@ -81,6 +83,8 @@ class SurfaceMeteogram(models.Model):
         "Surface Meteogram Adress",
         unique=True,
         # always_update=False,
+        # keep slugs precomputed for bulk_create, see util.materialize
+        overwrite_on_add=False,
         populate_from=["location", "type", "points", "date"],
     )
     type = models.ForeignKey(
@@ -124,9 +128,25 @@ class SurfaceMeteogram(models.Model):
         null=True,
     )
 
+    # thumbnails and WebP versions of img, see src.utils.derivatives
+    variants = models.JSONField(
+        default=list,
+        blank=True,
+    )
+
+    objects = UpsertManager()
+
     class Meta:
         verbose_name = "Surface Meteogram"
         ordering = ["date", "location", "type", "points"]
+        constraints = [
+            # one meteogram per tuple, also the index of the lookups by tuple,
+            # and of the keyset pagination of the list view
+            models.UniqueConstraint(
+                fields=["date", "location", "type", "points"],
+                name="unique_smeteogram",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.date.date.strftime('%Y%m%d:%H'):<14} {self.type} {self.location} {self.points}"
@@ -134,39 +154,65 @@ class SurfaceMeteogram(models.Model):
     def save(self, *args, **kwargs):
         """overwrite save to load imgage"""
         if self.img == "pics/default.svg":
-
-            # date format: YYYYMMDDHH
-            _date = self.date.date.strftime("%Y%m%d%H")
-
-            if self.points.name == "HERE":
-                self.img_path = (
-                    f"gfx/{_date}/PMET_{self.location}_{_date}_{self.type.name}.png"
-                )
-            else:
-                self.img_path = f"gfx/{_date}/PMET_{self.location}_{_date}_{self.type.name}_{self.points.name}.png"
-
-            if Path(Path(settings.MEDIA_ROOT) / self.img_path).exists():
-                # if exist, overwrite path to image
-                self.img = self.img_path
+            self._get_img()
 
         if self.subtext is None:
             self._get_subtext()
 
         super().save(*args, **kwargs)  # Call the "real" save() method.
 
-    def _get_subtext(self):
-        """get subtext from subtext.yaml"""
-        plots = read_subtext_file()
-        if "SurfaceMeteogram" in plots:
-            _ = plots["SurfaceMeteogram"]
-            self.subtext = _.get("subtext", None)
-            if _ is not None and "type" in _:
-                key = str(self.type).strip()
-                _ = _["type"].get(key, None)
-                if _ is not None and "subtext" in _:
-                    self.subtext = _.get("subtext", None)
-                if _ is not None and "points" in _:
-                    key = str(self.points).strip()
-                    _ = _["points"].get(key, None)
-                    if _ is not None and "subtext" in _:
-                        self.subtext = _.get("subtext", None)
+    def _get_img(self):
+        """get image from gfx directory, if available"""
+        # date format: YYYYMMDDHH
+        _date = self.date.date.strftime("%Y%m%d%H")
+
+        if self.points.name == "HERE":
+            self.img_path = (
+                f"gfx/{_date}/PMET_{self.location}_{_date}_{self.type.name}.png"
+            )
+        else:
+            self.img_path = f"gfx/{_date}/PMET_{self.location}_{_date}_{self.type.name}_{self.points.name}.png"
+
+        # look up the image manifest, not the media volume
+        image = gfx_manifest.get(self.img_path)
+        if image is not None:
+            # if exist, overwrite path to image
+            self.img = self.img_path
+            self.img_width = image["width"]
+            self.img_height = image["height"]
+
+    def _get_subtext(self, table_=None):
+        """get subtext from subtext.yaml (or from its flat table table_)"""
+        table = subtext_table() if table_ is None else table_
+        self.subtext = find_subtext(
+            table,
+            "SurfaceMeteogram",
+            str(self.type).strip(),
+            str(self.points).strip(),
+        )
+
+
+@receiver(post_save, sender=SurfaceMeteogram)
+def update_smeteogram_version(sender, *args, **kwargs):
+    """flag cached meteogram panels as changed (e.g. subtext)"""
+    # no post_delete receiver: it would prevent fast cascade deletes of the
+    # meteograms, retention.purge bumps the version instead.
+    bump_layer_version("smeteograms")
+
+
+@receiver(post_save, sender=SMType)
+@receiver(post_save, sender=SMPoints)
+def materialize_added(sender, instance, created, raw=False, **kwargs):
+    """create the surface meteograms of the runs retained, for types or points added
+
+    See src.vertical_meteograms.models.materialize_added
+    """
+    if not created or raw:
+        return
+    # util imports the models
+    from .util import materialize
+
+    if sender is SMType:
+        materialize(VMDate.objects.all(), types_=[instance])
+    else:
+        materialize(VMDate.objects.all(), points_=[instance])
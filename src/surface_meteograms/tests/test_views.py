@@ -0,0 +1,43 @@
+# Stdlib imports
+import pytest
+
+# Core Django imports
+from django.urls import reverse
+
+# Third-party app imports
+# Imports from my apps
+from src.stations.models import Station
+from src.surface_meteograms.tests.factories import SMPointsFactory, SMTypeFactory
+from src.vertical_meteograms import util
+
+pytestmark = pytest.mark.django_db
+
+
+class TestShowPlot:
+    """
+    Test class for all tests related to the data_show_plot view
+    """
+
+    @pytest.fixture
+    def date(self):
+        return util.register_dates(["2022052300"])[0]
+
+    def test_surface(self, client, station: Station, date):
+        """
+        GIVEN surface meteogram types and points added after a run
+        WHEN  requesting their panels
+        THEN  return both panels of the points selected, materialized
+          once the types and points were saved, and the panels of every points
+        """
+        SMTypeFactory(name="op1")
+        SMTypeFactory(name="op2")
+        here = SMPointsFactory(name="HERE")
+        SMPointsFactory(name="SEA")
+        url = reverse("smeteograms:show_plot")
+        params = {"location": station.pk, "points": here.pk, "date": date.pk}
+
+        response = client.get(url, params)
+        assert response.status_code == 200
+        data = response.json()
+        assert sorted(data["variants"]) == ["HERE", "SEA"]
+        assert data["img1"] == data["variants"]["HERE"]["img1"]
@@ -0,0 +1,114 @@
+# Stdlib imports
+from itertools import product
+
+# Core Django imports
+# Third-party app imports
+# Imports from my apps
+from src.stations.models import Station
+from src.utils.layers import bump_layer_version
+from src.utils.util import subtext_table, unique_slugs
+from src.vertical_meteograms.latest import update_latest
+
+from .models import SMPoints, SMType, SurfaceMeteogram
+
+
+def materialize(dates_, stations_=None, types_=None, points_=None):
+    """create the missing surface meteograms of these VMDate, in bulk
+
+    One instance per station, SMType and SMPoints, or only of stations_,
+    types_ and points_ (e.g. added since).
+    See src.vertical_meteograms.util.materialize
+
+    Return number of instances created and updated.
+    """
+    dates = list(dates_)
+    queryset = SurfaceMeteogram.objects.filter(date__in=dates)
+    if stations_ is None:
+        stations = list(Station.objects.all())
+    else:
+        stations = list(stations_)
+        queryset = queryset.filter(location__in=stations)
+    if types_ is None:
+        types = list(SMType.objects.all())
+    else:
+        types = list(types_)
+        queryset = queryset.filter(type__in=types)
+    if points_ is None:
+        points = list(SMPoints.objects.all())
+    else:
+        points = list(points_)
+        queryset = queryset.filter(points__in=points)
+    default = SurfaceMeteogram._meta.get_field("img").default
+
+    existing = {
+        (obj.location_id, obj.type_id, obj.points_id, obj.date_id): obj
+        for obj in queryset.only("id", "location", "type", "points", "date", "img")
+    }
+
+    subtexts = subtext_table()
+    new, found = [], []
+    for date, location, _type, _points in product(dates, stations, types, points):
+        obj = existing.get((location.pk, _type.pk, _points.pk, date.pk))
+        if obj is None:
+            obj = SurfaceMeteogram(
+                location=location, type=_type, points=_points, date=date
+            )
+            obj._get_img()
+            obj._get_subtext(subtexts)
+            new.append(obj)
+        elif obj.img == default:
+            obj.location, obj.type, obj.points, obj.date = (
+                location,
+                _type,
+                _points,
+                date,
+            )
+            obj._get_img()
+            if obj.img != default:
+                found.append(obj)
+
+    slugs = unique_slugs(
+        SurfaceMeteogram,
+        {
+            i: f"{obj.location} {obj.type} {obj.points} {obj.date}"
+            for i, obj in enumerate(new)
+        },
+    )
+    for i, obj in enumerate(new):
+        obj.slug = slugs[i]
+    SurfaceMeteogram.objects.bulk_create(new, batch_size=1000)
+    SurfaceMeteogram.objects.bulk_update(
+        found, ["img", "img_path", "img_width", "img_height"], batch_size=1000
+    )
+    if new or found:
+        # bulk operations do not send signals
+        bump_layer_version("smeteograms")
+        # default meteogram of the redirect view
+        update_latest("smeteogram", dates)
+    return len(new), len(found)
+
+
+def get_meteogram(type_, location_, points_, date_):
+    """return the surface meteogram, None if not materialized
+
+    See src.vertical_meteograms.util.get_meteogram
+    """
+    try:
+        return SurfaceMeteogram.objects.get(
+            type=type_, location=location_, points=points_, date=date_
+        )
+    except SurfaceMeteogram.DoesNotExist:
+        return None
+
+
+def get_panels(location_id_, date_id_):
+    """return the surface meteograms of a location and a date,
+    one per SMType and SMPoints
+
+    See src.vertical_meteograms.util.get_panels
+    """
+    return list(
+        SurfaceMeteogram.objects.filter(
+            location_id=location_id_, date_id=date_id_
+        ).select_related("type", "points")
+    )
@@ -1,15 +1,18 @@
 # Stdlib imports
-import random
+import json
 
 # Core Django imports
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
 from django.views.generic import (
     CreateView,
     DetailView,
@@ -21,6 +24,11 @@ from django.views.generic import (
 # Third-party app imports
 # Imports from my apps
 from src.stations.models import Station
+from src.utils.derivatives import srcset, thumbnail
+from src.utils.layers import layer_response
+from src.utils.pagination import KeysetPaginationMixin
+from src.utils.util import update_session
+from src.vertical_meteograms.latest import latest_slug
 from src.vertical_meteograms.models import VMDate
 
 from .forms import (
@@ -29,6 +37,7 @@ from .forms import (
     SurfaceMeteogramUpdateSubtextForm,
 )
 from .models import SMPoints, SMType, SurfaceMeteogram
+from .util import get_meteogram, get_panels
 
 
 class SurfaceMeteogramDetailView(LoginRequiredMixin, SuccessMessageMixin, DetailView):
@@ -68,23 +77,24 @@ class SurfaceMeteogramRedirectView(RedirectView):
             }
             form = SurfaceMeteogramForm(data)
             if form.is_valid():
-                obj, created = SurfaceMeteogram.objects.get_or_create(
-                    type=_type,
-                    location=_location,
-                    points=_points,
-                    date=_date,
-                )
-                self.pattern_name = "smeteograms:detail"
-                kwargs["slug"] = obj.slug
+                # None if not materialized yet
+                obj = get_meteogram(_type, _location, _points, _date)
+                if obj is not None:
+                    self.pattern_name = "smeteograms:detail"
+                    kwargs["slug"] = obj.slug
 
         if not obj:
-            objects = SurfaceMeteogram.objects.all()
-            if len(objects) == 0:
+            # latest meteogram with an image, or latest one
+            slug = latest_slug("smeteogram") or (
+                SurfaceMeteogram.objects.order_by("-date__date")
+                .values_list("slug", flat=True)
+                .first()
+            )
+            if slug is None:
                 self.pattern_name = "smeteograms:create"
             else:
-                obj = random.choice(objects)
                 self.pattern_name = "smeteograms:detail"
-                kwargs["slug"] = obj.slug
+                kwargs["slug"] = slug
 
         return super().get_redirect_url(*args, **kwargs)
 
@@ -167,11 +177,25 @@ class SurfaceMeteogramCreateView(LoginRequiredMixin, SuccessMessageMixin, Create
 smeteogram_create_view = SurfaceMeteogramCreateView.as_view()
 
 
-class SurfaceMeteogramListView(LoginRequiredMixin, SuccessMessageMixin, ListView):
+class SurfaceMeteogramListView(
+    LoginRequiredMixin, SuccessMessageMixin, KeysetPaginationMixin, ListView
+):
     model = SurfaceMeteogram
     template_name = "smeteograms/smeteogram_list.html"
     context_object_name = "smeteograms"
     paginate_by = 10
+    # the ordering of the model, by date, station, type and points names,
+    # sought from the index on VMDate.date then the unique constraint
+    keyset = ("date__date", "location__name", "type__name", "points__name")
+    count_mode = "estimate"
+
+    def get_queryset(self):
+        # names of date, type, location and points are displayed
+        return (
+            super()
+            .get_queryset()
+            .select_related("date", "location", "type", "points")
+        )
 
 
 smeteogram_list_view = SurfaceMeteogramListView.as_view()
@@ -209,12 +233,9 @@ def data_change_plot(request):
     form = SurfaceMeteogramForm(data)
     if form.is_valid():
         data = {}
-        smeteogram, created = SurfaceMeteogram.objects.get_or_create(
-            type=_type,
-            location=_location,
-            points=_points,
-            date=_date,
-        )
+        smeteogram = get_meteogram(_type, _location, _points, _date)
+        if smeteogram is None:
+            raise Http404("No such surface meteogram.")
         data = {
             "is_valid": True,
         }
@@ -227,78 +248,68 @@ def data_change_plot(request):
         return render(request, "smeteograms/smeteogram_detail.html", {"form": form})
 
 
-def data_show_plot(request):
-    """ """
-    try:
-        _type = SMType.objects.get(Q(name="op1"))
-        _type_rev = SMType.objects.get(~Q(name="op1"))
-    except SMType.DoesNotExist:
-        _type = None
+def _panel(smeteogram_):
+    """json description of a meteogram panel"""
+    return {
+        "url": smeteogram_.img.url,
+        "nam": smeteogram_.img.name,
+        "path": smeteogram_.img_path,
+        "subtext": smeteogram_.subtext,
+        # smaller versions, if rendered (see make_derivatives)
+        "srcset": srcset(smeteogram_.variants),
+        "thumbnail": thumbnail(smeteogram_.variants) or smeteogram_.img.url,
+        "chg_subtext": reverse("smeteograms:update", kwargs={"slug": smeteogram_.slug}),
+    }
 
-    _location = None
-    try:
-        location_id = request.GET.get("location", None)
-        if location_id:
-            _location = Station.objects.get(pk=location_id)
-    except Station.DoesNotExist:
-        pass
 
-    _points = None
-    try:
-        _id = request.GET.get("points", None)
-        if _id:
-            _points = SMPoints.objects.get(pk=_id)
-    except SMPoints.DoesNotExist:
-        pass
-
-    _date = None
+@require_GET
+@transaction.non_atomic_requests
+def data_show_plot(request):
+    """return both panels of the surface meteogram of a location, points and a date
+
+    Note:
+        - 'variants' holds both panels of every SMPoints,
+          so the page can switch points without another request.
+        - read only, panels are cached per location, points and date,
+          until a surface meteogram changes.
+    """
     try:
-        date_id = request.GET.get("date", None)
-        if date_id:
-            _date = VMDate.objects.get(pk=date_id)
-    except VMDate.DoesNotExist:
-        pass
-
-    data = {"type": _type, "location": _location, "points": _points, "date": _date}
-    form = SurfaceMeteogramForm(data)
-    if form.is_valid():
-        data = {}
-        # save location, and date
-        request.session["location_id"] = _location.pk
-        request.session["date_id"] = _date.pk
-
-        smeteogram, created = SurfaceMeteogram.objects.update_or_create(
-            type=_type,
-            location=_location,
-            points=_points,
-            date=_date,
-        )
-        data["img1"] = {
-            "url": smeteogram.img.url,
-            "nam": smeteogram.img.name,
-            "path": smeteogram.img_path,
-            "subtext": smeteogram.subtext,
-            "chg_subtext": reverse_lazy(
-                "smeteograms:update", kwargs={"slug": smeteogram.slug}
-            ),
-            # "ttl": f"{smeteogram.location} {smeteogram.date.date.strftime('%Y-%m-%d %H:%M')}",
+        location_id = int(request.GET["location"])
+        points_id = int(request.GET["points"])
+        date_id = int(request.GET["date"])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Invalid location, points or date.")
+
+    def _build():
+        # panels not materialized yet are missing
+        objs = get_panels(location_id, date_id)
+        # first panel: first type (op1), second panel: the other one
+        variants = {}
+        for obj in sorted(objs, key=lambda obj: obj.type.name):
+            variants.setdefault(obj.points, []).append(_panel(obj))
+        variants = {
+            points: {"img1": panels[0], "img2": panels[1]}
+            for points, panels in variants.items()
+            if len(panels) >= 2
         }
-        smeteogram, created = SurfaceMeteogram.objects.update_or_create(
-            type=_type_rev,
-            location=_location,
-            points=_points,
-            date=_date,
-        )
-        data["img2"] = {
-            "url": smeteogram.img.url,
-            "nam": smeteogram.img.name,
-            "path": smeteogram.img_path,
-            "subtext": smeteogram.subtext,
-            "chg_subtext": reverse_lazy(
-                "smeteograms:update", kwargs={"slug": smeteogram.slug}
-            ),
-            # "ttl": f"{smeteogram.location} {smeteogram.date.date.strftime('%Y-%m-%d %H:%M')}",
+        selected = [v for k, v in variants.items() if k.pk == points_id]
+        if not selected:
+            raise Http404("No such surface meteogram.")
+        data = {
+            **selected[0],
+            "variants": {points.name: v for points, v in variants.items()},
         }
-        return JsonResponse(data)
-    else:
-        return render(request, "smeteograms/smeteogram_detail.html", {"form": form})
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+    response = layer_response(
+        request,
+        "smeteograms",
+        _build,
+        location_id,
+        points_id,
+        date_id,
+        content_type_="application/json",
+    )
+    # save location, and date
+    update_session(request, location_id=location_id, date_id=date_id)
+    return response
@@ -0,0 +1,12 @@
+# Stdlib imports
+# Core Django imports
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+# Third-party app imports
+# Imports from my app
+
+
+class TilesConfig(AppConfig):
+    name = "src.tiles"
+    verbose_name = _("Tiles")
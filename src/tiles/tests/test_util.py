@@ -0,0 +1,56 @@
+# Stdlib imports
+# Core Django imports
+# Third-party app imports
+import pytest
+
+# Imports from my apps
+from src.stations.models import Station
+from src.tiles import util
+
+pytestmark = pytest.mark.django_db
+
+
+def test_tile_envelope():
+    """
+    GIVEN tile coordinates
+    WHEN  computing the tile envelope
+    THEN  return its bounds in web mercator
+    """
+    extent = 20037508.342789244
+    assert util.tile_envelope(0, 0, 0) == pytest.approx(
+        (-extent, -extent, extent, extent)
+    )
+    assert util.tile_envelope(1, 1, 0) == pytest.approx((0, 0, extent, extent))
+
+
+@pytest.mark.parametrize("z, x, y", [(0, 1, 0), (1, 0, 2), (-1, 0, 0), (30, 0, 0)])
+def test_tile_envelope_invalid(z, x, y):
+    """
+    GIVEN tile coordinates outside the grid of the zoom level
+    WHEN  computing the tile envelope
+    THEN  raise ValueError
+    """
+    with pytest.raises(ValueError):
+        util.tile_envelope(z, x, y)
+
+
+@pytest.mark.parametrize("layer", util.LAYERS.keys())
+def test_build_tile(layer, station: Station, modelGrid, domain):
+    """
+    GIVEN features on every layer
+    WHEN  building the world tile
+    THEN  return a vector tile with features
+    """
+    assert len(util.build_tile(layer, 0, 0, 0)) > 0
+
+
+def test_build_tile_empty(station: Station):
+    """
+    GIVEN a station
+    WHEN  building a tile far from the station
+    THEN  return an empty tile
+    """
+    station.geom.x, station.geom.y = 10.0, 60.0
+    station.save()
+
+    assert util.build_tile("stations", 3, 0, 7) == b""
@@ -0,0 +1,69 @@
+# Stdlib imports
+# Core Django imports
+from django.urls import reverse
+
+# Third-party app imports
+import pytest
+
+# Imports from my apps
+from src.stations.models import Station
+
+pytestmark = pytest.mark.django_db
+
+
+class TestTileView:
+    """
+    Test class for all tests related to the vector tiles view
+    """
+
+    def test_tile(self, client, station: Station):
+        """
+        GIVEN a station
+        WHEN  requesting the world tile of the stations layer
+        THEN  return a vector tile, with an ETag
+        """
+        url = reverse(
+            "tiles:tile", kwargs={"layer": "stations", "z": 0, "x": 0, "y": 0}
+        )
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+        assert len(response.content) > 0
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 304
+
+    def test_tile_invalidated(self, client, station: Station):
+        """
+        GIVEN a tile already served
+        WHEN  a station changes
+        THEN  the tile is built again
+        """
+        url = reverse(
+            "tiles:tile", kwargs={"layer": "stations", "z": 0, "x": 0, "y": 0}
+        )
+        etag = client.get(url)["ETag"]
+
+        station.name = "another name"
+        station.save()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"layer": "unknown", "z": 0, "x": 0, "y": 0},
+            {"layer": "stations", "z": 0, "x": 1, "y": 0},
+        ],
+    )
+    def test_tile_not_found(self, client, kwargs):
+        """
+        GIVEN an unknown layer, or a tile outside the grid
+        WHEN  requesting the tile
+        THEN  return 404
+        """
+        response = client.get(reverse("tiles:tile", kwargs=kwargs))
+        assert response.status_code == 404
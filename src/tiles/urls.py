@@ -0,0 +1,12 @@
+# Stdlib imports
+# Core Django imports
+from django.urls import path
+
+# Third-party app imports
+# Imports from my apps
+from .views import tile
+
+app_name = "tiles"
+urlpatterns = [
+    path("<str:layer>/<int:z>/<int:x>/<int:y>.mvt", tile, name="tile"),
+]
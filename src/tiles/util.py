@@ -0,0 +1,146 @@
+# Stdlib imports
+# Core Django imports
+from django.apps import apps
+from django.db import connections
+from django.urls import reverse
+
+# Third-party app imports
+# Imports from my apps
+
+# half size of the world in web mercator (EPSG:3857), in meter
+_extent = 20037508.342789244
+# latitude of the edges of the web mercator world, in degree
+_max_latitude = 85.0511287798066
+# tile size, and buffer around it, in tile pixels
+_tile_extent = 4096
+_tile_buffer = 64
+# deepest zoom level served
+MAX_ZOOM = 22
+
+# vector tile layers
+#   model: model drawn on the layer
+#   geometry: geometry field drawn
+#   properties: whitelist of the fields written in properties ('pk' always is)
+#   expressions: other properties, as SQL expression on the model table 't'
+#   version: change counter of the layer, see src.utils.layers
+#   campaign: layer filtered on the campaign of the session
+LAYERS = {
+    "stations": {
+        "model": "stations.Station",
+        "geometry": "geom",
+        "properties": ["name", "slug", "is_active", "uses_flexpart"],
+        "expressions": {"altitude": 'ST_Z(t."geom")'},
+        "version": "stations",
+        "campaign": True,
+    },
+    "margins": {
+        "model": "stations.Station",
+        "geometry": "margin_geom",
+        "properties": ["name", "slug", "is_active"],
+        "version": "stations",
+        "campaign": True,
+    },
+    "domains": {
+        "model": "domains.Domain",
+        "geometry": "geom",
+        "properties": ["name", "slug", "is_active"],
+        "version": "domains",
+        "campaign": True,
+    },
+    "grids": {
+        "model": "model_grids.ModelGrid",
+        "geometry": "geom",
+        "properties": ["name", "slug"],
+        "version": "grids",
+        "campaign": False,
+    },
+}
+
+
+def tile_envelope(z_, x_, y_):
+    """return bounds of the tile (xmin, ymin, xmax, ymax), in web mercator
+
+    Raises:
+        ValueError: tile outside the zoom level grid
+    """
+    n = 2 ** z_
+    if not (0 <= z_ <= MAX_ZOOM and 0 <= x_ < n and 0 <= y_ < n):
+        raise ValueError(f"Invalid tile -{z_}/{x_}/{y_}-.")
+
+    size = 2 * _extent / n
+    xmin = -_extent + x_ * size
+    ymax = _extent - y_ * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def get_queryset(layer_, campaign_id_=None):
+    """return the queryset of the features of the layer"""
+    conf = LAYERS[layer_]
+    qs = apps.get_model(conf["model"]).objects.all()
+    if conf["campaign"] and campaign_id_:
+        qs = qs.filter(campaigns=campaign_id_)
+    return qs
+
+
+def build_tile(layer_, z_, x_, y_, campaign_id_=None):
+    """return the Mapbox Vector Tile of the layer (bytes), built by PostGIS
+
+    Features are clipped to the web mercator world in EPSG:4326 first,
+    as ST_Transform fails or spreads them past the poles, then to the tile
+    (ST_AsMVTGeom), and the whole tile is encoded with ST_AsMVT, in one query.
+    """
+    conf = LAYERS[layer_]
+    envelope = tile_envelope(z_, x_, y_)
+
+    qs = get_queryset(layer_, campaign_id_)
+    opts = qs.model._meta
+    geom = f't."{opts.get_field(conf["geometry"]).column}"'
+
+    # json key -> SQL expression
+    columns = {"pk": f't."{opts.pk.column}"'}
+    columns.update(
+        {p: f't."{opts.get_field(p).column}"' for p in conf["properties"]}
+    )
+    columns.update(conf.get("expressions", {}))
+    props = ", ".join(f'{expr} AS "{key}"' for key, expr in columns.items())
+
+    # features of the campaign
+    pks, params = qs.values("pk").query.sql_with_params()
+
+    query = f"""
+        WITH bounds AS (
+            SELECT
+                ST_MakeEnvelope(%s, %s, %s, %s, 3857) AS geom,
+                ST_MakeEnvelope(-180, -{_max_latitude}, 180, {_max_latitude}, 4326)
+                    AS world
+        )
+        SELECT ST_AsMVT(mvt, %s, {_tile_extent}, 'geom')
+        FROM (
+            SELECT
+                ST_AsMVTGeom(
+                    ST_Transform(
+                        ST_Intersection(ST_Force2D({geom}), bounds.world), 3857
+                    ),
+                    bounds.geom,
+                    {_tile_extent},
+                    {_tile_buffer},
+                    true
+                ) AS geom,
+                {props}
+            FROM "{opts.db_table}" AS t, bounds
+            WHERE {geom} && ST_Transform(bounds.geom, 4326)
+              AND t."{opts.pk.column}" IN ({pks})
+        ) AS mvt
+        WHERE mvt.geom IS NOT NULL
+    """
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute(query, [*envelope, layer_, *params])
+        tile = cursor.fetchone()[0]
+
+    return bytes(tile) if tile is not None else b""
+
+
+def tiles_url():
+    """return url template of the vector tiles, as used by Leaflet"""
+    url = reverse("tiles:tile", kwargs={"layer": "LAYER", "z": 1, "x": 2, "y": 3})
+    return url.replace("LAYER/1/2/3", "{layer}/{z}/{x}/{y}")
@@ -0,0 +1,45 @@
+# Stdlib imports
+# Core Django imports
+from django.http import Http404
+
+# Third-party app imports
+# Imports from my apps
+from src.utils.layers import layer_response
+
+from .util import LAYERS, build_tile, tile_envelope
+
+content_type = "application/vnd.mapbox-vector-tile"
+
+
+def tile(request, layer, z, x, y):
+    """return the Mapbox Vector Tile of the layer
+
+    Note:
+        - tiles are cached per campaign, until a feature of the layer changes.
+    """
+    if layer not in LAYERS:
+        raise Http404(f"Unknown layer -{layer}-.")
+    try:
+        tile_envelope(z, x, y)
+    except ValueError as exc:
+        raise Http404(str(exc))
+
+    campaign_id = None
+    if LAYERS[layer]["campaign"]:
+        campaign_id = request.session.get("campaign_id")
+
+    def _build():
+        return build_tile(layer, z, x, y, campaign_id)
+
+    version = LAYERS[layer]["version"]
+    return layer_response(
+        request,
+        version,
+        _build,
+        f"tile:{layer}",
+        campaign_id,
+        z,
+        x,
+        y,
+        content_type_=content_type,
+    )
@@ -1,8 +1,15 @@
 from django.conf import settings
 
+from src.tiles.util import tiles_url
+
 
 def settings_context(_request):
     """Settings available by default to the templates context."""
     # Note: we intentionally do NOT expose the entire settings
     # to prevent accidental leaking of sensitive information
-    return {"DEBUG": settings.DEBUG, "VERSION": settings.VERSION}
+    return {
+        "DEBUG": settings.DEBUG,
+        "VERSION": settings.VERSION,
+        # url template of the vector tiles, if maps use them
+        "MAP_TILES_URL": tiles_url() if settings.MAP_VECTOR_TILES else None,
+    }
@@ -0,0 +1,130 @@
+# Stdlib imports
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Third-party app imports
+from PIL import Image
+
+# Core Django imports
+from django.conf import settings
+
+# Imports from my apps
+
+# derivatives are stored outside gfx, which is mirrored with 'rsync --delete'
+_prefix = "derivatives"
+
+
+def derivative_name(hash_, width_, format_):
+    """return path of a derivative image, relative to MEDIA_ROOT
+
+    Named after the content hash of the source image, so names never
+    need to be invalidated, and identical images share their derivatives.
+    """
+    ext = "webp" if format_ == "WEBP" else format_.lower()
+    return f"{_prefix}/{hash_[:2]}/{hash_[:32]}_{width_}.{ext}"
+
+
+def _save(img_, path_, format_, **kwargs):
+    """save image atomically, other builders may write the same file"""
+    path_.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path_.parent, prefix=f".{path_.name}.")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            img_.save(stream, format=format_, **kwargs)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path_)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def render_derivatives(task_):
+    """render thumbnails and WebP versions of one image
+
+    Runs in a worker process, so it does not use Django.
+
+    Args:
+        task_: (media root, source image path relative to it, content hash,
+            widths, WebP quality)
+
+    Return list of variants {"name", "width", "height", "format"},
+    files already rendered are not rendered again.
+    """
+    root, name, _hash, widths, quality = task_
+    root = Path(root)
+    variants = []
+    with Image.open(root / name) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        width, height = img.size
+
+        # WebP versions, down to the smallest width, full size included
+        sizes = sorted({w for w in widths if w < width} | {width})
+        for i, w in enumerate(sizes):
+            h = round(height * w / width)
+            formats = ["WEBP"]
+            if i == 0 and w < width:
+                # png thumbnail, for browsers without WebP
+                formats.append("PNG")
+            for _format in formats:
+                _name = derivative_name(_hash, w, _format)
+                path = root / _name
+                if not path.exists():
+                    _img = img if w == width else img.resize((w, h), Image.LANCZOS)
+                    if _format == "WEBP":
+                        _save(_img, path, _format, quality=quality, method=4)
+                    else:
+                        _save(_img, path, _format, optimize=True)
+                variants.append(
+                    {"name": _name, "width": w, "height": h, "format": _format}
+                )
+    return variants
+
+
+def build_derivatives(images_, workers_=None):
+    """render derivatives of images, in a process pool
+
+    Args:
+        images_: source image path (relative to MEDIA_ROOT) -> content hash
+        workers_: number of processes, os.cpu_count() by default
+
+    Return source image path -> variants, see render_derivatives
+    """
+    widths = getattr(settings, "MEDIA_DERIVATIVE_WIDTHS", [480, 960])
+    quality = getattr(settings, "MEDIA_DERIVATIVE_QUALITY", 80)
+    tasks = [
+        (str(settings.MEDIA_ROOT), name, _hash, widths, quality)
+        for name, _hash in sorted(images_.items())
+    ]
+    if not tasks:
+        return {}
+
+    if workers_ == 1:
+        results = map(render_derivatives, tasks)
+        return dict(zip(sorted(images_), results))
+
+    with ProcessPoolExecutor(max_workers=workers_) as executor:
+        results = executor.map(render_derivatives, tasks, chunksize=4)
+        return dict(zip(sorted(images_), results))
+
+
+def srcset(variants_, format_="WEBP"):
+    """return srcset attribute of an image, e.g. 'a_480.webp 480w, a_960.webp 960w'"""
+    return ", ".join(
+        f"{settings.MEDIA_URL}{v['name']} {v['width']}w"
+        for v in sorted(variants_, key=lambda v: v["width"])
+        if v["format"] == format_
+    )
+
+
+def thumbnail(variants_):
+    """return url of the smallest png thumbnail, None if none"""
+    thumbnails = sorted(
+        (v for v in variants_ if v["format"] == "PNG"), key=lambda v: v["width"]
+    )
+    if not thumbnails:
+        return None
+    return f"{settings.MEDIA_URL}{thumbnails[0]['name']}"
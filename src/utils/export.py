@@ -0,0 +1,262 @@
+# Stdlib imports
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+
+# Core Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+# Third-party app imports
+# Imports from my apps
+
+logger = logging.getLogger(__name__)
+
+# exporter name -> function (or dotted path to it) writing the weathervis config files
+EXPORTERS = {
+    "stations": "src.stations.util.download",
+    "domains": "src.domains.util.download",
+    "plots": "src.plots.util.download",
+}
+
+
+class _ExportHook:
+    """exporters scheduled by one transaction, run once it is committed"""
+
+    def __init__(self, scheduler_):
+        self.scheduler = scheduler_
+        self.names = set()
+
+    def __call__(self):
+        with self.scheduler._lock:
+            self.scheduler._dirty.update(self.names)
+        self.scheduler._on_commit()
+
+
+class ExportScheduler:
+    """coalesce regeneration of the weathervis config files
+
+    Changes only mark an exporter as dirty, in the transaction making them.
+    The exporters marked are run once, after this transaction commits
+    (or right away in autocommit mode), so a burst of saves ends up in
+    a single regeneration of each file. Exporters marked in a transaction
+    rolled back are not run.
+
+    If 'debounce' is set (in seconds), the regeneration is postponed to a
+    background thread, and postponed again by every new change in the meantime.
+    """
+
+    def __init__(self, exporters=None, debounce=None):
+        self.exporters = EXPORTERS if exporters is None else exporters
+        self._debounce = debounce
+        # exporters of committed transactions, waiting to be run
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def debounce(self):
+        if self._debounce is None:
+            return getattr(settings, "CONFIG_EXPORT_DEBOUNCE", 0)
+        return self._debounce
+
+    @property
+    def dirty(self):
+        """names of the exporters waiting to be run"""
+        with self._lock:
+            return set(self._dirty)
+
+    def schedule(self, *names):
+        """mark exporters as dirty, and run them once the transaction is committed"""
+        for name in names:
+            if name not in self.exporters:
+                raise KeyError(f"Unknown config exporter -{name}-.")
+
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            # autocommit, already committed
+            with self._lock:
+                self._dirty.update(names)
+            self._on_commit()
+            return
+
+        # one hook per transaction (and per scheduler), registered again
+        # if discarded by a rollback
+        hooks = connection.__dict__.setdefault("_export_hooks", {})
+        hook = hooks.get(id(self))
+        if hook is None or not any(h is hook for _, h in connection.run_on_commit):
+            hook = hooks[id(self)] = _ExportHook(self)
+            transaction.on_commit(hook)
+        hook.names.update(names)
+
+    def _on_commit(self):
+        if not self.debounce:
+            self.flush()
+            return
+
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._run_deferred)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run_deferred(self):
+        """run dirty exporters from the timer thread"""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Something goes wrong when exporting config files.")
+        finally:
+            # do not leak the connections opened by this thread
+            connections.close_all()
+
+    def flush(self):
+        """run every dirty exporter now, return the names of the exporters run"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            names, self._dirty = self._dirty, set()
+
+        for name in sorted(names):
+            func = self.exporters[name]
+            if isinstance(func, str):
+                func = import_string(func)
+            func()
+
+        return names
+
+    def clear(self):
+        """forget dirty exporters without running them"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._dirty.clear()
+
+
+scheduler = ExportScheduler()
+
+
+def schedule_export(*names):
+    """mark config exporters as dirty, see ExportScheduler.schedule"""
+    scheduler.schedule(*names)
+
+
+def flush_export():
+    """run dirty config exporters synchronously, see ExportScheduler.flush"""
+    return scheduler.flush()
+
+
+class ExportCache:
+    """remember the fingerprint of the last export of each config file
+
+    The fingerprint is made of a change counter, bumped by signals each time
+    a row exported changes, and of a cheap aggregate of the tables exported
+    (row count, max id, ...), which catches bulk updates bypassing signals.
+    Both are kept in the default cache, so they are shared between processes.
+    """
+
+    prefix = "weathervis:export"
+
+    def __init__(self):
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+
+    def _key(self, *parts):
+        return ":".join([self.prefix, *[str(p) for p in parts]])
+
+    def version(self, name):
+        """return the change counter of the exporter"""
+        # counters start from the current time, so a counter evicted from
+        # the cache can not match a fingerprint stored before its eviction.
+        return cache.get_or_set(self._key("version", name), time.time_ns, None)
+
+    def bump(self, *names):
+        """increment the change counter of the exporters"""
+        for name in names:
+            key = self._key("version", name)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # key missing (first change, or evicted)
+                cache.set(key, time.time_ns(), timeout=None)
+
+    def is_fresh(self, key_, fingerprint_):
+        """check the fingerprint matches the one of the last export"""
+        return cache.get(self._key("fingerprint", key_)) == list(fingerprint_)
+
+    def count(self, name, hit_):
+        """increment hit or miss counter of the exporter"""
+        counter = self.hits if hit_ else self.misses
+        with self._lock:
+            counter[name] = counter.get(name, 0) + 1
+
+    def store(self, key_, fingerprint_):
+        """remember the fingerprint of the last export"""
+        cache.set(self._key("fingerprint", key_), list(fingerprint_), timeout=None)
+
+    def stats(self):
+        """return hit and miss counters, per exporter"""
+        with self._lock:
+            return {
+                name: {
+                    "hits": self.hits.get(name, 0),
+                    "misses": self.misses.get(name, 0),
+                }
+                for name in sorted({*self.hits, *self.misses})
+            }
+
+
+export_cache = ExportCache()
+
+
+def bump_export_version(*names):
+    """flag the content of config exporters as changed, see ExportCache.bump
+
+    Bumped now, and again once the transaction is committed: an export
+    running meanwhile still reads the old data, but under the new version,
+    its fingerprint must not match afterwards.
+    """
+    export_cache.bump(*names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: export_cache.bump(*names))
+
+
+def cached_export(name, fingerprint):
+    """decorator skipping an export, if nothing changed since the last one
+
+    Args:
+        name: exporter name, its change counter is part of the fingerprint
+        fingerprint: function returning a tuple of aggregates of the tables exported
+
+    Note:
+        - the decorated function returns None when the export is skipped.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # one fingerprint per exporter and output file(s)
+            _args = repr((args, sorted(kwargs.items()))).encode()
+            key = f"{name}:{hashlib.md5(_args).hexdigest()}"
+            _fingerprint = (export_cache.version(name), *fingerprint())
+            fresh = export_cache.is_fresh(key, _fingerprint)
+            export_cache.count(name, fresh)
+            if fresh:
+                logger.debug(f"Config exporter {name} skipped, nothing changed.")
+                return None
+
+            result = func(*args, **kwargs)
+            export_cache.store(key, _fingerprint)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,146 @@
+# Stdlib imports
+import math
+
+# Core Django imports
+from django.contrib.gis.db.models.functions import AsGeoJSON, GeomOutputGeoFunc
+from django.contrib.gis.geos import Polygon as geoPolygon
+from django.db import connections
+from django.db.models import FloatField, Value
+
+# Third-party app imports
+# Imports from my apps
+
+# coordinate reference system, as written by django geojson serializer
+_crs = (
+    "json_build_object("
+    "'type', 'name', 'properties', json_build_object('name', 'EPSG:4326')"
+    ")"
+)
+
+
+# smallest step of the viewport grid, in degree
+_min_step = 0.1
+
+
+class SimplifyPreserveTopology(GeomOutputGeoFunc):
+    """simplify geometry, without making it invalid"""
+
+    arity = 2
+
+
+def read_viewport(request_):
+    """read optional map viewport from 'bbox' and 'zoom' query parameters
+
+    bbox: 'minx,miny,maxx,maxy' in degree
+    zoom: zoom level of the map (int)
+
+    Note:
+        - bbox is expanded to a grid depending on the zoom level, so nearby
+          viewports share the same (cached) layer.
+        - bbox crossing the antimeridian, or covering the world, is ignored.
+
+    Returns:
+        tuple: bbox (tuple or None), zoom (int or None)
+    """
+    zoom = request_.GET.get("zoom")
+    if zoom is not None:
+        try:
+            zoom = min(max(int(zoom), 0), 24)
+        except ValueError:
+            raise ValueError(f"Invalid zoom -{zoom}-, must be an integer.")
+
+    bbox = request_.GET.get("bbox")
+    if bbox is None:
+        return None, zoom
+
+    try:
+        minx, miny, maxx, maxy = [float(x) for x in bbox.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid bbox -{bbox}-, must be 'minx,miny,maxx,maxy'.")
+    if minx > maxx or miny > maxy:
+        raise ValueError(f"Invalid bbox -{bbox}-, min greater than max.")
+    if minx < -180 or maxx > 180:
+        return None, zoom
+
+    step = max(360 / 2 ** zoom, _min_step) if zoom is not None else 1
+
+    def _snap(x_, func_, min_, max_):
+        return min(max(func_(x_ / step) * step, min_), max_)
+
+    bbox = (
+        _snap(minx, math.floor, -180, 180),
+        _snap(miny, math.floor, -90, 90),
+        _snap(maxx, math.ceil, -180, 180),
+        _snap(maxy, math.ceil, -90, 90),
+    )
+    if bbox == (-180, -90, 180, 90):
+        return None, zoom
+
+    return bbox, zoom
+
+
+def zoom_tolerance(zoom_):
+    """return simplification tolerance (degree), about one pixel at this zoom level"""
+    if zoom_ is None:
+        return None
+    return 360 / (256 * 2 ** zoom_)
+
+
+def feature_collection(
+    queryset_, properties_, geometry_field_="geom", bbox_=None, tolerance_=None
+):
+    """return the queryset as a GeoJSON FeatureCollection (string)
+
+    The whole FeatureCollection is built by PostGIS (ST_AsGeoJSON, json_agg),
+    no model instance nor GEOS geometry is created in Python.
+
+    Args:
+        queryset_: queryset of the features
+        properties_: whitelist of the fields written in properties,
+          'pk' is always written.
+        geometry_field_: geometry field name
+        bbox_: only features whose bounding box overlaps it (&&, spatial index)
+        tolerance_: simplify geometries (ST_SimplifyPreserveTopology)
+    """
+    qs = queryset_
+    if bbox_:
+        envelope = geoPolygon.from_bbox(bbox_)
+        envelope.srid = 4326
+        qs = qs.filter(**{f"{geometry_field_}__bboverlaps": envelope})
+
+    geometry = geometry_field_
+    if tolerance_:
+        geometry = SimplifyPreserveTopology(
+            geometry_field_, Value(tolerance_, output_field=FloatField())
+        )
+
+    qs = qs.annotate(geojson=AsGeoJSON(geometry)).values(
+        "pk", *properties_, "geojson"
+    )
+    sql, params = qs.query.sql_with_params()
+
+    # json key -> column name of the subquery
+    opts = queryset_.model._meta
+    columns = {"pk": opts.pk.column}
+    columns.update({p: opts.get_field(p).column for p in properties_})
+    props = ", ".join(f"'{key}', t.\"{col}\"" for key, col in columns.items())
+    query = f"""
+        SELECT json_build_object(
+            'type', 'FeatureCollection',
+            'crs', {_crs},
+            'features', COALESCE(
+                json_agg(
+                    json_build_object(
+                        'type', 'Feature',
+                        'properties', json_build_object({props}),
+                        'geometry', t."geojson"::json
+                    )
+                ),
+                '[]'::json
+            )
+        )::text
+        FROM ({sql}) AS t
+    """
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchone()[0]
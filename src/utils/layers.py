@@ -0,0 +1,102 @@
+# Stdlib imports
+import hashlib
+import time
+
+# Core Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+# Third-party app imports
+# Imports from my apps
+
+
+class LayerCache:
+    """cache of the GeoJSON layers drawn on the maps
+
+    Each layer is built once per campaign and per change, then served from
+    the default cache (Redis in production, local memory otherwise).
+    A change counter per layer, bumped by model signals, is part of the keys,
+    so a change invalidates the layer for every campaign at once.
+    """
+
+    prefix = "weathervis:layer"
+
+    @property
+    def timeout(self):
+        """layers of old versions, or rarely seen viewports, expire after it"""
+        return getattr(settings, "MAP_LAYER_CACHE_TIMEOUT", 24 * 60 * 60)
+
+    def _key(self, *parts):
+        return ":".join([self.prefix, *[str(p) for p in parts]])
+
+    def version(self, name):
+        """return the change counter of the layer"""
+        # counters start from the current time, so a counter evicted from
+        # the cache can not match layers stored before its eviction.
+        return cache.get_or_set(self._key("version", name), time.time_ns, None)
+
+    def bump(self, *names):
+        """increment the change counter of the layers"""
+        for name in names:
+            key = self._key("version", name)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # key missing (first change, or evicted)
+                cache.set(key, time.time_ns(), timeout=None)
+
+    def get(self, name, build, *parts):
+        """return the layer content, etag and last modified date
+
+        Args:
+            name: layer name, e.g. 'stations'
+            build: function returning the layer content (GeoJSON string)
+            parts: what else the layer content depends on, e.g. campaign id
+        """
+        key = self._key(name, self.version(name), *parts)
+        entry = cache.get(key)
+        if entry is None:
+            content = build()
+            if isinstance(content, str):
+                content = content.encode()
+            entry = {
+                "content": content,
+                "etag": quote_etag(hashlib.md5(content).hexdigest()),
+                "last_modified": int(time.time()),
+            }
+            cache.set(key, entry, timeout=self.timeout)
+        return entry
+
+
+layer_cache = LayerCache()
+
+
+def bump_layer_version(*names):
+    """flag map layers as changed, see LayerCache.bump
+
+    Bumped now, and again once the transaction is committed: a layer built
+    meanwhile still reads the old data, but is cached under the new version,
+    it must not be served afterwards.
+    """
+    layer_cache.bump(*names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: layer_cache.bump(*names))
+
+
+def layer_response(request, name_, build_, *parts, content_type_="json"):
+    """return the cached layer, or 304 if the browser copy is still valid"""
+    entry = layer_cache.get(name_, build_, *parts)
+    response = get_conditional_response(
+        request, etag=entry["etag"], last_modified=entry["last_modified"]
+    )
+    if response is None:
+        response = HttpResponse(entry["content"], content_type=content_type_)
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = http_date(entry["last_modified"])
+    # layer depends on the session (campaign), browser must revalidate each time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
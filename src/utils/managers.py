@@ -0,0 +1,59 @@
+# Stdlib imports
+# Core Django imports
+from django.db import connections, models, router
+
+# Third-party app imports
+# Imports from my apps
+
+
+class UpsertManager(models.Manager):
+    """manager with an atomic insert-or-get, on a unique constraint
+
+    Unlike get_or_create, concurrent requests do not race: the database
+    decides which insert wins (INSERT ... ON CONFLICT DO NOTHING RETURNING).
+    """
+
+    def insert_or_get(self, obj_, fields_):
+        """insert obj_, unless a row with the same values of fields_ exists
+
+        Args:
+            obj_: unsaved instance, with every field set (pre_save is called,
+                e.g. AutoSlugField, but neither save nor the signals)
+            fields_: names of the fields of a unique constraint
+
+        Return (instance, created), instance is obj_ if created.
+        """
+        model = self.model
+        opts = model._meta
+        db = router.db_for_write(model, instance=obj_)
+        connection = connections[db]
+        qn = connection.ops.quote_name
+
+        fields = [f for f in opts.concrete_fields if f is not opts.auto_field]
+        values = [
+            f.get_db_prep_save(f.pre_save(obj_, add=True), connection=connection)
+            for f in fields
+        ]
+        conflict = [opts.get_field(name).column for name in fields_]
+        sql = (
+            f"INSERT INTO {qn(opts.db_table)} "
+            f"({', '.join(qn(f.column) for f in fields)}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))}) "
+            f"ON CONFLICT ({', '.join(qn(c) for c in conflict)}) DO NOTHING "
+            f"RETURNING {qn(opts.pk.column)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, values)
+            row = cursor.fetchone()
+
+        if row is None:
+            # inserted before, or by a concurrent transaction: the insert waits
+            # for it to commit, so the row is visible now
+            attnames = [opts.get_field(name).attname for name in fields_]
+            lookup = {name: getattr(obj_, name) for name in attnames}
+            return self.using(db).get(**lookup), False
+
+        obj_.pk = row[0]
+        obj_._state.adding = False
+        obj_._state.db = db
+        return obj_, True
@@ -0,0 +1,111 @@
+# Stdlib imports
+import mimetypes
+import posixpath
+from pathlib import Path
+from urllib.parse import quote
+
+# Core Django imports
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# Third-party app imports
+# Imports from my apps
+
+# images of forecast runs are never rewritten, derivatives are named after their
+# content hash: browsers keep them, without revalidation
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def _media_path(path_):
+    """return relative and absolute path of a media file, raise Http404 if
+    outside MEDIA_ROOT, hidden (e.g. the gfx manifest) or missing
+    """
+    name = posixpath.normpath(path_).lstrip("/")
+    if name in ("", ".") or any(part.startswith(".") for part in name.split("/")):
+        raise Http404("No such file.")
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, name))
+    except SuspiciousFileOperation:
+        raise Http404("No such file.")
+    if not fullpath.is_file():
+        raise Http404("No such file.")
+    return name, fullpath
+
+
+def is_public(name_):
+    """check if media file can be served to anonymous users
+
+    Only files directly in MEDIA_PUBLIC_DIRS are (logo, placeholder images),
+    not their sub directories (uploaded meteograms).
+    """
+    public = getattr(settings, "MEDIA_PUBLIC_DIRS", ["pics"])
+    return posixpath.dirname(name_) in public
+
+
+def is_immutable(name_):
+    """check if media file never changes once written"""
+    prefixes = getattr(settings, "MEDIA_IMMUTABLE_PREFIXES", ["gfx/", "derivatives/"])
+    return name_.startswith(tuple(prefixes))
+
+
+def _cache_control(name_, public_):
+    if is_immutable(name_):
+        max_age = f"max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        max_age = f"max-age={getattr(settings, 'MEDIA_MAX_AGE', 3600)}"
+    # shared caches must not keep files served to logged in users only
+    return f"{'public' if public_ else 'private'}, {max_age}"
+
+
+@require_safe
+@transaction.non_atomic_requests
+def serve_media(request, path):
+    """serve media file, to logged in users only, except public files
+
+    Note:
+        - the file itself is sent by the web server, depending on
+          MEDIA_SERVE_BACKEND:
+          'x-accel': nginx, from the internal location MEDIA_ACCEL_PREFIX
+          'x-sendfile': apache (mod_xsendfile), or any server supporting X-Sendfile
+          'django': by django itself (development), with sendfile if available
+    """
+    name, fullpath = _media_path(path)
+    public = is_public(name)
+    if not public and not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    stat = fullpath.stat()
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+        response["Cache-Control"] = _cache_control(name, public)
+        return response
+
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or "application/octet-stream"
+
+    backend = getattr(settings, "MEDIA_SERVE_BACKEND", "django")
+    if backend == "x-accel":
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix + quote(name)
+    elif backend == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = str(fullpath)
+    else:
+        response = FileResponse(fullpath.open("rb"), content_type=content_type)
+        response["Content-Length"] = stat.st_size
+    if encoding:
+        response["Content-Encoding"] = encoding
+
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = _cache_control(name, public)
+    return response
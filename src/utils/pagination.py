@@ -0,0 +1,217 @@
+# Stdlib imports
+import base64
+import binascii
+import json
+
+# Core Django imports
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import BooleanField, F, Func, Q, Value
+from django.http import Http404
+
+# Third-party app imports
+# Imports from my apps
+
+# tables estimated smaller than that are counted exactly, e.g. never analyzed
+_exact_below = 1000
+
+
+def encode_cursor(values_):
+    """return url-safe cursor of the keyset values of a row"""
+    data = json.dumps(
+        list(values_), separators=(",", ":"), cls=DjangoJSONEncoder
+    ).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor_):
+    """return keyset values of a cursor, raise ValueError if invalid"""
+    try:
+        data = base64.urlsafe_b64decode(cursor_ + "=" * (-len(cursor_) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor {cursor_}")
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor {cursor_}")
+    return values
+
+
+def _field(model_, key_):
+    """return field of a keyset key, following foreign keys (e.g. 'date__date')"""
+    *path, name = key_.split("__")
+    for part in path:
+        model_ = model_._meta.get_field(part).related_model
+    return model_._meta.get_field(name)
+
+
+def _value(obj_, key_):
+    """return value of a keyset key of a row, following foreign keys"""
+    for part in key_.split("__"):
+        obj_ = getattr(obj_, part)
+    return obj_
+
+
+class _Row(Func):
+    """row value, e.g. (a, b)"""
+
+    template = "(%(expressions)s)"
+
+
+class _RowCompare(Func):
+    """comparison of two row values, e.g. ((a, b) > (1, 2))"""
+
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+def seek(model_, keyset_, values_, reverse_=False):
+    """return filter on rows after values_ (before, if reverse_), in keyset_ order
+
+    A row-value comparison, e.g. (a, b) > (1, 2), with a bound on the leading
+    key, a >= 1, so the database seeks the index of the leading key.
+
+    Raise ValueError if values_ are invalid.
+    """
+    fields = [_field(model_, key) for key in keyset_]
+    try:
+        values = [field.to_python(v) for field, v in zip(fields, values_)]
+    except ValidationError:
+        raise ValueError(f"Invalid keyset values {values_}")
+    lookup = "lte" if reverse_ else "gte"
+    return Q(
+        _RowCompare(
+            _Row(*[F(key) for key in keyset_]),
+            _Row(*[Value(v, output_field=f) for f, v in zip(fields, values)]),
+            arg_joiner=" < " if reverse_ else " > ",
+        ),
+        **{f"{keyset_[0]}__{lookup}": values[0]},
+    )
+
+
+def estimated_count(queryset_):
+    """return number of rows of the queryset
+
+    Estimated from the planner statistics (pg_class.reltuples) if not filtered,
+    so it does not scan the whole table.
+    """
+    if not queryset_.query.where and connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset_.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is not None and row[0] >= _exact_below:
+            return row[0]
+    return queryset_.count()
+
+
+class KeysetPage:
+    """page of a keyset (seek) pagination, see KeysetPaginationMixin"""
+
+    def __init__(
+        self, object_list_, keyset_, has_next_, has_previous_, count_, estimated_
+    ):
+        self.object_list = object_list_
+        self.keyset = keyset_
+        # no cursor from an empty page (e.g. rows deleted since)
+        self._has_next = has_next_ and bool(object_list_)
+        self._has_previous = has_previous_ and bool(object_list_)
+        # number of rows of all pages, None if not counted
+        self.count = count_
+        self.estimated = estimated_
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _cursor(self, obj_):
+        return encode_cursor(_value(obj_, key) for key in self.keyset)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.object_list[-1]) if self._has_next else None
+
+    @property
+    def previous_cursor(self):
+        return self._cursor(self.object_list[0]) if self._has_previous else None
+
+
+class KeysetPaginationMixin:
+    """paginate a ListView by keyset (seek), instead of page number
+
+    Pages are sought from the index of the leading keyset key: no OFFSET,
+    and no COUNT(*) of the whole table, so pages are read as fast, whatever
+    the number of rows. Navigation by cursor links: ?after=<cursor>,
+    ?before=<cursor>, and ?before= for the last page.
+
+    Attributes:
+        keyset: unique ordering, fields of the model, or of related models
+            (e.g. 'date__date')
+        count_mode: 'exact', 'estimate' (see estimated_count) or None, not counted
+    """
+
+    keyset = ("id",)
+    count_mode = "estimate"
+
+    def get_ordering(self):
+        return self.keyset
+
+    def paginate_queryset(self, queryset, page_size):
+        keyset = list(self.keyset)
+        after = self.request.GET.get("after", None)
+        before = self.request.GET.get("before", None)
+        reverse = before is not None and after is None
+        try:
+            cursor = after if not reverse else before
+            values = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise Http404("Invalid page.")
+        if values is not None and len(values) != len(keyset):
+            raise Http404("Invalid page.")
+
+        page = queryset
+        if reverse:
+            page = page.order_by(*[f"-{key}" for key in keyset])
+        if values is not None:
+            try:
+                page = page.filter(seek(queryset.model, keyset, values, reverse))
+            except ValueError:
+                raise Http404("Invalid page.")
+        # one more row, to know if there is a next page
+        rows = list(page[: page_size + 1])
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = values is not None, more
+        else:
+            has_next, has_previous = more, values is not None
+
+        count = None
+        if self.count_mode == "exact":
+            count = queryset.count()
+        elif self.count_mode == "estimate":
+            count = estimated_count(queryset)
+
+        page = KeysetPage(
+            rows,
+            keyset,
+            has_next,
+            has_previous,
+            count,
+            self.count_mode == "estimate",
+        )
+        return (None, page, rows, page.has_other_pages())
@@ -0,0 +1,42 @@
+# Stdlib imports
+from pathlib import Path
+
+# Core Django imports
+# Third-party app imports
+from PIL import Image
+
+# Imports from my apps
+from src.utils.derivatives import build_derivatives, srcset, thumbnail
+
+
+def test_build_derivatives(settings):
+    """
+    GIVEN a png image
+    WHEN  building its derivatives
+    THEN  render WebP versions for each width smaller than the image and full size,
+      and a png thumbnail, named after the content hash
+    """
+    settings.MEDIA_DERIVATIVE_WIDTHS = [480, 960, 4000]
+    name = "gfx/2022052300/VPMET_Bergen_2022052300_op1.png"
+    path = Path(settings.MEDIA_ROOT) / name
+    path.parent.mkdir(parents=True)
+    Image.new("RGB", (1200, 600), "white").save(path)
+
+    variants = build_derivatives({name: "ab" * 32}, workers_=1)[name]
+
+    assert [(v["width"], v["format"]) for v in variants] == [
+        (480, "WEBP"),
+        (480, "PNG"),
+        (960, "WEBP"),
+        (1200, "WEBP"),
+    ]
+    assert variants[0]["height"] == 240
+    for v in variants:
+        assert v["name"].startswith("derivatives/ab/abab")
+        with Image.open(Path(settings.MEDIA_ROOT) / v["name"]) as img:
+            assert img.size == (v["width"], v["height"])
+
+    url = settings.MEDIA_URL
+    assert srcset(variants).split(", ")[0] == f"{url}{variants[0]['name']} 480w"
+    assert thumbnail(variants) == f"{url}{variants[1]['name']}"
+    assert thumbnail([]) is None
@@ -0,0 +1,168 @@
+# Stdlib imports
+import pytest
+
+# Core Django imports
+from django.db import transaction
+
+# Third-party app imports
+# Imports from my apps
+from src.utils.export import (
+    ExportScheduler,
+    bump_export_version,
+    cached_export,
+    export_cache,
+)
+
+
+class TestExportScheduler:
+    """
+    Test class for all tests related to the ExportScheduler
+    """
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def scheduler(self, calls):
+        exporters = {
+            "dummy": lambda: calls.append("dummy"),
+            "other": lambda: calls.append("other"),
+        }
+        return ExportScheduler(exporters=exporters, debounce=0)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_schedule_coalesce(self, scheduler, calls):
+        """
+        GIVEN an ExportScheduler
+        WHEN  scheduling the same exporter many times inside a transaction
+        THEN  the exporter runs only once, after the commit
+        """
+        with transaction.atomic():
+            for _ in range(200):
+                scheduler.schedule("dummy")
+            assert calls == []
+
+        assert calls == ["dummy"]
+        assert scheduler.dirty == set()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_schedule_rollback(self, scheduler, calls):
+        """
+        GIVEN an ExportScheduler
+        WHEN  scheduling an exporter inside a transaction rolled back
+        THEN  the exporter does not run, and is not dirty
+        """
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                scheduler.schedule("dummy")
+                raise ValueError()
+
+        assert calls == []
+        assert scheduler.dirty == set()
+
+        # scheduled again by the next transaction
+        with transaction.atomic():
+            scheduler.schedule("other")
+        assert calls == ["other"]
+
+    def test_flush(self, scheduler, calls):
+        """
+        GIVEN an ExportScheduler with dirty exporters
+        WHEN  forcing a flush
+        THEN  run each dirty exporter once, synchronously
+        """
+        with scheduler._lock:
+            scheduler._dirty.update(["dummy", "other"])
+
+        assert scheduler.flush() == {"dummy", "other"}
+        assert sorted(calls) == ["dummy", "other"]
+        # nothing left to do
+        assert scheduler.flush() == set()
+        assert len(calls) == 2
+
+    def test_schedule_unknown_exporter(self, scheduler):
+        """
+        GIVEN an ExportScheduler
+        WHEN  scheduling an unknown exporter
+        THEN  raise KeyError
+        """
+        with pytest.raises(KeyError):
+            scheduler.schedule("unknown")
+
+
+class TestCachedExport:
+    """
+    Test class for all tests related to the cached_export decorator
+    """
+
+    @pytest.fixture
+    def fingerprint(self):
+        return [0]
+
+    @pytest.fixture
+    def export(self, calls, fingerprint):
+        @cached_export("dummy", lambda: tuple(fingerprint))
+        def _export(fparam_="dummy.yaml"):
+            calls.append(fparam_)
+
+        return _export
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    def test_skip_unchanged(self, export, calls):
+        """
+        GIVEN an export already done
+        WHEN  exporting again, with nothing changed
+        THEN  the export is skipped, and counted as a hit
+        """
+        export_cache.hits.pop("dummy", None)
+        export_cache.misses.pop("dummy", None)
+
+        export()
+        export()
+
+        assert calls == ["dummy.yaml"]
+        assert export_cache.stats()["dummy"] == {"hits": 1, "misses": 1}
+
+    def test_run_changed(self, export, calls, fingerprint):
+        """
+        GIVEN an export already done
+        WHEN  exporting again, after a change of the tables aggregate
+          or of the change counter
+        THEN  the export runs again
+        """
+        export()
+        fingerprint[0] = 1
+        export()
+        bump_export_version("dummy")
+        export()
+
+        assert len(calls) == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_run_changed_on_commit(self, export, calls):
+        """
+        GIVEN a change flagged inside a transaction
+        WHEN  exporting before the transaction is committed
+        THEN  the export runs again once committed
+        """
+        with transaction.atomic():
+            bump_export_version("dummy")
+            export()
+        export()
+
+        assert len(calls) == 2
+
+    def test_run_other_file(self, export, calls):
+        """
+        GIVEN an export already done
+        WHEN  exporting to another file
+        THEN  the export runs again
+        """
+        export()
+        export("other.yaml")
+
+        assert calls == ["dummy.yaml", "other.yaml"]
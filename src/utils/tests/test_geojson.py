@@ -0,0 +1,154 @@
+# Stdlib imports
+import json
+
+import pytest
+
+# Core Django imports
+from django.contrib.gis.geos import Polygon
+from django.core.serializers import serialize
+
+# Third-party app imports
+# Imports from my apps
+from src.model_grids.models import ModelGrid
+from src.model_grids.tests.factories import ModelGridFactory
+from src.stations.models import Station
+from src.utils.geojson import (
+    feature_collection,
+    read_viewport,
+    zoom_tolerance,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_feature_collection(station: Station):
+    """
+    GIVEN a station
+    WHEN  building the GeoJSON FeatureCollection in database
+    THEN  return the same geometry as the django serializer,
+     with whitelisted properties only
+    """
+    qs = Station.objects.all()
+    data = json.loads(feature_collection(qs, ["name", "slug", "is_active"]))
+    expected = json.loads(serialize("geojson", qs))
+
+    assert data["type"] == "FeatureCollection"
+    assert data["crs"] == expected["crs"]
+    assert len(data["features"]) == 1
+    feature = data["features"][0]
+    assert feature["properties"] == {
+        "pk": station.pk,
+        "name": station.name,
+        "slug": station.slug,
+        "is_active": station.is_active,
+    }
+    assert feature["geometry"]["type"] == "Point"
+    assert feature["geometry"]["coordinates"] == pytest.approx(
+        expected["features"][0]["geometry"]["coordinates"]
+    )
+
+
+def test_feature_collection_geometry_field(station: Station):
+    """
+    GIVEN a station
+    WHEN  building the GeoJSON FeatureCollection on another geometry field
+    THEN  return this geometry
+    """
+    qs = Station.objects.all()
+    data = json.loads(feature_collection(qs, ["name"], geometry_field_="margin_geom"))
+
+    assert data["features"][0]["geometry"]["type"] == "Polygon"
+
+
+def test_feature_collection_empty():
+    """
+    GIVEN no station
+    WHEN  building the GeoJSON FeatureCollection
+    THEN  return a FeatureCollection without feature
+    """
+    data = json.loads(feature_collection(Station.objects.all(), ["name"]))
+
+    assert data["features"] == []
+
+
+def test_feature_collection_bbox(station: Station):
+    """
+    GIVEN a station
+    WHEN  building the GeoJSON FeatureCollection for a bbox
+    THEN  return the station only if it is inside the bbox
+    """
+    qs = Station.objects.all()
+    x, y = station.geom.x, station.geom.y
+    inside = (x - 1, y - 1, x + 1, y + 1)
+    outside = (x + 2, y + 2, x + 3, y + 3)
+
+    data = json.loads(feature_collection(qs, ["name"], bbox_=inside))
+    assert len(data["features"]) == 1
+    data = json.loads(feature_collection(qs, ["name"], bbox_=outside))
+    assert len(data["features"]) == 0
+
+
+def test_feature_collection_tolerance():
+    """
+    GIVEN a model grid with a dense border
+    WHEN  building the GeoJSON FeatureCollection with a tolerance
+    THEN  return a simplified border
+    """
+    n = 100
+    ring = [(i / n, 0, 0) for i in range(n)] + [(1, 1, 0), (0, 1, 0), (0, 0, 0)]
+    ModelGridFactory(geom=Polygon(ring))
+    qs = ModelGrid.objects.all()
+
+    full = json.loads(feature_collection(qs, ["name"]))
+    simple = json.loads(feature_collection(qs, ["name"], tolerance_=0.1))
+
+    coords = full["features"][0]["geometry"]["coordinates"][0]
+    assert len(coords) == n + 3
+    coords = simple["features"][0]["geometry"]["coordinates"][0]
+    assert len(coords) == 5
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({}, (None, None)),
+        ({"zoom": "3"}, (None, 3)),
+        ({"bbox": "1.2,50.3,3.4,52.1", "zoom": "3"}, ((0, 45, 45, 90), 3)),
+        ({"bbox": "1.2,50.3,3.4,52.1"}, ((1, 50, 4, 53), None)),
+        # whole world
+        ({"bbox": "-180,-90,180,90"}, (None, None)),
+        # crossing the antimeridian
+        ({"bbox": "170,50,190,60"}, (None, None)),
+    ],
+)
+def test_read_viewport(rf, params, expected):
+    """
+    GIVEN 'bbox' and 'zoom' query parameters
+    WHEN  reading the map viewport
+    THEN  return the bbox expanded to the grid of the zoom level, and the zoom
+    """
+    assert read_viewport(rf.get("/fake-url/", params)) == expected
+
+
+@pytest.mark.parametrize(
+    "params", [{"zoom": "a"}, {"bbox": "1,2,3"}, {"bbox": "3,2,1,4"}]
+)
+def test_read_viewport_invalid(rf, params):
+    """
+    GIVEN invalid 'bbox' or 'zoom' query parameters
+    WHEN  reading the map viewport
+    THEN  raise ValueError
+    """
+    with pytest.raises(ValueError):
+        read_viewport(rf.get("/fake-url/", params))
+
+
+def test_zoom_tolerance():
+    """
+    GIVEN zoom levels
+    WHEN  computing the simplification tolerance
+    THEN  tolerance decreases as the zoom increases
+    """
+    assert zoom_tolerance(None) is None
+    assert zoom_tolerance(0) == 360 / 256
+    assert zoom_tolerance(10) < zoom_tolerance(5)
@@ -0,0 +1,105 @@
+# Stdlib imports
+import pytest
+
+# Core Django imports
+from django.db import transaction
+from django.urls import reverse
+
+# Third-party app imports
+# Imports from my apps
+from src.stations.models import Station
+from src.utils.layers import bump_layer_version, layer_cache, layer_response
+
+
+class TestLayerResponse:
+    """
+    Test class for all tests related to the cached map layers
+    """
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def build(self, calls):
+        def _build():
+            calls.append("dummy")
+            return '{"type": "FeatureCollection", "features": []}'
+
+        return _build
+
+    def test_cached(self, rf, build, calls):
+        """
+        GIVEN a layer already served
+        WHEN  requesting it again, for the same campaign
+        THEN  the layer is not built again
+        """
+        first = layer_response(rf.get("/fake-url/"), "dummy", build, 1)
+        second = layer_response(rf.get("/fake-url/"), "dummy", build, 1)
+
+        assert calls == ["dummy"]
+        assert second.content == first.content
+        assert second["ETag"] == first["ETag"]
+
+        layer_response(rf.get("/fake-url/"), "dummy", build, 2)
+        assert len(calls) == 2
+
+    def test_not_modified(self, rf, build):
+        """
+        GIVEN a layer already served
+        WHEN  requesting it again, with its ETag
+        THEN  return 304, without content
+        """
+        etag = layer_response(rf.get("/fake-url/"), "dummy", build)["ETag"]
+
+        response = layer_response(
+            rf.get("/fake-url/", HTTP_IF_NONE_MATCH=etag), "dummy", build
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_bump(self, rf, build, calls):
+        """
+        GIVEN a layer already served
+        WHEN  the layer is flagged as changed
+        THEN  the layer is built again
+        """
+        layer_response(rf.get("/fake-url/"), "dummy", build)
+        version = layer_cache.version("dummy")
+        bump_layer_version("dummy")
+        layer_response(rf.get("/fake-url/"), "dummy", build)
+
+        assert layer_cache.version("dummy") != version
+        assert len(calls) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bump_on_commit(self, rf, build, calls):
+        """
+        GIVEN a layer flagged as changed inside a transaction
+        WHEN  the layer is built before the transaction is committed
+        THEN  the layer is built again once committed
+        """
+        with transaction.atomic():
+            bump_layer_version("dummy")
+            layer_response(rf.get("/fake-url/"), "dummy", build)
+        layer_response(rf.get("/fake-url/"), "dummy", build)
+
+        assert len(calls) == 2
+
+    @pytest.mark.django_db
+    def test_station_change(self, client, station: Station):
+        """
+        GIVEN the stations layer already served
+        WHEN  a station changes
+        THEN  the stations layer is served again, with the change
+        """
+        url = reverse("stations:all_stations")
+        etag = client.get(url)["ETag"]
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        station.description = "something new"
+        station.save()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert b"something new" in response.content
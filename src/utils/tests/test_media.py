@@ -0,0 +1,80 @@
+# Stdlib imports
+from pathlib import Path
+
+import pytest
+
+# Core Django imports
+from django.urls import reverse
+
+# Third-party app imports
+# Imports from my apps
+from src.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def _media(settings, name_, content_=b"\x89PNG"):
+    path = Path(settings.MEDIA_ROOT) / name_
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content_)
+    return reverse("media", kwargs={"path": name_})
+
+
+def test_serve_media_login(client, settings, user: User):
+    """
+    GIVEN a public picture and a forecast run image
+    WHEN  requesting them, anonymously then logged in
+    THEN  serve the public picture only to anonymous users,
+      and run images as immutable to logged in users
+    """
+    public = _media(settings, "pics/weathervis8.png")
+    image = _media(settings, "gfx/2022052300/VPMET_Bergen_2022052300_op1.png")
+
+    response = client.get(public)
+    assert response.status_code == 200
+    assert response["Cache-Control"].startswith("public")
+    assert client.get(image).status_code == 302
+
+    client.force_login(user)
+    response = client.get(image)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/png"
+    assert response["Cache-Control"] == "private, max-age=31536000, immutable"
+    assert b"".join(response.streaming_content) == b"\x89PNG"
+
+    response = client.get(image, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert response.status_code == 304
+
+
+def test_serve_media_backend(client, settings, user: User):
+    """
+    GIVEN a forecast run image
+    WHEN  serving it with nginx or apache
+    THEN  only return the header telling the web server which file to send
+    """
+    name = "gfx/2022052300/VPMET_Bergen_2022052300_op1.png"
+    url = _media(settings, name)
+    client.force_login(user)
+
+    settings.MEDIA_SERVE_BACKEND = "x-accel"
+    response = client.get(url)
+    assert response["X-Accel-Redirect"] == f"/protected-media/{name}"
+    assert response.content == b""
+
+    settings.MEDIA_SERVE_BACKEND = "x-sendfile"
+    response = client.get(url)
+    assert response["X-Sendfile"] == str(Path(settings.MEDIA_ROOT) / name)
+
+
+def test_serve_media_not_found(client, settings, user: User):
+    """
+    GIVEN files outside MEDIA_ROOT, hidden or missing
+    WHEN  requesting them
+    THEN  return 404
+    """
+    _media(settings, ".gfx_manifest.json", b"{}")
+    client.force_login(user)
+
+    assert client.get("/media/.gfx_manifest.json").status_code == 404
+    assert client.get("/media/../config/settings/base.py").status_code == 404
+    assert client.get("/media/gfx/missing.png").status_code == 404
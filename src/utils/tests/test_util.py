@@ -77,3 +77,59 @@ def test_margin2polygon_raises_no_exception(geopoint, margin):
         _ = util.margin2polygon(_lon, _lat, _alt, margin)
     except Exception as exc:
         assert False, f"'util.antipode()' raised an exception {exc}"
+
+
+def test_subtext_cache(tmp_path):
+    """
+    GIVEN a subtext file
+    WHEN  reading it many times, then after a change
+    THEN  parse it once, then again after the change
+    """
+    fparam = tmp_path / "subtext.yaml"
+    fparam.write_text("VerticalMeteogram:\n  subtext: vertical meteogram\n")
+    fparam = str(fparam)
+
+    plots = util.read_subtext_file(fparam)
+    assert util.read_subtext_file(fparam) is plots
+
+    with open(fparam, "a") as stream:
+        stream.write("SurfaceMeteogram:\n  subtext: surface meteogram\n")
+    plots = util.read_subtext_file(fparam)
+    assert plots["SurfaceMeteogram"] == {"subtext": "surface meteogram"}
+    table = util.subtext_table(fparam)
+    assert util.find_subtext(table, "SurfaceMeteogram") == "surface meteogram"
+
+    with pytest.raises(Exception):
+        util.read_subtext_file(str(tmp_path / "missing.yaml"))
+
+
+def test_find_subtext():
+    """
+    GIVEN a parsed subtext file
+    WHEN  looking for the subtext of plots
+    THEN  return the subtext of the most specific entry
+    """
+    table = util.flatten_subtext(
+        {
+            "SurfaceMeteogram": {
+                "subtext": "surface",
+                "type": {
+                    "Synoptics": {
+                        "subtext": "synoptic",
+                        "points": {"Sea points": {"subtext": "synoptic, sea"}},
+                    },
+                    "Precipitation": {"points": {"Sea points": None}},
+                },
+            }
+        }
+    )
+    find = util.find_subtext
+    assert find(table, "SurfaceMeteogram", "Synoptics", "Sea points") == (
+        "synoptic, sea"
+    )
+    assert find(table, "SurfaceMeteogram", "Synoptics", "All points") == "synoptic"
+    assert find(table, "SurfaceMeteogram", "Precipitation", "Sea points") == (
+        "surface"
+    )
+    assert find(table, "SurfaceMeteogram", "Other") == "surface"
+    assert find(table, "VerticalMeteogram", "Wind") is None
@@ -0,0 +1,99 @@
+# Stdlib imports
+import os
+
+import pytest
+
+# Core Django imports
+# Third-party app imports
+import yaml
+
+# Imports from my apps
+from src.utils.writers import AtomicWriter, write_yaml_entries
+
+
+class TestAtomicWriter:
+    """
+    Test class for all tests related to the AtomicWriter
+    """
+
+    def test_write(self, tmp_path):
+        """
+        GIVEN a path to a file which does not exist
+        WHEN  writing to it
+        THEN  the file is created, and no temporary file is left
+        """
+        fparam = tmp_path / "data" / "test.yaml"
+        with AtomicWriter(fparam) as stream:
+            stream.write("# header\n")
+
+        assert stream.changed
+        assert fparam.read_text() == "# header\n"
+        assert os.listdir(fparam.parent) == ["test.yaml"]
+
+    def test_write_unchanged(self, tmp_path):
+        """
+        GIVEN an existing file
+        WHEN  writing the same content again
+        THEN  the file is left untouched
+        """
+        fparam = tmp_path / "test.yaml"
+        with AtomicWriter(fparam) as stream:
+            stream.write("# header\n")
+        os.utime(fparam, (0, 0))
+
+        with AtomicWriter(fparam) as stream:
+            stream.write("# header\n")
+
+        assert not stream.changed
+        assert fparam.stat().st_mtime == 0
+        assert os.listdir(tmp_path) == ["test.yaml"]
+
+    def test_write_exception(self, tmp_path):
+        """
+        GIVEN an existing file
+        WHEN  an exception is raised while writing
+        THEN  the file keeps its previous content
+        """
+        fparam = tmp_path / "test.yaml"
+        fparam.write_text("previous\n")
+
+        with pytest.raises(ValueError):
+            with AtomicWriter(fparam) as stream:
+                stream.write("partial")
+                raise ValueError()
+
+        assert fparam.read_text() == "previous\n"
+        assert os.listdir(tmp_path) == ["test.yaml"]
+
+
+def test_write_yaml_entries(tmp_path):
+    """
+    GIVEN (key, value) entries
+    WHEN  writing them to a yaml file
+    THEN  the file loads back to the same dictionary
+    """
+    entries = {
+        "first": {"lat": 60.0, "plots": ["a", "b"]},
+        "second": {"lat": 70.0, "plots": []},
+    }
+    fparam = tmp_path / "test.yaml"
+    with AtomicWriter(fparam) as stream:
+        write_yaml_entries(stream, iter(entries.items()))
+
+    assert yaml.safe_load(fparam.read_text()) == entries
+    # blank line between top-level entries
+    assert "\n\nsecond:" in fparam.read_text()
+
+
+def test_write_yaml_entries_empty(tmp_path):
+    """
+    GIVEN no entries (e.g. no active station)
+    WHEN  writing them to a yaml file
+    THEN  the file loads back to an empty dictionary
+    """
+    fparam = tmp_path / "test.yaml"
+    with AtomicWriter(fparam) as stream:
+        stream.write("# header\n")
+        write_yaml_entries(stream, iter([]))
+
+    assert yaml.safe_load(fparam.read_text()) == {}
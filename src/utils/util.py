@@ -1,4 +1,7 @@
 # Stdlib imports
+import os
+import re
+import threading
 from urllib.parse import urlparse
 
 # Third-party app imports
@@ -9,6 +12,7 @@ from django import forms
 from django.conf import settings
 from django.contrib.gis.geos import Point as GeoPoint
 from django.contrib.gis.geos import Polygon as GeoPolygon
+from django.utils.text import slugify
 
 # Imports from my apps
 
@@ -76,20 +80,162 @@ def antipode(pnt_: GeoPoint):
     return GeoPoint(lon, lat, pnt_.z)
 
 
+def unique_slugs(model_, texts_, field_="slug"):
+    """compute unique slugs for new instances, the way AutoSlugField does,
+    with one query for all of them.
+
+    Used before bulk_create, which does not check uniqueness between
+    the instances created together.
+
+    Args:
+        model_: model class
+        texts_: key -> text to slugify
+        field_: name of the AutoSlugField (with overwrite_on_add=False)
+
+    Return key -> slug
+    """
+    max_length = model_._meta.get_field(field_).max_length
+    bases = {
+        key: slugify(text)[:max_length].strip("-") for key, text in texts_.items()
+    }
+    if not bases:
+        return {}
+
+    # slugs already taken, with or without numeric suffix
+    pattern = "|".join(re.escape(b) for b in set(bases.values()))
+    taken = set(
+        model_.objects.filter(
+            **{f"{field_}__regex": rf"^({pattern})(-[0-9]+)?$"}
+        ).values_list(field_, flat=True)
+    )
+
+    slugs = {}
+    for key, base in bases.items():
+        slug, i = base, 1
+        while slug in taken:
+            i += 1
+            suffix = f"-{i}"
+            slug = base[: max_length - len(suffix)].strip("-") + suffix
+        taken.add(slug)
+        slugs[key] = slug
+    return slugs
+
+
+def update_session(request_, **values_):
+    """set session values, only those changed
+
+    So the session is not saved again (write to the session store, new cookie)
+    by requests not changing anything.
+    """
+    for key, value in values_.items():
+        if request_.session.get(key) != value:
+            request_.session[key] = value
+
+
+def _subtext_path(fparam_=None):
+    if fparam_ is None:
+        fparam_ = "/".join([settings.STATIC_ROOT, "yaml", "plots", "subtext.yaml"])
+    return fparam_
+
+
+def _read_subtext_file(fparam_):
+    """read and parse subtext file"""
+    # read parameters configuration file yaml
+    with open(fparam_, "r") as stream:
+        try:
+            param = yaml.safe_load(stream)
+        except yaml.YAMLError as exc:
+            raise yaml.YAMLError(exc)
+    # check parameters file
+    return param
+
+
+def flatten_subtext(plots_):
+    """resolve subtexts of the parsed subtext file, for each plot model,
+    type and points
+
+    Return (model, type, points) -> subtext, with type and points None
+    for the subtext used if none more specific.
+    """
+    table = {}
+    for model, _model in (plots_ or {}).items():
+        _model = _model or {}
+        subtext = _model.get("subtext", None)
+        table[(model, None, None)] = subtext
+        for _type, _t in (_model.get("type", None) or {}).items():
+            _t = _t or {}
+            type_subtext = _t["subtext"] if "subtext" in _t else subtext
+            table[(model, _type, None)] = type_subtext
+            for points, _p in (_t.get("points", None) or {}).items():
+                _p = _p or {}
+                table[(model, _type, points)] = (
+                    _p["subtext"] if "subtext" in _p else type_subtext
+                )
+    return table
+
+
+def find_subtext(table_, model_, type_=None, points_=None):
+    """return the subtext of the plot, from the most specific entry of table_
+
+    Args:
+        table_: see flatten_subtext
+        model_: plot model name, e.g. 'VerticalMeteogram'
+        type_: type display name, e.g. 'Wind'
+        points_: points display name, e.g. 'Sea points'
+    """
+    for key in ((model_, type_, points_), (model_, type_, None), (model_, None, None)):
+        if key in table_:
+            return table_[key]
+    return None
+
+
+class SubtextCache:
+    """process wide cache of the subtext file, parsed and flattened
+
+    The file is parsed again only if its mtime or size changed,
+    so creating many meteograms does not parse it for each of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def get(self, fparam_=None):
+        """return parsed subtext file, and its flat table (see flatten_subtext)"""
+        fparam_ = _subtext_path(fparam_)
+        try:
+            stat = os.stat(fparam_)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            with self._lock:
+                entry = self._files.get(fparam_)
+                if entry is not None and entry[0] == stamp:
+                    return entry[1], entry[2]
+
+            param = _read_subtext_file(fparam_)
+            table = flatten_subtext(param)
+        except Exception as exc:
+            raise Exception(
+                "Something goes wrong when getting subtext of VerticalMeteogram. "
+                f"See parameters file -{fparam_}-. {exc}"
+            )
+
+        with self._lock:
+            self._files[fparam_] = (stamp, param, table)
+        return param, table
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+
+
+subtext_cache = SubtextCache()
+
+
 def read_subtext_file(fparam_=None):
-    """read subtext file"""
-    try:
-        if fparam_ is None:
-            fparam_ = "/".join([settings.STATIC_ROOT, "yaml", "plots", "subtext.yaml"])
-        # read parameters configuration file yaml
-        with open(fparam_, "r") as stream:
-            try:
-                param = yaml.safe_load(stream)
-            except yaml.YAMLError as exc:
-                raise yaml.YAMLError(exc)
-        # check parameters file
-        return param
-    except Exception as exc:
-        raise Exception(
-            f"Something goes wrong when getting subtext of VerticalMeteogram. See parameters file -{fparam_}-. {exc}"
-        )
+    """read subtext file (parsed again only if changed, see SubtextCache)"""
+    return subtext_cache.get(fparam_)[0]
+
+
+def subtext_table(fparam_=None):
+    """return flat table of the subtext file, see flatten_subtext"""
+    return subtext_cache.get(fparam_)[1]
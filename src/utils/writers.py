@@ -0,0 +1,110 @@
+# Stdlib imports
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+# Third-party app imports
+import yaml
+
+# Core Django imports
+# Imports from my apps
+
+try:
+    # C-accelerated dumper, available if PyYAML is built with libyaml
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+_chunk_size = 64 * 1024
+
+
+def file_hash(fparam_):
+    """return the sha256 hex digest of the file content, None if no file"""
+    try:
+        with open(fparam_, "rb") as stream:
+            _hash = hashlib.sha256()
+            for chunk in iter(lambda: stream.read(_chunk_size), b""):
+                _hash.update(chunk)
+    except FileNotFoundError:
+        return None
+
+    return _hash.hexdigest()
+
+
+class AtomicWriter:
+    """write a text file atomically
+
+    Content is streamed to a temporary file, next to the target, then moved
+    into place with os.replace, so readers never see a truncated file.
+    The target is left untouched (content and mtime) if the content is unchanged.
+
+    Usage:
+        with AtomicWriter(fparam_) as stream:
+            stream.write("...")
+        stream.changed  # True if the target was replaced
+    """
+
+    def __init__(self, fparam_, encoding="utf-8", mode=0o644):
+        self.path = Path(fparam_)
+        self.encoding = encoding
+        self.mode = mode
+        self.changed = False
+        self.digest = None
+        self._tmp = None
+        self._stream = None
+        self._hash = None
+
+    def __enter__(self):
+        # create parent directory if need be
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        self._stream = os.fdopen(fd, "w", encoding=self.encoding)
+        self._hash = hashlib.sha256()
+        return self
+
+    def write(self, text):
+        self._stream.write(text)
+        self._hash.update(text.encode(self.encoding))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self._stream.close()
+            self.digest = self._hash.hexdigest()
+            if exc_type is None and self.digest != file_hash(self.path):
+                os.chmod(self._tmp, self.mode)
+                os.replace(self._tmp, self.path)
+                self.changed = True
+        finally:
+            if not self.changed and os.path.exists(self._tmp):
+                os.unlink(self._tmp)
+
+        return False
+
+
+def write_yaml_entries(stream_, entries_):
+    """dump top-level entries one after the other, separated by a blank line
+
+    Args:
+        stream_: file-like object to write to
+        entries_: iterable of (key, value) pairs
+
+    Without entries, write an empty mapping, as yaml.dump({}) does,
+    so the file still loads as a dictionary.
+    """
+    empty = True
+    for key, value in entries_:
+        empty = False
+        yaml.dump(
+            {key: value},
+            stream=stream_,
+            Dumper=SafeDumper,
+            default_flow_style=False,
+            sort_keys=False,
+            indent=4,
+        )
+        stream_.write("\n")
+    if empty:
+        stream_.write("{}\n")
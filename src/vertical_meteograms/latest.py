@@ -0,0 +1,84 @@
+# Stdlib imports
+# Core Django imports
+# Third-party app imports
+# Imports from my apps
+from src.surface_meteograms.models import SurfaceMeteogram
+
+from .models import LatestMeteogram, VerticalMeteogram
+
+# meteograms pointed to, the ones shown first by the detail pages
+_pointers = {
+    "vmeteogram": (VerticalMeteogram, {"type__name": "op1"}),
+    "smeteogram": (SurfaceMeteogram, {"type__name": "op1", "points__name": "ALL"}),
+}
+
+
+def update_latest(field_, dates_=None):
+    """point each station to its latest meteogram with an image
+
+    Args:
+        field_: 'vmeteogram' or 'smeteogram'
+        dates_: only look at the meteograms of these VMDate (e.g. just ingested),
+            pointers only move forward. Otherwise look at all meteograms,
+            and set every pointer again (e.g. after purge).
+
+    Return number of pointers changed.
+    """
+    model, lookup = _pointers[field_]
+    default = model._meta.get_field("img").default
+    queryset = model.objects.filter(**lookup).exclude(img=default)
+    if dates_ is not None:
+        queryset = queryset.filter(date__in=list(dates_))
+    # latest meteogram of each station, with one query (DISTINCT ON)
+    latest = {
+        location: (pk, date)
+        for location, pk, date in queryset.order_by("location_id", "-date__date")
+        .distinct("location_id")
+        .values_list("location_id", "id", "date__date")
+    }
+    current = {
+        location: (pk, date)
+        for location, pk, date in LatestMeteogram.objects.values_list(
+            "location_id", f"{field_}_id", f"{field_}__date__date"
+        )
+    }
+
+    def _pointer(location_, pk_):
+        return LatestMeteogram(location_id=location_, **{f"{field_}_id": pk_})
+
+    new, changed = [], []
+    for location, (pk, date) in latest.items():
+        if location not in current:
+            new.append(_pointer(location, pk))
+            continue
+        _pk, _date = current[location]
+        if _pk == pk:
+            continue
+        # date None: pointer not set, or to a meteogram deleted since
+        if dates_ is None or _date is None or date > _date:
+            changed.append(_pointer(location, pk))
+    if dates_ is None:
+        # no meteogram with an image left
+        changed += [
+            _pointer(location, None)
+            for location, (pk, _) in current.items()
+            if location not in latest and pk is not None
+        ]
+
+    # ignore pointers created meanwhile by another process
+    LatestMeteogram.objects.bulk_create(new, ignore_conflicts=True)
+    LatestMeteogram.objects.bulk_update(changed, [field_], batch_size=1000)
+    return len(new) + len(changed)
+
+
+def latest_slug(field_):
+    """return slug of the latest meteogram with an image, of any station
+
+    One lookup, None if no pointer is set (see update_latest).
+    """
+    return (
+        LatestMeteogram.objects.filter(**{f"{field_}__slug__isnull": False})
+        .order_by(f"-{field_}__date__date", "location_id")
+        .values_list(f"{field_}__slug", flat=True)
+        .first()
+    )
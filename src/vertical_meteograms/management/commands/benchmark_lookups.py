@@ -0,0 +1,141 @@
+# Stdlib imports
+import math
+import statistics
+import time
+from datetime import datetime, timedelta
+
+# Core Django imports
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import make_aware
+
+# Third-party app imports
+# Imports from my apps
+from src.stations.models import Station
+from src.vertical_meteograms.models import VerticalMeteogram, VMDate, VMType
+from src.vertical_meteograms.util import get_panels
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure vertical meteogram lookup latency, on a table filled with "
+        "synthetic rows (rolled back afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000000,
+            help="number of synthetic vertical meteograms",
+        )
+        parser.add_argument(
+            "--lookups",
+            type=int,
+            default=1000,
+            help="number of lookups measured",
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        stations = list(Station.objects.values_list("pk", flat=True))
+        types = list(VMType.objects.values_list("pk", flat=True))
+        if not stations or not types:
+            raise CommandError("Add stations and vertical meteogram types first.")
+
+        with transaction.atomic():
+            dates = self.fill(options["rows"], stations, types)
+            # random rows among the synthetic ones
+            tuples = list(
+                VerticalMeteogram.objects.filter(date_id__in=dates)
+                .order_by("?")
+                .values_list("type_id", "location_id", "date_id")[: options["lookups"]]
+            )
+
+            _type, location, date = tuples[0]
+            queryset = VerticalMeteogram.objects.filter(
+                type_id=_type, location_id=location, date_id=date
+            )
+            self.stdout.write(queryset.explain())
+
+            self.measure(
+                "get (type, location, date)",
+                lambda t: VerticalMeteogram.objects.get(
+                    type_id=t[0], location_id=t[1], date_id=t[2]
+                ),
+                tuples,
+            )
+            self.measure(
+                "insert_or_get, existing",
+                lambda t: VerticalMeteogram.objects.insert_or_get(
+                    VerticalMeteogram(
+                        slug="benchmark", type_id=t[0], location_id=t[1], date_id=t[2]
+                    ),
+                    ["type", "location", "date"],
+                ),
+                tuples,
+            )
+            self.measure(
+                "get_panels (location, date)", lambda t: get_panels(*t[1:]), tuples
+            )
+            # nothing kept
+            transaction.set_rollback(True)
+
+    def fill(self, rows_, stations_, types_):
+        """insert rows_ synthetic vertical meteograms, with one statement
+
+        Return ids of the VMDate created for them.
+        """
+        per_date = len(stations_) * len(types_)
+        start = make_aware(datetime(2100, 1, 1))
+        VMDate.objects.bulk_create(
+            [
+                VMDate(date=start + timedelta(hours=6 * i))
+                for i in range(math.ceil(rows_ / per_date))
+            ]
+        )
+        dates = list(
+            VMDate.objects.filter(date__gte=start).values_list("pk", flat=True)
+        )
+
+        opts = VerticalMeteogram._meta
+        qn = connection.ops.quote_name
+
+        def _column(name_):
+            return qn(opts.get_field(name_).column)
+
+        table = qn(opts.db_table)
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ("
+                f"{_column('slug')}, {_column('type')}, {_column('location')}, "
+                f"{_column('date')}, {_column('img_height')}, {_column('img_width')}, "
+                f"{_column('img')}, {_column('variants')}) "
+                "SELECT 'benchmark-' || d || '-' || s || '-' || t, t, s, d, 0, 0, "
+                "%s, '[]'::jsonb "
+                "FROM unnest(%s) AS d, unnest(%s) AS s, unnest(%s) AS t "
+                "LIMIT %s",
+                [opts.get_field("img").default, dates, stations_, types_, rows_],
+            )
+            count = cursor.rowcount
+            cursor.execute(f"ANALYZE {table}")
+        self.stdout.write(
+            f"Inserted {count} vertical meteograms "
+            f"in {time.perf_counter() - start:.1f} s"
+        )
+        return dates
+
+    def measure(self, name_, func_, tuples_):
+        """run func_ on each tuple, write latency statistics"""
+        durations = []
+        for t in tuples_:
+            start = time.perf_counter()
+            func_(t)
+            durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(
+            f"{name_:<30} median {statistics.median(durations):.3f} ms, "
+            f"p95 {p95:.3f} ms, max {durations[-1]:.3f} ms"
+        )
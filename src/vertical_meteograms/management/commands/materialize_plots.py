@@ -0,0 +1,38 @@
+# Stdlib imports
+# Core Django imports
+from django.core.management import BaseCommand, CommandError
+
+# Third-party app imports
+# Imports from my apps
+from src.vertical_meteograms.models import VMDate
+from src.vertical_meteograms.util import materialize_all, run_date
+
+
+class Command(BaseCommand):
+    help = "Create the vertical and surface meteograms of forecast runs, in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "runs",
+            nargs="*",
+            help="runs (YYYYMMDDHH) to materialize, all registered runs by default",
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        dates = VMDate.objects.all()
+        if options["runs"]:
+            try:
+                _dates = [run_date(run) for run in options["runs"]]
+            except ValueError as exc:
+                raise CommandError(f"Invalid run. {exc}")
+            dates = dates.filter(date__in=_dates)
+            if len(dates) != len(set(_dates)):
+                raise CommandError("Some runs are not registered, run update_plot.")
+
+        result = materialize_all(dates)
+        for name, (created, updated) in result.items():
+            self.stdout.write(
+                f"{name.capitalize()} meteograms: "
+                f"{created} added, {updated} images found"
+            )
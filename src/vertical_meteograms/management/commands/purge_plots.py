@@ -0,0 +1,57 @@
+# Stdlib imports
+# Core Django imports
+from django.core.management import BaseCommand, CommandError
+
+# Third-party app imports
+from dateutil.parser import ParserError
+
+# Imports from my apps
+from src.vertical_meteograms.util import clean
+
+
+class Command(BaseCommand):
+    help = "Delete forecast runs older than some days, with their meteograms"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=6,
+            help="number of days kept, before the reference date",
+        )
+        parser.add_argument(
+            "--date",
+            default=None,
+            help="reference date, today by default",
+        )
+        parser.add_argument(
+            "--files",
+            action="store_true",
+            help="also remove the run directories from gfx",
+        )
+        parser.add_argument(
+            "--archive",
+            default=None,
+            help="move the run directories into this directory, instead of removing",
+        )
+
+    def handle(self, *args, **options):
+        """ """
+        try:
+            result = clean(
+                options["date"],
+                step_=options["days"],
+                files_=options["files"],
+                archive_=options["archive"],
+            )
+        except ParserError as exc:
+            raise CommandError(exc)
+
+        self.stdout.write(
+            "Deleted {dates} date(s), {vertical} vertical and {surface} surface "
+            "meteograms, {derivatives} derivative image(s)".format(**result)
+        )
+        if options["files"] or options["archive"]:
+            action = "Archived" if options["archive"] else "Removed"
+            self.stdout.write(f"{action} {result['runs']} run(s)")
+        self.stdout.write(f"{result['bytes'] / 2**20:.1f} MiB reclaimed")
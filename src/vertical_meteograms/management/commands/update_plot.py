@@ -1,16 +1,19 @@
 # Stdlib imports
-from pathlib import Path
-
-# Third-party app imports
-from dateutil.parser import parse as parse_date
-
 # Core Django imports
-from django.conf import settings
 from django.core.management import BaseCommand
-from django.utils.timezone import make_aware
+from django.db import close_old_connections, transaction
+from django.db.models import Q
 
+# Third-party app imports
 # Imports from my apps
+from src.vertical_meteograms import util as vmeteograms
+from src.vertical_meteograms.manifest import (
+    changed_runs,
+    gfx_manifest,
+    refresh_manifest,
+)
 from src.vertical_meteograms.models import VMDate
+from src.vertical_meteograms.watch import GfxWatcher
 
 
 class Command(BaseCommand):
@@ -19,23 +22,117 @@ class Command(BaseCommand):
 
     help = "Update plots"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quick",
+            action="store_true",
+            help="only scan run directories changed since the last update",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="number of run directories scanned in parallel",
+        )
+        parser.add_argument(
+            "--derivatives",
+            action="store_true",
+            help="render thumbnails and WebP versions of the new images",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="keep running, update as soon as images are added or removed",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=60,
+            help="watch mode: seconds between two checks without inotify event",
+        )
+        parser.add_argument(
+            "--poll",
+            action="store_true",
+            help="watch mode: poll, do not use inotify (e.g. media on NFS)",
+        )
+
     def handle(self, *args, **options):
         """ """
-        gfx = Path(settings.MEDIA_ROOT) / "gfx"
+        self.derivatives = options["derivatives"]
+        self.update(full_=not options["quick"], workers_=options["workers"])
+        if not options["watch"]:
+            return
+
+        watcher = GfxWatcher(
+            gfx_manifest.root,
+            interval_=options["interval"],
+            inotify_=not options["poll"],
+        )
+        mode = "inotify" if watcher.use_inotify else "polling"
+        self.stdout.write(f"Watching {gfx_manifest.root} ({mode})")
+        try:
+            for runs in watcher:
+                # long running process: drop connections closed by the server
+                close_old_connections()
+                self.update(
+                    full_=runs is None, workers_=options["workers"], runs_=runs
+                )
+        except KeyboardInterrupt:
+            self.stdout.write("Stop watching")
+
+    def update(self, full_=True, workers_=8, runs_=None):
+        """refresh the image manifest, then dates and meteograms
+
+        Only the meteograms of the runs new or changed are created or updated,
+        see materialize_plots to materialize every run (e.g. new stations).
+        """
+        previous = gfx_manifest.runs()
+        # refresh the manifest of the images in gfx directory
+        stats = refresh_manifest(full_=full_, workers_=workers_, runs_=runs_)
+        if any(stats.values()):
+            self.stdout.write(
+                "Images: {added} added, {updated} updated, {removed} removed".format(
+                    **stats
+                )
+            )
+        elif runs_ is not None:
+            # watch mode, nothing changed
+            return
+
         # List date in gfx directory
-        list_date = [path.stem for path in gfx.glob(("[0-9]" * 10)) if path.is_dir()]
-
-        # Remove date not listed anymore
-        for obj in VMDate.objects.all():
-            _date = obj.date.strftime("%Y%m%d%H")
-            if _date not in list_date:
-                self.stdout.write(f"Removing date {obj}")
-                obj.delete()
-
-        # create new date
-        for _date in list_date:
-            dt = parse_date(_date[:8] + "T" + _date[8:])
-            dt = dt.replace(minute=0, second=0, microsecond=0)
-            obj, created = VMDate.objects.get_or_create(date=make_aware(dt))
-            if created:
+        list_date = gfx_manifest.dates()
+
+        # Remove date not listed anymore, by chunks in their own transactions
+        deleted = vmeteograms.purge_dates(list_date)
+        if deleted:
+            self.stdout.write(f"Removing {deleted} date(s)")
+
+        with transaction.atomic():
+            # create new date
+            new = vmeteograms.register_dates(list_date)
+            for obj in new:
                 self.stdout.write(f"Adding date {obj}")
+
+            # create meteograms of new and changed runs, or fill in their images
+            changed = [
+                vmeteograms.run_date(run)
+                for run in changed_runs(previous, gfx_manifest.runs())
+            ]
+            dates = VMDate.objects.filter(
+                Q(date__in=changed) | Q(pk__in=[obj.pk for obj in new])
+            )
+            result = vmeteograms.materialize_all(dates)
+            created, updated = map(sum, zip(*result.values()))
+            if created or updated:
+                self.stdout.write(
+                    f"Meteograms: {created} added, {updated} images found"
+                )
+
+        if self.derivatives:
+            # outside the transaction, rendering takes a while
+            result = vmeteograms.make_derivatives(dates)
+            if any(result.values()):
+                self.stdout.write(
+                    "Derivatives: {vertical} vertical and {surface} surface "
+                    "meteograms".format(**result)
+                )
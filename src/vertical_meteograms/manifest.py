@@ -0,0 +1,313 @@
+# Stdlib imports
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Core Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import localtime
+
+# Third-party app imports
+# Imports from my apps
+from src.utils.writers import AtomicWriter
+
+# run directories: gfx/YYYYMMDDHH
+_RUN = re.compile(r"^\d{10}$")
+# meteogram images:
+#   VPMET_{station}_{YYYYMMDDHH}_{type}.png
+#   PMET_{station}_{YYYYMMDDHH}_{type}[_{points}].png
+_IMAGE = re.compile(
+    r"^(?P<kind>VPMET|PMET)_(?P<station>.+)_(?P<date>\d{10})"
+    r"_(?P<type>op\d+)(?:_(?P<points>[A-Z]+))?\.png$"
+)
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_chunk_size = 64 * 1024
+
+
+def is_run(name_):
+    """check the name is the name of a run directory, YYYYMMDDHH"""
+    return _RUN.match(name_) is not None
+
+
+def run_name(date_):
+    """return name of the run directory of a date, YYYYMMDDHH (local time)"""
+    return localtime(date_).strftime("%Y%m%d%H")
+
+
+def parse_image_name(name_):
+    """return kind, station, date, type and points of a meteogram image
+
+    None if the file name does not match any meteogram image.
+    """
+    match = _IMAGE.match(name_)
+    if match is None:
+        return None
+    return match.groupdict()
+
+
+def _read_image(path_):
+    """return sha256 hex digest, width and height of a png image"""
+    _hash = hashlib.sha256()
+    width = height = 0
+    with open(path_, "rb") as stream:
+        head = stream.read(_chunk_size)
+        # png header: signature, then IHDR chunk with width and height
+        if head[:8] == _PNG_SIGNATURE and head[12:16] == b"IHDR":
+            width, height = struct.unpack(">II", head[16:24])
+        while head:
+            _hash.update(head)
+            head = stream.read(_chunk_size)
+    return _hash.hexdigest(), width, height
+
+
+def _scan_run(path_, entries_):
+    """scan one run directory
+
+    Args:
+        path_: path to the run directory, gfx/YYYYMMDDHH
+        entries_: previous manifest entries of this run, {name: entry}
+
+    Return {name: entry}, images unchanged (same size and mtime) are not read again.
+    """
+    result = {}
+    with os.scandir(path_) as it:
+        for item in it:
+            info = parse_image_name(item.name)
+            if info is None or not item.is_file():
+                continue
+            stat = item.stat()
+            entry = entries_.get(item.name)
+            if (
+                entry is None
+                or entry["size"] != stat.st_size
+                or entry["mtime"] != stat.st_mtime_ns
+            ):
+                digest, width, height = _read_image(item.path)
+                entry = {
+                    **info,
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime_ns,
+                    "width": width,
+                    "height": height,
+                    "hash": digest,
+                }
+            result[item.name] = entry
+    return result
+
+
+class GfxManifest:
+    """index of the meteogram images available under MEDIA_ROOT/gfx
+
+    The index is built by a parallel walk of the run directories (gfx/YYYYMMDDHH),
+    stored in a json file, and kept in memory by each process.
+    A refresh only reads the images new or changed (size, mtime) since the
+    previous one, and bumps a change counter in the default cache, so the
+    other processes reload the json file on their next lookup.
+
+    Lookups never touch the media volume (NFS), except to load the json file.
+
+    Entries are keyed on the image path, relative to MEDIA_ROOT,
+    e.g. 'gfx/2022052300/VPMET_Bergen_2022052300_op1.png'
+    """
+
+    prefix = "weathervis:gfx"
+
+    def __init__(self):
+        # lookups of the manifest kept in memory
+        self._lock = threading.Lock()
+        # walks of the gfx directory, one at a time
+        self._refresh_lock = threading.Lock()
+        self._loaded = None
+        self._runs = {}
+
+    @property
+    def root(self):
+        return Path(settings.MEDIA_ROOT) / "gfx"
+
+    @property
+    def path(self):
+        # outside gfx, which is mirrored with 'rsync --delete'
+        return Path(
+            getattr(
+                settings,
+                "GFX_MANIFEST",
+                Path(settings.MEDIA_ROOT) / ".gfx_manifest.json",
+            )
+        )
+
+    def _key(self, *parts):
+        return ":".join([self.prefix, *[str(p) for p in parts]])
+
+    def version(self):
+        """return the change counter of the manifest"""
+        return cache.get_or_set(self._key("version", self.path), time.time_ns, None)
+
+    def bump(self):
+        """increment the change counter of the manifest"""
+        key = self._key("version", self.path)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # key missing (first change, or evicted)
+            cache.set(key, time.time_ns(), timeout=None)
+
+    def _read(self):
+        """read the json file, return {run: {dir mtime, images}}"""
+        try:
+            with open(self.path, "r") as stream:
+                return json.load(stream).get("runs", {})
+        except FileNotFoundError:
+            return None
+
+    def runs(self):
+        """return the manifest, {run: {"mtime": ..., "images": {name: entry}}}
+
+        The json file is (re)loaded if the manifest changed in another process.
+        A missing json file is an empty manifest: it is built by update_plot,
+        never while serving a request.
+        """
+        version = (self.path, self.version())
+        with self._lock:
+            if version != self._loaded:
+                runs = self._read()
+                self._runs = runs if runs is not None else {}
+                self._loaded = version
+            return self._runs
+
+    def refresh(self, full_=True, workers_=8, runs_=None):
+        """walk MEDIA_ROOT/gfx, update the manifest
+
+        Lookups are not blocked meanwhile, they read the previous manifest.
+
+        Args:
+            full_: check size and mtime of every image,
+                otherwise skip run directories with unchanged mtime
+            workers_: number of run directories scanned in parallel
+            runs_: run directories to scan anyway (e.g. reported by inotify)
+
+        Return number of images added, updated and removed.
+        """
+        with self._refresh_lock:
+            previous = self._read()
+            if previous is None:
+                previous = {}
+
+            try:
+                with os.scandir(self.root) as it:
+                    dirs = {
+                        item.name: item.stat().st_mtime_ns
+                        for item in it
+                        if is_run(item.name) and item.is_dir()
+                    }
+            except FileNotFoundError:
+                dirs = {}
+
+            runs = {}
+            todo = []
+            for run, mtime in dirs.items():
+                old = previous.get(run)
+                if (
+                    not full_
+                    and run not in (runs_ or ())
+                    and old is not None
+                    and old["mtime"] == mtime
+                ):
+                    runs[run] = old
+                else:
+                    todo.append(run)
+
+            def _scan(run):
+                old = previous.get(run, {}).get("images", {})
+                return run, _scan_run(self.root / run, old)
+
+            with ThreadPoolExecutor(max_workers=max(1, workers_)) as executor:
+                for run, images in executor.map(_scan, todo):
+                    runs[run] = {"mtime": dirs[run], "images": images}
+
+            stats = _compare(previous, runs)
+            if runs != previous or not self.path.exists():
+                with AtomicWriter(self.path) as stream:
+                    json.dump({"runs": runs}, stream, sort_keys=True)
+                self.bump()
+
+            with self._lock:
+                self._runs = runs
+                self._loaded = (self.path, self.version())
+        return stats
+
+    def clear(self):
+        """forget the manifest kept in memory"""
+        with self._lock:
+            self._loaded = None
+            self._runs = {}
+
+    def dates(self):
+        """return sorted list of runs (YYYYMMDDHH) with a directory under gfx"""
+        return sorted(self.runs())
+
+    def images(self, date_=None):
+        """return {path: entry} of the images, of all runs or of run date_"""
+        runs = self.runs()
+        if date_ is not None:
+            runs = {date_: runs[date_]} if date_ in runs else {}
+        return {
+            f"gfx/{run}/{name}": entry
+            for run, data in runs.items()
+            for name, entry in data["images"].items()
+        }
+
+    def get(self, path_):
+        """return manifest entry of the image (path relative to MEDIA_ROOT)"""
+        parts = Path(path_).parts
+        if len(parts) != 3 or parts[0] != "gfx":
+            return None
+        run = self.runs().get(parts[1])
+        if run is None:
+            return None
+        return run["images"].get(parts[2])
+
+    def exists(self, path_):
+        """check the image is listed in the manifest"""
+        return self.get(path_) is not None
+
+
+def _compare(old_, new_):
+    """return number of images added, updated and removed between two manifests"""
+
+    def _flat(runs_):
+        return {
+            (run, name): entry["hash"]
+            for run, data in runs_.items()
+            for name, entry in data["images"].items()
+        }
+
+    old, new = _flat(old_), _flat(new_)
+    return {
+        "added": len(new.keys() - old.keys()),
+        "updated": sum(1 for k in new.keys() & old.keys() if new[k] != old[k]),
+        "removed": len(old.keys() - new.keys()),
+    }
+
+
+def changed_runs(old_, new_):
+    """return sorted list of runs of new_ with images added, changed or removed"""
+    return sorted(
+        run
+        for run, data in new_.items()
+        if run not in old_ or old_[run]["images"] != data["images"]
+    )
+
+
+gfx_manifest = GfxManifest()
+
+
+def refresh_manifest(full_=True, workers_=8, runs_=None):
+    """walk MEDIA_ROOT/gfx and update the image manifest, see GfxManifest.refresh"""
+    return gfx_manifest.refresh(full_=full_, workers_=workers_, runs_=runs_)
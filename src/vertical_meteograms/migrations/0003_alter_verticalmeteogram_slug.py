@@ -0,0 +1,26 @@
+# Generated by Django 3.1.13 on 2026-10-18 14:02
+
+from django.db import migrations
+import django_extensions.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vertical_meteograms", "0002_auto_20220523_0849"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="verticalmeteogram",
+            name="slug",
+            field=django_extensions.db.fields.AutoSlugField(
+                blank=True,
+                editable=False,
+                overwrite_on_add=False,
+                populate_from=["location", "type", "date"],
+                unique=True,
+                verbose_name="Vertical Meteogram Adress",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.1.13 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vertical_meteograms", "0004_verticalmeteogram_variants"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="verticalmeteogram",
+            index=models.Index(
+                fields=["date", "location", "type", "id"], name="vmeteogram_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.1.13 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stations", "0007_auto_20220829_1256"),
+        ("surface_meteograms", "0006_smeteogram_keyset_idx"),
+        ("vertical_meteograms", "0005_vmeteogram_keyset_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestMeteogram",
+            fields=[
+                (
+                    "location",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="stations.station",
+                    ),
+                ),
+                (
+                    "smeteogram",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="surface_meteograms.surfacemeteogram",
+                    ),
+                ),
+                (
+                    "vmeteogram",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="vertical_meteograms.verticalmeteogram",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Latest Meteogram",
+            },
+        ),
+    ]
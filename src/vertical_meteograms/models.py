@@ -1,17 +1,20 @@
 # Stdlib imports
-from pathlib import Path
-
 # Core Django imports
-from django.conf import settings
 from django.contrib.gis.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django_extensions.db.fields import AutoSlugField
 
 # Third-party app imports
 # Imports from my apps
 from src.stations.models import Station
+from src.utils.layers import bump_layer_version
+from src.utils.managers import UpsertManager
 from src.utils.storage import OverwriteStorage
-from src.utils.util import read_subtext_file
+from src.utils.util import find_subtext, subtext_table
+
+from .manifest import gfx_manifest
 
 
 class VMDate(models.Model):
@@ -71,6 +74,8 @@ class VerticalMeteogram(models.Model):
         "Vertical Meteogram Adress",
         unique=True,
         # always_update=False,
+        # keep slugs precomputed for bulk_create, see util.materialize
+        overwrite_on_add=False,
         populate_from=["location", "type", "date"],
     )
     type = models.ForeignKey(
@@ -110,9 +115,25 @@ class VerticalMeteogram(models.Model):
         null=True,
     )
 
+    # thumbnails and WebP versions of img, see src.utils.derivatives
+    variants = models.JSONField(
+        default=list,
+        blank=True,
+    )
+
+    objects = UpsertManager()
+
     class Meta:
         verbose_name = "Vertical Meteogram"
         ordering = ["date", "location", "type"]
+        constraints = [
+            # one meteogram per tuple, also the index of the lookups by tuple,
+            # and of the keyset pagination of the list view
+            models.UniqueConstraint(
+                fields=["date", "location", "type"],
+                name="unique_vmeteogram",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.date.date.strftime('%Y%m%d:%H'):<14} {self.type} {self.location}"
@@ -120,30 +141,92 @@ class VerticalMeteogram(models.Model):
     def save(self, *args, **kwargs):
         """overwrite save to load imgage"""
         if self.img == "pics/default.svg":
-
-            # date format: YYYYMMDDHH
-            _date = self.date.date.strftime("%Y%m%d%H")
-
-            self.img_path = (
-                f"gfx/{_date}/VPMET_{self.location}_{_date}_{self.type.name}.png"
-            )
-            if Path(Path(settings.MEDIA_ROOT) / self.img_path).exists():
-                # if exist, overwrite path to image
-                self.img = self.img_path
+            self._get_img()
 
         if self.subtext is None:
             self._get_subtext()
 
         super().save(*args, **kwargs)  # Call the "real" save() method.
 
-    def _get_subtext(self):
-        """get subtext from subtext.yaml"""
-        plots = read_subtext_file()
-        if "VerticalMeteogram" in plots:
-            _ = plots["VerticalMeteogram"]
-            self.subtext = _.get("subtext", None)
-            if _ is not None and "type" in _:
-                key = str(self.type).strip()
-                _ = _["type"].get(key, None)
-                if _ is not None and "subtext" in _:
-                    self.subtext = _.get("subtext", None)
+    def _get_img(self):
+        """get image from gfx directory, if available"""
+        # date format: YYYYMMDDHH
+        _date = self.date.date.strftime("%Y%m%d%H")
+
+        self.img_path = (
+            f"gfx/{_date}/VPMET_{self.location}_{_date}_{self.type.name}.png"
+        )
+        # look up the image manifest, not the media volume
+        image = gfx_manifest.get(self.img_path)
+        if image is not None:
+            # if exist, overwrite path to image
+            self.img = self.img_path
+            self.img_width = image["width"]
+            self.img_height = image["height"]
+
+    def _get_subtext(self, table_=None):
+        """get subtext from subtext.yaml (or from its flat table table_)"""
+        table = subtext_table() if table_ is None else table_
+        self.subtext = find_subtext(table, "VerticalMeteogram", str(self.type).strip())
+
+
+@receiver(post_save, sender=VerticalMeteogram)
+def update_vmeteogram_version(sender, *args, **kwargs):
+    """flag cached meteogram panels as changed (e.g. subtext)"""
+    # no post_delete receiver: it would prevent fast cascade deletes of the
+    # meteograms, retention.purge bumps the version instead.
+    bump_layer_version("vmeteograms")
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_save, sender=VMType)
+def materialize_added(sender, instance, created, raw=False, **kwargs):
+    """create the meteograms of the runs retained, for a station or a type added
+
+    The web views only read meteograms, see util.get_meteogram
+    """
+    if not created or raw:
+        return
+    # util imports the models
+    from .util import materialize, materialize_all
+
+    if sender is Station:
+        materialize_all(VMDate.objects.all(), [instance])
+    else:
+        materialize(VMDate.objects.all(), types_=[instance])
+
+
+class LatestMeteogram(models.Model):
+    """latest meteograms with an image, of a station
+
+    Maintained when forecast runs are ingested, see latest.update_latest,
+    so the default meteogram is found with one lookup.
+    """
+
+    location = models.OneToOneField(
+        Station,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    # no database constraint, nor on_delete handling: meteograms are deleted
+    # by raw deletes (see retention.purge), pointers are set again afterwards
+    vmeteogram = models.ForeignKey(
+        VerticalMeteogram,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+    smeteogram = models.ForeignKey(
+        "surface_meteograms.SurfaceMeteogram",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name="+",
+    )
+
+    class Meta:
+        verbose_name = "Latest Meteogram"
+
+    def __str__(self):
+        return f"{self.location}"
@@ -0,0 +1,202 @@
+# Stdlib imports
+import os
+import shutil
+from pathlib import Path
+
+# Core Django imports
+from django.conf import settings
+from django.db import connection, transaction
+
+# Third-party app imports
+# Imports from my apps
+from src.surface_meteograms.models import SurfaceMeteogram
+from src.utils.layers import bump_layer_version
+
+from .latest import update_latest
+from .manifest import gfx_manifest, run_name
+from .models import VerticalMeteogram, VMDate
+
+# number of dates, and of meteograms, deleted per transaction
+_date_chunk = 10
+_row_chunk = 5000
+
+
+def _delete(cursor_, model_, column_, ids_, limit_=None):
+    """delete rows of model_ whose column_ is in ids_, at most limit_ of them
+
+    Raw set-based delete: Django's collector would load every row
+    (and every related row) into memory first.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model_._meta.db_table)
+    where = f"{qn(column_)} = ANY(%s)"
+    if limit_ is None:
+        cursor_.execute(f"DELETE FROM {table} WHERE {where}", [ids_])
+    else:
+        pk = qn(model_._meta.pk.column)
+        cursor_.execute(
+            f"DELETE FROM {table} WHERE {pk} IN "
+            f"(SELECT {pk} FROM {table} WHERE {where} LIMIT %s)",
+            [ids_, limit_],
+        )
+    return cursor_.rowcount
+
+
+def _dir_size(path_):
+    """return total size in bytes of the files in path_"""
+    size = 0
+    for root, _, files in os.walk(path_):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+def _drop_runs(runs_, archive_=None):
+    """remove run directories from gfx, or move them into archive_
+
+    Return number of directories and bytes reclaimed.
+    """
+    count = size = 0
+    for run in runs_:
+        path = gfx_manifest.root / run
+        if not path.is_dir():
+            continue
+        _size = _dir_size(path)
+        if archive_ is not None:
+            target = Path(archive_) / run
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists():
+                # archived before, replaced by the latest copy
+                shutil.rmtree(target)
+            shutil.move(str(path), str(target))
+        else:
+            shutil.rmtree(path)
+        count += 1
+        size += _size
+
+    if count:
+        # removed directories drop out of the manifest
+        gfx_manifest.refresh(full_=False)
+    return count, size
+
+
+def _variant_names(model_, ids_):
+    """return names of the derivatives of the meteograms of model_ of dates ids_"""
+    names = set()
+    queryset = model_.objects.filter(date_id__in=ids_).exclude(variants=[])
+    for variants in queryset.values_list("variants", flat=True).iterator():
+        names.update(variant["name"] for variant in variants)
+    return names
+
+
+def _drop_derivatives(names_, models_):
+    """remove derivative images no meteogram of models_ references anymore
+
+    Derivatives are named after the content of their source image, and shared
+    by identical images, so those still referenced are kept.
+
+    Return number of files and bytes reclaimed.
+    """
+    if not names_:
+        return 0, 0
+
+    qn = connection.ops.quote_name
+    used = set()
+    with connection.cursor() as cursor:
+        for model in models_:
+            table = qn(model._meta.db_table)
+            column = qn(model._meta.get_field("variants").column)
+            cursor.execute(
+                f"SELECT DISTINCT v ->> 'name' FROM {table}, "
+                f"jsonb_array_elements({table}.{column}) AS v "
+                "WHERE v ->> 'name' = ANY(%s)",
+                [sorted(names_)],
+            )
+            used.update(name for name, in cursor.fetchall())
+
+    count = size = 0
+    for name in names_ - used:
+        path = Path(settings.MEDIA_ROOT) / name
+        try:
+            _size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        count += 1
+        size += _size
+    return count, size
+
+
+def purge(dates_, files_=False, archive_=None, date_chunk_=None, row_chunk_=None):
+    """delete VMDate instances and their vertical and surface meteograms
+
+    Deleted by chunks of date_chunk_ dates, their meteograms by chunks
+    of row_chunk_ rows, each chunk in its own transaction, so locks
+    are held briefly.
+
+    Args:
+        dates_: VMDate queryset
+        files_: also remove the run directories of these dates from gfx
+        archive_: move the run directories into this directory, instead of
+            removing them (implies files_)
+        date_chunk_: number of dates deleted per transaction
+        row_chunk_: number of meteograms deleted per transaction
+
+    Derivatives of the meteograms deleted (see src.utils.derivatives) are
+    removed, unless other meteograms still reference them.
+
+    Return {"dates", "vertical", "surface", "derivatives", "runs", "bytes"},
+    number of rows deleted, of derivative images and run directories removed,
+    and of bytes reclaimed.
+    """
+    date_chunk_ = date_chunk_ or _date_chunk
+    row_chunk_ = row_chunk_ or _row_chunk
+    meteograms = {"vertical": VerticalMeteogram, "surface": SurfaceMeteogram}
+    result = {
+        "dates": 0,
+        "vertical": 0,
+        "surface": 0,
+        "derivatives": 0,
+        "runs": 0,
+        "bytes": 0,
+    }
+
+    dates = list(dates_.order_by("date").values_list("pk", "date"))
+    derivatives = set()
+    for i in range(0, len(dates), date_chunk_):
+        ids = [pk for pk, _ in dates[i : i + date_chunk_]]
+        for name, model in meteograms.items():
+            derivatives |= _variant_names(model, ids)
+            column = model._meta.get_field("date").column
+            while True:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    deleted = _delete(cursor, model, column, ids, row_chunk_)
+                result[name] += deleted
+                if deleted < row_chunk_:
+                    break
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # meteograms materialized meanwhile, then the dates
+            for name, model in meteograms.items():
+                column = model._meta.get_field("date").column
+                result[name] += _delete(cursor, model, column, ids)
+            result["dates"] += _delete(cursor, VMDate, VMDate._meta.pk.column, ids)
+
+    if any(result.values()):
+        # raw deletes do not send signals
+        bump_layer_version("vmeteograms", "smeteograms")
+        # pointers to meteograms deleted
+        update_latest("vmeteogram")
+        update_latest("smeteogram")
+
+    result["derivatives"], result["bytes"] = _drop_derivatives(
+        derivatives, meteograms.values()
+    )
+    if files_ or archive_ is not None:
+        runs = [run_name(date) for _, date in dates]
+        result["runs"], size = _drop_runs(runs, archive_)
+        result["bytes"] += size
+    return result
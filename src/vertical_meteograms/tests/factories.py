@@ -1,7 +1,11 @@
 # Stdlib imports
 import random
+import struct
+import zlib
+from pathlib import Path
 
 # Core Django imports
+from django.conf import settings
 from django.core.files.base import ContentFile
 
 # Third-party app imports
@@ -46,3 +50,19 @@ class VerticalMeteogramFactory(DjangoModelFactory):
             ImageField()._make_data({"width": 750, "height": 800}), "example.png"
         )
     )
+
+
+def fake_png(path_, width_=30, height_=20):
+    """write the header of a png image"""
+    ihdr = struct.pack(">IIBBBBB", width_, height_, 8, 2, 0, 0, 0)
+    content = (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", 13)
+        + b"IHDR"
+        + ihdr
+        + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    )
+    path_ = Path(settings.MEDIA_ROOT) / path_
+    path_.parent.mkdir(parents=True, exist_ok=True)
+    path_.write_bytes(content)
+    return path_
@@ -0,0 +1,108 @@
+# Stdlib imports
+import os
+from pathlib import Path
+
+import pytest
+
+# Core Django imports
+from django.conf import settings
+
+# Third-party app imports
+# Imports from my apps
+from src.vertical_meteograms.manifest import (
+    gfx_manifest,
+    parse_image_name,
+    refresh_manifest,
+)
+from src.vertical_meteograms.models import VerticalMeteogram
+from src.vertical_meteograms.tests.factories import (
+    VMDateFactory,
+    VMTypeFactory,
+    fake_png,
+)
+
+
+def test_parse_image_name():
+    """
+    GIVEN meteogram image names
+    WHEN  parsing them
+    THEN  return kind, station, date, type and points
+    """
+    assert parse_image_name("VPMET_Ny_Alesund_2022052300_op1.png") == {
+        "kind": "VPMET",
+        "station": "Ny_Alesund",
+        "date": "2022052300",
+        "type": "op1",
+        "points": None,
+    }
+    assert parse_image_name("PMET_Bergen_2022052300_op2_LAND.png")["points"] == "LAND"
+    assert parse_image_name("README.txt") is None
+
+
+def test_refresh_manifest():
+    """
+    GIVEN images in MEDIA_ROOT/gfx
+    WHEN  refreshing the manifest
+    THEN  list new, changed and removed images, with their size and dimensions
+    """
+    fake_png("gfx/2022052300/VPMET_Bergen_2022052300_op1.png")
+    fake_png("gfx/2022052306/PMET_Bergen_2022052306_op1_SEA.png", 40, 50)
+    fake_png("gfx/2022052306/other.png")
+    Path(settings.MEDIA_ROOT, "gfx", "home").mkdir()
+
+    assert refresh_manifest() == {"added": 2, "updated": 0, "removed": 0}
+    assert gfx_manifest.dates() == ["2022052300", "2022052306"]
+
+    entry = gfx_manifest.get("gfx/2022052306/PMET_Bergen_2022052306_op1_SEA.png")
+    assert entry["station"] == "Bergen"
+    assert (entry["width"], entry["height"]) == (40, 50)
+    assert not gfx_manifest.exists("gfx/2022052306/other.png")
+
+    # nothing changed
+    assert refresh_manifest() == {"added": 0, "updated": 0, "removed": 0}
+
+    path = fake_png("gfx/2022052300/VPMET_Bergen_2022052300_op1.png", 60, 70)
+    os.utime(path, ns=(0, 0))
+    os.remove(fake_png("gfx/2022052306/PMET_Bergen_2022052306_op1_SEA.png"))
+    assert refresh_manifest() == {"added": 0, "updated": 1, "removed": 1}
+    assert gfx_manifest.images("2022052300")[
+        "gfx/2022052300/VPMET_Bergen_2022052300_op1.png"
+    ]["width"] == 60
+
+
+def test_manifest_reload():
+    """
+    GIVEN a manifest kept in memory
+    WHEN  the manifest is refreshed by another process
+    THEN  reload it on the next lookup
+    """
+    path = "gfx/2022052300/VPMET_Bergen_2022052300_op1.png"
+    fake_png(path)
+    # no manifest yet: empty, not built by a lookup
+    assert not gfx_manifest.exists(path)
+    assert not gfx_manifest.path.exists()
+
+    # the other process shares the cache and the json file, not the memory
+    refresh_manifest()
+    gfx_manifest._runs = {}
+    gfx_manifest.bump()
+    assert gfx_manifest.exists(path)
+
+
+@pytest.mark.django_db
+def test_save_uses_manifest(station):
+    """
+    GIVEN an image listed in the manifest
+    WHEN  saving the matching vertical meteogram
+    THEN  use the image, and its dimensions
+    """
+    date = VMDateFactory(date="2022-05-23T00:00:00+00:00")
+    date.refresh_from_db()
+    _type = VMTypeFactory(name="op1")
+    path = f"gfx/2022052300/VPMET_{station}_2022052300_op1.png"
+    fake_png(path, 30, 20)
+    refresh_manifest()
+
+    obj = VerticalMeteogram.objects.create(type=_type, location=station, date=date)
+    assert obj.img == path
+    assert (obj.img_width, obj.img_height) == (30, 20)
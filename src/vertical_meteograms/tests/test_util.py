@@ -0,0 +1,287 @@
+# Stdlib imports
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# Core Django imports
+from django.core.management import CommandError, call_command
+
+# Third-party app imports
+# Imports from my apps
+from src.stations.tests.factories import StationFactory
+from src.surface_meteograms import util as sutil
+from src.surface_meteograms.models import SurfaceMeteogram
+from src.surface_meteograms.tests.factories import SMPointsFactory, SMTypeFactory
+from src.vertical_meteograms import retention, util
+from src.vertical_meteograms.latest import latest_slug
+from src.vertical_meteograms.manifest import gfx_manifest, refresh_manifest
+from src.vertical_meteograms.models import (
+    LatestMeteogram,
+    VerticalMeteogram,
+    VMDate,
+    VMType,
+)
+from src.vertical_meteograms.tests.factories import VMTypeFactory, fake_png
+
+pytestmark = pytest.mark.django_db
+
+
+def test_register_and_purge_dates():
+    """
+    GIVEN run directories names
+    WHEN  registering, then purging dates
+    THEN  create missing VMDate only, delete VMDate of runs not listed anymore
+    """
+    runs = ["2022052300", "2022052306"]
+    assert len(util.register_dates(runs)) == 2
+    assert util.register_dates(runs) == []
+
+    assert util.purge_dates(runs[1:]) == 1
+    assert [obj.date for obj in VMDate.objects.all()] == [util.run_date(runs[1])]
+
+
+def test_clean(station, settings, tmp_path):
+    """
+    GIVEN dates materialized, with their run directories and derivatives
+    WHEN  cleaning dates older than some days, by small chunks
+    THEN  delete old dates and their meteograms, archive their run directories,
+      remove the derivatives not shared, and report rows and bytes reclaimed
+    """
+    VMTypeFactory(name="op1")
+    SMTypeFactory(name="op1")
+    SMPointsFactory(name="HERE")
+    runs = ["2022052300", "2022052306", "2022052912"]
+    dates = util.register_dates(runs)
+    util.materialize_all(dates)
+    for run in runs:
+        fake_png(f"gfx/{run}/VPMET_{station}_{run}_op1.png")
+    refresh_manifest()
+    gfx = Path(settings.MEDIA_ROOT) / "gfx"
+    size = next((gfx / runs[0]).iterdir()).stat().st_size
+    # derivatives of the first run, the second one shared with the last run
+    names = ["derivatives/aa/aa_480.webp", "derivatives/bb/bb_480.webp"]
+    for name in names:
+        path = Path(settings.MEDIA_ROOT) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"RIFF")
+    for run, _names in [(runs[0], names), (runs[2], names[1:])]:
+        VerticalMeteogram.objects.filter(date__date=util.run_date(run)).update(
+            variants=[{"name": name} for name in _names]
+        )
+
+    archive = tmp_path / "archive"
+    result = retention.purge(
+        VMDate.objects.filter(date__lt=util.run_date(runs[2])),
+        archive_=archive,
+        date_chunk_=1,
+        row_chunk_=1,
+    )
+
+    assert result == {
+        "dates": 2,
+        "vertical": 2,
+        "surface": 2,
+        "derivatives": 1,
+        "runs": 2,
+        "bytes": 2 * size + 4,
+    }
+    assert not Path(settings.MEDIA_ROOT, names[0]).exists()
+    assert Path(settings.MEDIA_ROOT, names[1]).exists()
+    assert [obj.date for obj in VMDate.objects.all()] == [util.run_date(runs[2])]
+    assert VerticalMeteogram.objects.count() == 1
+    assert SurfaceMeteogram.objects.count() == 1
+    assert (archive / runs[0]).is_dir()
+    assert gfx_manifest.dates() == runs[2:]
+
+    result = util.clean("2022-06-10", step_=6, files_=True)
+    assert result["dates"] == 1
+    assert not (gfx / runs[2]).exists()
+
+
+def test_materialize(station, count_queries):
+    """
+    GIVEN stations, meteogram types and a date
+    WHEN  materializing meteograms of the date
+    THEN  create one meteogram per station and type, with unique slugs,
+      and images found in the manifest, with the same number of queries
+      whatever the number of stations
+    """
+    VMTypeFactory(name="op1")
+    VMTypeFactory(name="op2")
+    date = util.register_dates(["2022052300"])[0]
+    path = f"gfx/2022052300/VPMET_{station}_2022052300_op1.png"
+    fake_png(path)
+    refresh_manifest()
+
+    few = count_queries(util.materialize, [date])
+    assert VerticalMeteogram.objects.count() == 2
+    assert VerticalMeteogram.objects.get(img=path).img_width == 30
+
+    # long names, truncated to the same slug
+    for i in range(20):
+        StationFactory(name=f"{'x' * 60} {i}")
+    # materialized once saved, see models.materialize_added
+    VerticalMeteogram.objects.exclude(location=station).delete()
+    many = count_queries(util.materialize, [date])
+    assert few == many
+
+    slugs = VerticalMeteogram.objects.values_list("slug", flat=True)
+    assert VerticalMeteogram.objects.count() == 42
+    assert len(set(slugs)) == 42
+
+    # image landed meanwhile
+    fake_png(f"gfx/2022052300/VPMET_{station}_2022052300_op2.png")
+    refresh_manifest()
+    assert util.materialize([date]) == (0, 1)
+
+
+def test_materialize_surface(station):
+    """
+    GIVEN stations, surface meteogram types and points, and a date
+    WHEN  materializing surface meteograms of the date
+    THEN  create one meteogram per station, type and points
+    """
+    SMTypeFactory(name="op1")
+    SMPointsFactory(name="HERE")
+    SMPointsFactory(name="SEA")
+    date = util.register_dates(["2022052300"])[0]
+    path = f"gfx/2022052300/PMET_{station}_2022052300_op1_SEA.png"
+    fake_png(path)
+    refresh_manifest()
+
+    assert sutil.materialize([date]) == (2, 0)
+    assert sutil.materialize([date]) == (0, 0)
+    assert SurfaceMeteogram.objects.get(img=path).points.name == "SEA"
+
+
+def test_update_latest(station):
+    """
+    GIVEN runs ingested, with images of the station
+    WHEN  ingesting, then purging runs
+    THEN  point the station to its latest meteogram with an image
+    """
+    VMTypeFactory(name="op1")
+    runs = ["2022052300", "2022052306", "2022052312"]
+    for run in runs[:2]:
+        fake_png(f"gfx/{run}/VPMET_{station}_{run}_op1.png")
+    refresh_manifest()
+    util.materialize(util.register_dates(runs))
+
+    assert latest_slug("vmeteogram") == VerticalMeteogram.objects.get(
+        date__date=util.run_date(runs[1])
+    ).slug
+
+    util.purge_dates(runs[:1] + runs[2:])
+    assert latest_slug("vmeteogram") == VerticalMeteogram.objects.get(
+        date__date=util.run_date(runs[0])
+    ).slug
+    assert LatestMeteogram.objects.get().location == station
+
+
+def test_get_meteogram(station, count_queries):
+    """
+    GIVEN a date materialized, then a station and a type added since
+    WHEN  getting meteograms
+    THEN  read the meteograms, materialized once the station and the type
+      were saved, None if not materialized
+    """
+    _type = VMTypeFactory(name="op1")
+    date = util.register_dates(["2022052300"])[0]
+    util.materialize([date])
+    other = StationFactory()
+    other_type = VMTypeFactory(name="op2")
+
+    assert count_queries(util.get_meteogram, _type, station, date) == 1
+    assert util.get_meteogram(_type, other, date).location == other
+    assert util.get_meteogram(other_type, station, date).type == other_type
+    assert VerticalMeteogram.objects.count() == 4
+
+    # not saved, not materialized
+    VMType.objects.bulk_create([VMType(name="op3")])
+    missing = VMType.objects.get(name="op3")
+    assert count_queries(util.get_meteogram, missing, station, date) == 1
+    assert util.get_meteogram(missing, station, date) is None
+
+
+def test_get_panels(station, count_queries):
+    """
+    GIVEN a date materialized, then a type added since
+    WHEN  getting the panels of a station
+    THEN  read the panels materialized, with one query, create none
+    """
+    VMTypeFactory(name="op1")
+    date = util.register_dates(["2022052300"])[0]
+    util.materialize([date])
+    # not saved, not materialized
+    VMType.objects.bulk_create([VMType(name="op2")])
+
+    objs = util.get_panels(station.pk, date.pk)
+    assert [obj.type.name for obj in objs] == ["op1"]
+    assert count_queries(util.get_panels, station.pk, date.pk) == 1
+    assert VerticalMeteogram.objects.count() == 1
+    assert util.get_panels(station.pk, date.pk + 1) == []
+
+
+def test_insert_or_get(station):
+    """
+    GIVEN a meteogram not created yet
+    WHEN  upserting it twice
+    THEN  insert it once, then return the existing one
+    """
+    _type = VMTypeFactory(name="op1")
+    date = util.register_dates(["2022052300"])[0]
+    fields = ["type", "location", "date"]
+
+    def _upsert():
+        obj = VerticalMeteogram(slug="a-slug", type=_type, location=station, date=date)
+        return VerticalMeteogram.objects.insert_or_get(obj, fields)
+
+    obj, created = _upsert()
+    assert created
+    other, created = _upsert()
+    assert not created
+    assert other.pk == obj.pk
+    assert VerticalMeteogram.objects.count() == 1
+
+
+def test_materialize_plots_command(station):
+    """
+    GIVEN registered runs
+    WHEN  running the materialize_plots command
+    THEN  create vertical and surface meteograms of the runs given, or of all runs
+    """
+    VMTypeFactory(name="op1")
+    SMTypeFactory(name="op1")
+    SMPointsFactory(name="HERE")
+    util.register_dates(["2022052300", "2022052306"])
+
+    call_command("materialize_plots", "2022052306")
+    assert VerticalMeteogram.objects.count() == 1
+    assert SurfaceMeteogram.objects.count() == 1
+
+    call_command("materialize_plots")
+    assert VerticalMeteogram.objects.count() == 2
+    assert SurfaceMeteogram.objects.count() == 2
+
+    with pytest.raises(CommandError):
+        call_command("materialize_plots", "2021010100")
+
+
+def test_update_plot_command(station):
+    """
+    GIVEN images of two runs, already materialized
+    WHEN  an image lands in one run, and updating plots again
+    THEN  only materialize the run changed
+    """
+    VMTypeFactory(name="op1")
+    runs = ["2022052300", "2022052306"]
+    for run in runs:
+        fake_png(f"gfx/{run}/VPMET_{station}_{run}_op1.png")
+    call_command("update_plot", stdout=StringIO())
+    assert VerticalMeteogram.objects.count() == 2
+
+    VerticalMeteogram.objects.all().delete()
+    fake_png(f"gfx/{runs[1]}/VPMET_{station}_{runs[1]}_op2.png")
+    call_command("update_plot", "--quick", stdout=StringIO())
+    assert VerticalMeteogram.objects.get().date.date == util.run_date(runs[1])
@@ -0,0 +1,160 @@
+# Stdlib imports
+import pytest
+
+# Core Django imports
+from django.urls import reverse
+
+# Third-party app imports
+# Imports from my apps
+from src.stations.models import Station
+from src.stations.tests.factories import StationFactory
+from src.vertical_meteograms import util
+from src.vertical_meteograms.manifest import refresh_manifest
+from src.vertical_meteograms.models import VerticalMeteogram, VMDate
+from src.vertical_meteograms.tests.factories import VMTypeFactory, fake_png
+
+pytestmark = pytest.mark.django_db
+
+
+class TestShowPlot:
+    """
+    Test class for all tests related to the show_plot views
+    """
+
+    @pytest.fixture
+    def date(self):
+        return util.register_dates(["2022052300"])[0]
+
+    def test_vertical(self, client, station: Station, date):
+        """
+        GIVEN a vertical meteogram materialized
+        WHEN  requesting its panels
+        THEN  return both panels, then 304 while nothing changed
+        """
+        VMTypeFactory(name="op1")
+        VMTypeFactory(name="op2")
+        util.materialize([date])
+        url = reverse("vmeteograms:show_plot")
+        params = {"location": station.pk, "date": date.pk}
+
+        response = client.get(url, params)
+        assert response.status_code == 200
+        data = response.json()
+        obj = VerticalMeteogram.objects.get(type__name="op2")
+        assert data["img2"]["chg_subtext"] == reverse(
+            "vmeteograms:update", kwargs={"slug": obj.slug}
+        )
+        assert client.session["location_id"] == station.pk
+
+        etag = response["ETag"]
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+        # subtext changed
+        obj.subtext = "new subtext"
+        obj.save()
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()["img2"]["subtext"] == "new subtext"
+
+    def test_vertical_invalid(self, client, station: Station, date):
+        """
+        GIVEN a vertical meteogram
+        WHEN  requesting its panels with POST, invalid or unknown parameters
+        THEN  return 405, 400 and 404
+        """
+        url = reverse("vmeteograms:show_plot")
+        params = {"location": station.pk, "date": date.pk}
+
+        assert client.post(url, params).status_code == 405
+        assert client.get(url, {"location": "a"}).status_code == 400
+        assert client.get(url, {**params, "date": date.pk + 1}).status_code == 404
+
+
+class TestRedirectView:
+    """
+    Test class for all tests related to the redirect view
+    """
+
+    def test_latest(self, client, station: Station):
+        """
+        GIVEN meteograms without image
+        WHEN  redirecting without session
+        THEN  redirect to the latest meteogram, then to the latest one with an image
+        """
+        VMTypeFactory(name="op1")
+        runs = ["2022052300", "2022052306"]
+        util.materialize(util.register_dates(runs))
+        url = reverse("vmeteograms:redirect")
+        obj = VerticalMeteogram.objects.get(date__date=util.run_date(runs[1]))
+        assert client.get(url).url == reverse(
+            "vmeteograms:detail", kwargs={"slug": obj.slug}
+        )
+
+        fake_png(f"gfx/{runs[0]}/VPMET_{station}_{runs[0]}_op1.png")
+        refresh_manifest()
+        util.materialize(VMDate.objects.all())
+        obj = VerticalMeteogram.objects.get(date__date=util.run_date(runs[0]))
+        assert client.get(url).url == reverse(
+            "vmeteograms:detail", kwargs={"slug": obj.slug}
+        )
+
+    def test_latest_backfill(self, client, station: Station):
+        """
+        GIVEN meteograms without image, of an older run registered last
+        WHEN  redirecting without session
+        THEN  redirect to the meteogram of the latest run
+        """
+        VMTypeFactory(name="op1")
+        runs = ["2022052306", "2022052300"]
+        for run in runs:
+            util.materialize(util.register_dates([run]))
+        url = reverse("vmeteograms:redirect")
+        obj = VerticalMeteogram.objects.get(date__date=util.run_date(runs[0]))
+        assert client.get(url).url == reverse(
+            "vmeteograms:detail", kwargs={"slug": obj.slug}
+        )
+
+
+class TestListView:
+    """
+    Test class for all tests related to the list view
+    """
+
+    def test_keyset_pagination(self, client, user, station: Station, count_queries):
+        """
+        GIVEN vertical meteograms of many stations
+        WHEN  browsing the list, page after page
+        THEN  read each page with the same number of queries,
+          whatever the number of rows, until the last page
+        """
+        VMTypeFactory(name="op1")
+        VMTypeFactory(name="op2")
+        date = util.register_dates(["2022052300"])[0]
+        util.materialize([date])
+        client.force_login(user)
+        url = reverse("vmeteograms:list")
+        few = count_queries(client.get, url)
+
+        StationFactory.create_batch(11)
+        util.materialize([date])
+        assert count_queries(client.get, url) == few
+
+        response = client.get(url)
+        page = response.context["page_obj"]
+        assert len(page) == 10
+        assert page.count == 24
+        assert not page.has_previous()
+
+        seen = list(page)
+        while page.has_next():
+            response = client.get(url, {"after": page.next_cursor})
+            page = response.context["page_obj"]
+            seen += list(page)
+        assert len(page) == 4
+        # the ordering of the model, stations by name
+        assert seen == list(VerticalMeteogram.objects.all())
+
+        response = client.get(url, {"before": ""})
+        assert list(response.context["page_obj"]) == list(page)
+        assert client.get(url, {"after": "invalid"}).status_code == 404
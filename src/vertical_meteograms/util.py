@@ -1,15 +1,27 @@
 # Stdlib imports
 from datetime import datetime, timedelta
+from itertools import product
 
 # Third-party app imports
 from dateutil.parser import ParserError
 from dateutil.parser import parse as parse_date
 
 # Core Django imports
+from django.db import transaction
 from django.utils.timezone import make_aware
 
 # Imports from my apps
-from .models import VMDate
+from src.stations.models import Station
+from src.surface_meteograms import util as smeteograms
+from src.surface_meteograms.models import SurfaceMeteogram
+from src.utils.derivatives import build_derivatives
+from src.utils.layers import bump_layer_version
+from src.utils.util import subtext_table, unique_slugs
+
+from .latest import update_latest
+from .manifest import gfx_manifest
+from .models import VerticalMeteogram, VMDate, VMType
+from .retention import purge
 
 
 def _get_date(date_=None):
@@ -40,12 +52,201 @@ def upload(date_=None):
         inst.save()
 
 
-def clean(date_=None, step_=6):
-    """clean, remove VMDate instance older than date_ - step_ days"""
+def clean(date_=None, step_=6, files_=False, archive_=None):
+    """clean, remove VMDate instance older than date_ - step_ days
+
+    Deleted by chunks, with their meteograms, see retention.purge.
+    Return number of rows deleted, and of bytes reclaimed.
+    """
 
     # get reference day
     dt = _get_date(date_)
     # compute date X days before reference day
     enddate = dt - timedelta(days=step_)
     # delete of instance with date lower than enddate
-    VMDate.objects.filter(date__lt=enddate).delete()
+    return purge(
+        VMDate.objects.filter(date__lt=enddate), files_=files_, archive_=archive_
+    )
+
+
+def run_date(run_):
+    """return aware datetime of the run directory name YYYYMMDDHH"""
+    dt = parse_date(run_[:8] + "T" + run_[8:])
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    return make_aware(dt)
+
+
+def register_dates(runs_):
+    """create VMDate instances of the runs (YYYYMMDDHH) missing, in bulk
+
+    Return list of VMDate instances created.
+    """
+    dates = {run_date(run) for run in runs_}
+    existing = set(VMDate.objects.filter(date__in=dates).values_list("date", flat=True))
+    missing = sorted(dates - existing)
+    # ignore dates created meanwhile by another process
+    VMDate.objects.bulk_create(
+        [VMDate(date=date) for date in missing], ignore_conflicts=True
+    )
+    return list(VMDate.objects.filter(date__in=missing))
+
+
+def purge_dates(runs_):
+    """delete VMDate instances of runs not in runs_, by chunks (see retention.purge)
+
+    Return number of VMDate instances deleted.
+    """
+    dates = [run_date(run) for run in runs_]
+    return purge(VMDate.objects.exclude(date__in=dates))["dates"]
+
+
+def materialize(dates_, stations_=None, types_=None):
+    """create the missing vertical meteograms of these VMDate, in bulk
+
+    One instance per station and VMType, or only of stations_ and types_
+    (e.g. added since). Slugs, images (from the manifest) and subtexts are
+    computed here, as bulk_create does not call save.
+    Instances still without image get it, if it landed meanwhile.
+
+    Return number of instances created and updated.
+    """
+    dates = list(dates_)
+    queryset = VerticalMeteogram.objects.filter(date__in=dates)
+    if stations_ is None:
+        stations = list(Station.objects.all())
+    else:
+        stations = list(stations_)
+        queryset = queryset.filter(location__in=stations)
+    if types_ is None:
+        types = list(VMType.objects.all())
+    else:
+        types = list(types_)
+        queryset = queryset.filter(type__in=types)
+    default = VerticalMeteogram._meta.get_field("img").default
+
+    existing = {
+        (obj.location_id, obj.type_id, obj.date_id): obj
+        for obj in queryset.only("id", "location", "type", "date", "img")
+    }
+
+    subtexts = subtext_table()
+    new, found = [], []
+    for date, location, _type in product(dates, stations, types):
+        obj = existing.get((location.pk, _type.pk, date.pk))
+        if obj is None:
+            obj = VerticalMeteogram(location=location, type=_type, date=date)
+            obj._get_img()
+            obj._get_subtext(subtexts)
+            new.append(obj)
+        elif obj.img == default:
+            obj.location, obj.type, obj.date = location, _type, date
+            obj._get_img()
+            if obj.img != default:
+                found.append(obj)
+
+    slugs = unique_slugs(
+        VerticalMeteogram,
+        {i: f"{obj.location} {obj.type} {obj.date}" for i, obj in enumerate(new)},
+    )
+    for i, obj in enumerate(new):
+        obj.slug = slugs[i]
+    VerticalMeteogram.objects.bulk_create(new, batch_size=1000)
+    VerticalMeteogram.objects.bulk_update(
+        found, ["img", "img_path", "img_width", "img_height"], batch_size=1000
+    )
+    if new or found:
+        # bulk operations do not send signals
+        bump_layer_version("vmeteograms")
+        # default meteogram of the redirect view
+        update_latest("vmeteogram", dates)
+    return len(new), len(found)
+
+
+def materialize_all(dates_, stations_=None):
+    """create the missing vertical and surface meteograms of these VMDate, in bulk
+
+    Of every station, or only of stations_.
+    Return {"vertical": (created, updated), "surface": (created, updated)}
+    """
+    dates = list(dates_)
+    with transaction.atomic():
+        return {
+            "vertical": materialize(dates, stations_),
+            "surface": smeteograms.materialize(dates, stations_),
+        }
+
+
+def make_derivatives(dates_, workers_=None):
+    """render thumbnails and WebP versions of the meteogram images of these VMDate
+
+    Only images without derivatives, or changed since (content hash from the
+    manifest), are rendered, in a process pool (see src.utils.derivatives).
+
+    Return {"vertical": number updated, "surface": number updated}
+    """
+    dates = list(dates_)
+    models = {
+        "vertical": (VerticalMeteogram, "vmeteograms"),
+        "surface": (SurfaceMeteogram, "smeteograms"),
+    }
+    rows = {}
+    images = {}
+    for name, (model, _) in models.items():
+        default = model._meta.get_field("img").default
+        rows[name] = []
+        queryset = (
+            model.objects.filter(date__in=dates)
+            .exclude(img=default)
+            .only("id", "img", "variants")
+        )
+        for obj in queryset:
+            entry = gfx_manifest.get(obj.img.name)
+            if entry is None:
+                # not from gfx directory (e.g. uploaded)
+                continue
+            _hash = entry["hash"]
+            if obj.variants and _hash[:32] in obj.variants[0]["name"]:
+                # up to date
+                continue
+            rows[name].append(obj)
+            images[obj.img.name] = _hash
+
+    variants = build_derivatives(images, workers_)
+
+    result = {}
+    for name, (model, layer) in models.items():
+        objs = rows[name]
+        for obj in objs:
+            obj.variants = variants[obj.img.name]
+        if objs:
+            model.objects.bulk_update(objs, ["variants"], batch_size=1000)
+            # bulk operations do not send signals
+            bump_layer_version(layer)
+        result[name] = len(objs)
+    return result
+
+
+def get_meteogram(type_, location_, date_):
+    """return the vertical meteogram, None if not materialized
+
+    Read only: meteograms are materialized with their date (see update_plot),
+    and for the stations and types added since, once saved (see models).
+    """
+    try:
+        return VerticalMeteogram.objects.get(
+            type=type_, location=location_, date=date_
+        )
+    except VerticalMeteogram.DoesNotExist:
+        return None
+
+
+def get_panels(location_id_, date_id_):
+    """return the vertical meteograms of a location and a date, one per VMType
+
+    Read only, with one query: meteograms not materialized yet are missing.
+    """
+    return list(
+        VerticalMeteogram.objects.filter(
+            location_id=location_id_, date_id=date_id_
+        ).select_related("type")
+    )
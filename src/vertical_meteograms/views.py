@@ -1,15 +1,18 @@
 # Stdlib imports
-import random
+import json
 
 # Core Django imports
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models import Q
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
 from django.views.generic import (
     CreateView,
     DetailView,
@@ -21,13 +24,19 @@ from django.views.generic import (
 # Third-party app imports
 # Imports from my apps
 from src.stations.models import Station
+from src.utils.derivatives import srcset, thumbnail
+from src.utils.layers import layer_response
+from src.utils.pagination import KeysetPaginationMixin
+from src.utils.util import update_session
 
 from .forms import (
     VerticalMeteogramCreate,
     VerticalMeteogramForm,
     VerticalMeteogramUpdateSubtextForm,
 )
+from .latest import latest_slug
 from .models import VerticalMeteogram, VMDate, VMType
+from .util import get_meteogram, get_panels
 
 
 class VerticalMeteogramDetailView(LoginRequiredMixin, SuccessMessageMixin, DetailView):
@@ -61,22 +70,24 @@ class VerticalMeteogramRedirectView(RedirectView):
             data = {"type": _type, "location": _location, "date": _date}
             form = VerticalMeteogramForm(data)
             if form.is_valid():
-                obj, created = VerticalMeteogram.objects.get_or_create(
-                    type=_type,
-                    location=_location,
-                    date=_date,
-                )
-                self.pattern_name = "vmeteograms:detail"
-                kwargs["slug"] = obj.slug
+                # None if not materialized yet
+                obj = get_meteogram(_type, _location, _date)
+                if obj is not None:
+                    self.pattern_name = "vmeteograms:detail"
+                    kwargs["slug"] = obj.slug
 
         if not obj:
-            objects = VerticalMeteogram.objects.all()
-            if len(objects) == 0:
+            # latest meteogram with an image, or latest one
+            slug = latest_slug("vmeteogram") or (
+                VerticalMeteogram.objects.order_by("-date__date")
+                .values_list("slug", flat=True)
+                .first()
+            )
+            if slug is None:
                 self.pattern_name = "vmeteograms:create"
             else:
-                obj = random.choice(objects)
                 self.pattern_name = "vmeteograms:detail"
-                kwargs["slug"] = obj.slug
+                kwargs["slug"] = slug
 
         return super().get_redirect_url(*args, **kwargs)
 
@@ -158,11 +169,21 @@ class VerticalMeteogramCreateView(LoginRequiredMixin, SuccessMessageMixin, Creat
 vmeteogram_create_view = VerticalMeteogramCreateView.as_view()
 
 
-class VerticalMeteogramListView(LoginRequiredMixin, SuccessMessageMixin, ListView):
+class VerticalMeteogramListView(
+    LoginRequiredMixin, SuccessMessageMixin, KeysetPaginationMixin, ListView
+):
     model = VerticalMeteogram
     template_name = "vmeteograms/vmeteogram_list.html"
     context_object_name = "vmeteograms"
     paginate_by = 10
+    # the ordering of the model, by date, station name and type name,
+    # sought from the index on VMDate.date then the unique constraint
+    keyset = ("date__date", "location__name", "type__name")
+    count_mode = "estimate"
+
+    def get_queryset(self):
+        # names of date, type and location are displayed
+        return super().get_queryset().select_related("date", "location", "type")
 
 
 vmeteogram_list_view = VerticalMeteogramListView.as_view()
@@ -192,11 +213,9 @@ def change_plot(request):
     form = VerticalMeteogramForm(data)
     if form.is_valid():
         data = {}
-        vmeteogram, created = VerticalMeteogram.objects.get_or_create(
-            type=_type,
-            location=_location,
-            date=_date,
-        )
+        vmeteogram = get_meteogram(_type, _location, _date)
+        if vmeteogram is None:
+            raise Http404("No such vertical meteogram.")
         # print(f"form valid {form}")
         data = {
             "is_valid": True,
@@ -210,68 +229,53 @@ def change_plot(request):
         return render(request, "vmeteograms/vmeteogram_detail.html", {"form": form})
 
 
-def show_plot(request):
-    """ """
-    try:
-        _type = VMType.objects.get(Q(name="op1"))
-        _type_rev = VMType.objects.get(~Q(name="op1"))
-    except VMType.DoesNotExist:
-        _type = None
+def _panel(vmeteogram_):
+    """json description of a meteogram panel"""
+    return {
+        "url": vmeteogram_.img.url,
+        "nam": vmeteogram_.img.name,
+        "path": vmeteogram_.img_path,
+        "subtext": vmeteogram_.subtext,
+        # smaller versions, if rendered (see make_derivatives)
+        "srcset": srcset(vmeteogram_.variants),
+        "thumbnail": thumbnail(vmeteogram_.variants) or vmeteogram_.img.url,
+        "chg_subtext": reverse("vmeteograms:update", kwargs={"slug": vmeteogram_.slug}),
+    }
 
-    _location = None
-    try:
-        location_id = request.GET.get("location", None)
-        if location_id:
-            _location = Station.objects.get(pk=location_id)
-    except Station.DoesNotExist:
-        pass
 
-    _date = None
-    try:
-        date_id = request.GET.get("date", None)
-        if date_id:
-            _date = VMDate.objects.get(pk=date_id)
-    except VMDate.DoesNotExist:
-        pass
+@require_GET
+@transaction.non_atomic_requests
+def show_plot(request):
+    """return both panels of the vertical meteogram of a location and a date
 
-    data = {"type": _type, "location": _location, "date": _date}
-    form = VerticalMeteogramForm(data)
-    if form.is_valid():
-        data = {}
-        # save location, and date
-        request.session["location_id"] = _location.pk
-        request.session["date_id"] = _date.pk
-
-        vmeteogram, created = VerticalMeteogram.objects.update_or_create(
-            type=_type,
-            location=_location,
-            date=_date,
-        )
-        data["img1"] = {
-            "url": vmeteogram.img.url,
-            "nam": vmeteogram.img.name,
-            "path": vmeteogram.img_path,
-            "subtext": vmeteogram.subtext,
-            "chg_subtext": reverse_lazy(
-                "vmeteograms:update", kwargs={"slug": vmeteogram.slug}
-            ),
-            # "ttl": f"{vmeteogram.location} {vmeteogram.date.date.strftime('%Y-%m-%d %H:%M')}",
-        }
-        vmeteogram, created = VerticalMeteogram.objects.update_or_create(
-            type=_type_rev,
-            location=_location,
-            date=_date,
-        )
-        data["img2"] = {
-            "url": vmeteogram.img.url,
-            "nam": vmeteogram.img.name,
-            "path": vmeteogram.img_path,
-            "subtext": vmeteogram.subtext,
-            "chg_subtext": reverse_lazy(
-                "vmeteograms:update", kwargs={"slug": vmeteogram.slug}
-            ),
-            # "ttl": f"{vmeteogram.location} {vmeteogram.date.date.strftime('%Y-%m-%d %H:%M')}",
-        }
-        return JsonResponse(data)
-    else:
-        return render(request, "vmeteograms/vmeteogram_detail.html", {"form": form})
+    Note:
+        - read only, panels are cached per location and date,
+          until a vertical meteogram changes.
+    """
+    try:
+        location_id = int(request.GET["location"])
+        date_id = int(request.GET["date"])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Invalid location or date.")
+
+    def _build():
+        # panels not materialized yet are missing
+        objs = get_panels(location_id, date_id)
+        # first panel: first type (op1), second panel: the other one
+        objs = sorted(objs, key=lambda obj: obj.type.name)
+        if len(objs) < 2:
+            raise Http404("No such vertical meteogram.")
+        data = {"img1": _panel(objs[0]), "img2": _panel(objs[1])}
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+    response = layer_response(
+        request,
+        "vmeteograms",
+        _build,
+        location_id,
+        date_id,
+        content_type_="application/json",
+    )
+    # save location, and date
+    update_session(request, location_id=location_id, date_id=date_id)
+    return response
@@ -0,0 +1,120 @@
+# Stdlib imports
+import logging
+import time
+from pathlib import Path
+
+# Core Django imports
+# Third-party app imports
+try:
+    # optional, Linux only
+    from inotify_simple import INotify
+    from inotify_simple import flags as iflags
+except ImportError:
+    INotify = None
+
+# Imports from my apps
+from .manifest import is_run
+
+logger = logging.getLogger(__name__)
+
+
+class GfxWatcher:
+    """wait for new or removed images under MEDIA_ROOT/gfx
+
+    Uses inotify if available (package inotify_simple), otherwise polls.
+    Iterating over the watcher yields, after each burst of changes, the set
+    of run directories (YYYYMMDDHH) changed, or None if they are unknown
+    (events lost), in which case every run directory should be rescanned.
+
+    With inotify, an empty set is also yielded every 'interval' seconds without
+    event, as a safety net. When polling, an empty set is yielded every 'interval'
+    seconds, changes are then found by the mtime of the run directories.
+
+    Note:
+        - inotify only sees changes made on this host, e.g. by rsync,
+          use polling (inotify_=False) if the images are written on a NFS server.
+    """
+
+    def __init__(self, root_, interval_=60, settle_=5, inotify_=True):
+        self.root = Path(root_)
+        self.interval = interval_
+        self.settle = settle_
+        self.use_inotify = inotify_ and INotify is not None
+        self._inotify = None
+        self._watches = {}
+
+    def __iter__(self):
+        while True:
+            if self.use_inotify and self._setup():
+                yield self._wait()
+            else:
+                time.sleep(self.interval)
+                yield set()
+
+    def _setup(self):
+        """watch gfx and its run directories, return False if gfx does not exist"""
+        if self._inotify is not None:
+            return True
+        if not self.root.is_dir():
+            return False
+
+        self._inotify = INotify()
+        mask = iflags.CREATE | iflags.DELETE | iflags.MOVED_TO | iflags.MOVED_FROM
+        self._watches = {
+            self._inotify.add_watch(self.root, mask | iflags.DELETE_SELF): None
+        }
+        for path in self.root.iterdir():
+            if is_run(path.name) and path.is_dir():
+                self._add_run(path.name)
+        return True
+
+    def _add_run(self, run_):
+        mask = (
+            iflags.CLOSE_WRITE | iflags.MOVED_TO | iflags.DELETE | iflags.MOVED_FROM
+        )
+        try:
+            wd = self._inotify.add_watch(self.root / run_, mask)
+        except OSError:
+            # removed meanwhile
+            return
+        self._watches[wd] = run_
+
+    def _reset(self):
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._watches = {}
+
+    def _wait(self):
+        """block until a burst of changes is over, return runs changed"""
+        changed = set()
+        timeout = self.interval * 1000
+        while True:
+            events = self._inotify.read(timeout=timeout)
+            if not events:
+                return changed
+            # then read until quiet for 'settle' seconds, e.g. rsync done
+            timeout = self.settle * 1000
+            for event in events:
+                mask = iflags.from_mask(event.mask)
+                if iflags.Q_OVERFLOW in mask or iflags.DELETE_SELF in mask:
+                    # events lost, or gfx removed: start again from scratch
+                    logger.warning("Lost track of changes in gfx directory.")
+                    self._reset()
+                    return None
+                if iflags.IGNORED in mask:
+                    # run directory removed
+                    self._watches.pop(event.wd, None)
+                    continue
+
+                run = self._watches.get(event.wd)
+                if run is None:
+                    # event in gfx: run directory added or removed
+                    if not is_run(event.name):
+                        continue
+                    run = event.name
+                    if iflags.ISDIR in mask and (
+                        iflags.CREATE in mask or iflags.MOVED_TO in mask
+                    ):
+                        self._add_run(run)
+                changed.add(run)